@@ -0,0 +1,14 @@
+"""
+Benchmarks for the database tools of both agents.
+
+Run against a throwaway local cluster (initdb + pg_ctl, no Docker) or an
+existing server, load reproducible synthetic tables and time every
+registered tool with cold and warm caches:
+
+    python -m benchmarks --scales 1e4,1e5,1e6 --repeat 5
+    python -m benchmarks --dsn "host=localhost dbname=bench user=postgres"
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+Reports are JSON files (one per run) tagged with the git commit, so runs
+from different commits can be compared.
+"""
@@ -0,0 +1,146 @@
+# cases.py
+
+"""
+One benchmark call per registered tool.
+
+Each Case names the module and function of a tool and the keyword
+arguments to call it with; "{table}" in an argument is replaced by the
+events table of the scale being measured. registered_tools() lists what
+the agents actually register, so uncovered() can flag any tool added
+later without a case here.
+
+Cases that read a result handle use "{handle}", which the runner fills
+with an export of HANDLE_QUERY made once per scale.
+
+FAN_OUT_TASKS is the multi-part request used to measure run_parallel:
+the runner also times the same calls made one after another and reports
+the wall-clock saving.
+"""
+
+from collections import namedtuple
+
+Case = namedtuple("Case", "agent module tool kwargs")
+
+# Tools that call external services rather than the database.
+SKIPPED = {
+    "convert_to_sql": "calls the OpenAI API",
+}
+
+_DB = "db_agent.tools.db_tools"
+_QUERY = "db_multi_agent.sub_agents.query_agent.tools.query_tools"
+_SCHEMA = "db_multi_agent.sub_agents.schema_agent.tools.schema_tools"
+_ANALYSIS = "db_multi_agent.sub_agents.analysis_agent.tools.analysis_tools"
+_VISUAL = "db_multi_agent.sub_agents.visual_agent.tools.visual_tools"
+_ROUTER = "db_multi_agent.tools.parallel_tools"
+
+_SELECT_PAGE = "SELECT * FROM {table} ORDER BY id LIMIT 500"
+_EXPLAIN = "EXPLAIN SELECT category, avg(amount) FROM {table} GROUP BY category"
+HANDLE_QUERY = "SELECT id, created_at, amount, score, category FROM {table}"
+
+# "Describe {table}, summarize its amounts and plot them over time."
+FAN_OUT_TASKS = [
+    {"tool": "describe_table", "args": {"table_name": "{table}"}},
+    {"tool": "time_series_summary", "args": {"table": "{table}", "date_col": "created_at", "agg_col": "amount"}},
+    {"tool": "top_k_column_values", "args": {"table": "{table}", "column": "category", "k": 5}},
+    {"tool": "compute_statistics", "args": {"table": "{table}", "column": "amount"}},
+    {"tool": "plot_time_series", "args": {"table": "{table}", "date_column": "created_at", "value_column": "amount"}},
+]
+
+CASES = [
+    # --- db_agent (single agent) ---
+    Case("db_agent", _DB, "run_query", {"query": _SELECT_PAGE}),
+    Case("db_agent", _DB, "list_tables", {}),
+    Case("db_agent", _DB, "describe_table", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "search_in_table", {"table_name": "{table}", "column": "note", "value": "abc"}),
+    Case("db_agent", _DB, "count_rows", {"table_name": "{table}", "mode": "exact"}),
+    Case("db_agent", _DB, "get_table_schema_json", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "get_foreign_keys", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "get_table_size", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "run_custom_sql", {"query": _EXPLAIN}),
+    Case("db_agent", _DB, "top_k_column_values", {"table": "{table}", "column": "category", "k": 5}),
+    Case("db_agent", _DB, "numeric_column_stats", {"table": "{table}", "column": "amount"}),
+    Case("db_agent", _DB, "profile_table", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "time_series_summary", {"table": "{table}", "date_column": "created_at", "agg_column": "amount"}),
+    Case("db_agent", _DB, "compute_correlation", {"table": "{table}", "col1": "amount", "col2": "score"}),
+    Case("db_agent", _DB, "correlation_matrix", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "get_latest_entries_from_table", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "get_primary_keys_for_table", {"table_name": "{table}"}),
+    Case("db_agent", _DB, "refresh_schema_cache", {}),
+    # --- db_multi_agent: query_agent ---
+    Case("query_agent", _QUERY, "run_query", {"query": _SELECT_PAGE}),
+    Case("query_agent", _QUERY, "run_custom_sql", {"query": _EXPLAIN}),
+    Case("query_agent", _QUERY, "export_query_result", {"query": HANDLE_QUERY}),
+    Case("query_agent", _QUERY, "search_in_table", {"table": "{table}", "column": "note", "value": "abc"}),
+    Case("query_agent", _QUERY, "count_rows", {"table": "{table}", "mode": "exact"}),
+    Case("query_agent", _QUERY, "top_k_column_values", {"table": "{table}", "column": "category", "k": 5}),
+    Case("query_agent", _QUERY, "numeric_column_stats", {"table": "{table}", "column": "amount"}),
+    Case("query_agent", _QUERY, "time_series_summary", {"table": "{table}", "date_col": "created_at", "agg_col": "amount"}),
+    Case("query_agent", _QUERY, "compute_correlation", {"table": "{table}", "col1": "amount", "col2": "score"}),
+    Case("query_agent", _QUERY, "get_latest_entries_from_table", {"table": "{table}"}),
+    # --- db_multi_agent: schema_agent ---
+    Case("schema_agent", _SCHEMA, "list_tables", {}),
+    Case("schema_agent", _SCHEMA, "describe_table", {"table_name": "{table}"}),
+    Case("schema_agent", _SCHEMA, "get_table_schema_json", {"table_name": "{table}"}),
+    Case("schema_agent", _SCHEMA, "get_foreign_keys", {"table_name": "{table}"}),
+    Case("schema_agent", _SCHEMA, "get_primary_keys_for_table", {"table_name": "{table}"}),
+    Case("schema_agent", _SCHEMA, "get_table_size", {"table_name": "{table}"}),
+    Case("schema_agent", _SCHEMA, "refresh_schema_cache", {}),
+    # --- db_multi_agent: analysis_agent ---
+    Case("analysis_agent", _ANALYSIS, "compute_statistics", {"table": "{table}", "column": "amount"}),
+    Case("analysis_agent", _ANALYSIS, "compute_correlation", {"table": "{table}", "col1": "amount", "col2": "score"}),
+    Case("analysis_agent", _ANALYSIS, "profile_table", {"table": "{table}"}),
+    Case("analysis_agent", _ANALYSIS, "correlation_matrix", {"table": "{table}"}),
+    Case("analysis_agent", _ANALYSIS, "describe_result", {"handle": "{handle}"}),
+    # --- db_multi_agent: visual_agent ---
+    Case("visual_agent", _VISUAL, "plot_histogram", {"table": "{table}", "column": "amount", "bins": 20}),
+    Case("visual_agent", _VISUAL, "plot_time_series", {"table": "{table}", "date_column": "created_at", "value_column": "amount"}),
+    Case("visual_agent", _VISUAL, "plot_result", {"handle": "{handle}", "x_column": "created_at", "y_column": "amount"}),
+    # --- db_multi_agent: router ---
+    Case("db_multi_agent", _ROUTER, "run_parallel", {"tasks": FAN_OUT_TASKS}),
+]
+
+
+def fill_table(value, table: str, handle: str = ""):
+    """`value` with "{table}" and "{handle}" replaced in every string, including inside dicts and lists."""
+    if isinstance(value, str):
+        return value.format(table=table, handle=handle)
+    if isinstance(value, dict):
+        return {key: fill_table(item, table, handle) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill_table(item, table, handle) for item in value]
+    return value
+
+
+def needs_handle(case: Case) -> bool:
+    """Whether the case reads a result handle."""
+    return "{handle}" in repr(case.kwargs)
+
+
+def bind(case: Case, table: str, handle: str = "") -> dict:
+    """The case's keyword arguments with {table} and {handle} filled in (also inside nested tasks)."""
+    return fill_table(case.kwargs, table, handle)
+
+
+def registered_tools() -> dict:
+    """{agent name: [tool names]} as registered on db_agent, the db_multi_agent router and its sub-agents."""
+    from db_agent.agent import root_agent as single_agent
+    from db_multi_agent.agent import root_agent as router
+
+    registered = {
+        "db_agent": [tool.__name__ for tool in single_agent.tools],
+        "db_multi_agent": [tool.__name__ for tool in router.tools],
+    }
+    for sub_agent in router.sub_agents:
+        registered[sub_agent.name] = [tool.__name__ for tool in sub_agent.tools]
+    return registered
+
+
+def uncovered() -> list:
+    """(agent, tool) pairs registered on an agent but without a Case or SKIPPED entry."""
+    covered = {(case.agent, case.tool) for case in CASES}
+    return [
+        (agent, tool)
+        for agent, tools in registered_tools().items()
+        for tool in tools
+        if (agent, tool) not in covered and tool not in SKIPPED
+    ]
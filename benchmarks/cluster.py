@@ -0,0 +1,136 @@
+# cluster.py
+
+"""
+A disposable PostgreSQL cluster for benchmarks.
+
+TempCluster runs initdb into a temporary (or given) data directory and
+starts postgres with pg_ctl, listening only on a Unix socket, with
+durability switched off since the data is synthetic. Binaries are taken
+from PG_BIN, `pg_config --bindir`, PATH or the usual distro locations.
+"""
+
+import getpass
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+
+# Durability is pointless for throwaway data and slows down bulk loads.
+DEFAULT_SETTINGS = {
+    "listen_addresses": "''",
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    "shared_buffers": "256MB",
+    "max_wal_size": "4GB",
+    "checkpoint_timeout": "30min",
+}
+
+
+class ClusterError(RuntimeError):
+    """Raised when the temporary cluster cannot be created or started."""
+
+
+def find_bin_dir() -> str:
+    """Locates the directory holding initdb and pg_ctl."""
+    candidates = [os.environ.get("PG_BIN")]
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        try:
+            candidates.append(subprocess.check_output([pg_config, "--bindir"], text=True).strip())
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    initdb = shutil.which("initdb")
+    if initdb:
+        candidates.append(os.path.dirname(initdb))
+    candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True)
+    candidates += sorted(glob.glob("/usr/pgsql-*/bin"), reverse=True)
+    for path in candidates:
+        if path and os.path.exists(os.path.join(path, "initdb")):
+            return path
+    raise ClusterError("initdb not found. Set PG_BIN to PostgreSQL's bin directory, or pass --dsn.")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TempCluster:
+    """
+    initdb + pg_ctl managed cluster. Used as a context manager it starts on
+    enter and stops on exit, deleting its data directory unless one was given.
+    """
+
+    def __init__(self, data_dir: str = None, port: int = None, bin_dir: str = None, settings: dict = None):
+        self.bin_dir = bin_dir or find_bin_dir()
+        self._owns_data_dir = data_dir is None
+        self.data_dir = data_dir or tempfile.mkdtemp(prefix="dbagent-bench-data-")
+        self.socket_dir = tempfile.mkdtemp(prefix="dbagent-bench-sock-")
+        self.port = port or _free_port()
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.log_file = os.path.join(self.socket_dir, "postgres.log")
+        self.user = "postgres"
+
+    @property
+    def db_config(self) -> dict:
+        """Connection parameters in the DB_CONFIG shape used by the agents."""
+        return {
+            "dbname": "postgres",
+            "user": self.user,
+            "password": "",
+            "host": self.socket_dir,
+            "port": self.port,
+        }
+
+    def _run(self, *args):
+        result = subprocess.run(args, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ClusterError(f"{os.path.basename(args[0])} failed: {result.stderr.strip() or result.stdout.strip()}")
+        return result.stdout
+
+    def initdb(self):
+        if os.path.exists(os.path.join(self.data_dir, "PG_VERSION")):
+            return
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            raise ClusterError("initdb refuses to run as root; run the benchmarks as another user or pass --dsn.")
+        self._run(
+            os.path.join(self.bin_dir, "initdb"), "-D", self.data_dir, "-U", self.user,
+            "-A", "trust", "-E", "UTF8", "--no-sync",
+        )
+
+    def start(self):
+        self.initdb()
+        options = " ".join(f"-c {key}={value}" for key, value in self.settings.items())
+        self._run(
+            os.path.join(self.bin_dir, "pg_ctl"), "-D", self.data_dir, "-l", self.log_file, "-w",
+            "-o", f"-p {self.port} -k {self.socket_dir} {options}", "start",
+        )
+        return self
+
+    def stop(self):
+        if os.path.exists(os.path.join(self.data_dir, "postmaster.pid")):
+            self._run(os.path.join(self.bin_dir, "pg_ctl"), "-D", self.data_dir, "-m", "fast", "-w", "stop")
+
+    def restart(self):
+        """Restarts the server, which empties shared_buffers (the OS page cache stays warm)."""
+        self.stop()
+        self.start()
+
+    def cleanup(self):
+        self.stop()
+        shutil.rmtree(self.socket_dir, ignore_errors=True)
+        if self._owns_data_dir:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+    def __repr__(self):
+        return f"TempCluster(data_dir={self.data_dir!r}, port={self.port}, user={getpass.getuser()!r})"
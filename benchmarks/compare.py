@@ -0,0 +1,76 @@
+# compare.py
+
+"""
+Compares two benchmark reports:
+
+    python -m benchmarks.compare old.json new.json --threshold 0.2
+
+Cases are matched on (scale, agent, tool). Prints the change in cold and
+warm-median latency per case and exits with status 1 when any case got
+slower than `threshold` (a fraction) beyond the --min-ms noise floor, or
+started failing.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return {(r["scale"], r["agent"], r["tool"]): r for r in report["results"]}, report["meta"]
+
+
+def _warm(result):
+    return result["warm"]["median_ms"] if result.get("warm") else None
+
+
+def _change(old, new, threshold: float, min_ms: float):
+    """(relative change or None, regressed?)"""
+    if old is None or new is None or old <= 0:
+        return None, False
+    ratio = (new - old) / old
+    return ratio, ratio > threshold and new - old > min_ms
+
+
+def compare(old_path: str, new_path: str, threshold: float = 0.2, min_ms: float = 1.0) -> int:
+    old, old_meta = _load(old_path)
+    new, new_meta = _load(new_path)
+    print(f"old: {old_meta.get('commit', '')[:10]} {old_meta.get('timestamp', '')}")
+    print(f"new: {new_meta.get('commit', '')[:10]} {new_meta.get('timestamp', '')}")
+    print(f"{'scale':>5} {'agent':<15} {'tool':<30} {'cold':>9} {'warm':>9}")
+
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        cold, cold_regressed = _change(before["cold_ms"], after["cold_ms"], threshold, min_ms)
+        warm, warm_regressed = _change(_warm(before), _warm(after), threshold, min_ms)
+        newly_failing = after.get("error") and not before.get("error")
+        flag = ""
+        if newly_failing:
+            flag = f"  NEW ERROR: {after['error']}"
+        elif cold_regressed or warm_regressed:
+            flag = "  REGRESSION"
+        regressions += bool(flag)
+        cells = [f"{c:+9.1%}" if c is not None else f"{'-':>9}" for c in (cold, warm)]
+        print(f"{key[0]:>5} {key[1]:<15} {key[2]:<30} {cells[0]} {cells[1]}{flag}")
+
+    for key in sorted(old.keys() - new.keys()):
+        print(f"{key[0]:>5} {key[1]:<15} {key[2]:<30} missing from new report")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description="Compare two benchmark reports.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (default 0.2)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore slowdowns smaller than this many ms")
+    args = parser.parse_args(argv)
+    return compare(args.old, args.new, args.threshold, args.min_ms)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# datasets.py
+
+"""
+Reproducible synthetic tables for the benchmarks.
+
+bench_customers holds CUSTOMERS rows; bench_events_<scale> (e.g.
+bench_events_1e6) holds `scale` rows referencing it. Values come from
+random() after setseed(seed) in a single serial INSERT, so the same seed
+always produces the same data. Each table records its generator version,
+seed and row count in its comment and is only rebuilt when they change,
+so a kept cluster (--data-dir) loads each scale once.
+"""
+
+import math
+
+GENERATOR_VERSION = 1
+CUSTOMERS = 10_000
+CATEGORIES = 50
+
+# Event timestamps are spread evenly over five years whatever the scale.
+_SPAN_SECONDS = 5 * 365 * 86400
+
+
+def scale_label(rows: int) -> str:
+    """1000000 -> '1e6'; non-powers of ten keep their digits."""
+    exponent = math.log10(rows) if rows > 0 else 0
+    return f"1e{int(exponent)}" if exponent.is_integer() else str(rows)
+
+
+def parse_scale(text: str) -> int:
+    """Parses '1e6', '1000000' or '1_000_000'."""
+    return int(float(text.replace("_", "")))
+
+
+def events_table(rows: int) -> str:
+    return f"bench_events_{scale_label(rows)}"
+
+
+def _signature(rows: int, seed: float) -> str:
+    return f"dbagent-bench v{GENERATOR_VERSION} seed={seed} rows={rows}"
+
+
+def _is_current(cursor, table: str, rows: int, seed: float) -> bool:
+    cursor.execute("SELECT obj_description(to_regclass(%s), 'pg_class');", (table,))
+    return cursor.fetchone()[0] == _signature(rows, seed)
+
+
+def _load_customers(cursor, seed: float):
+    cursor.execute("DROP TABLE IF EXISTS bench_customers CASCADE;")
+    cursor.execute("""
+        CREATE TABLE bench_customers (
+            id integer PRIMARY KEY,
+            name text NOT NULL,
+            city text NOT NULL,
+            created_at timestamptz NOT NULL
+        );
+    """)
+    cursor.execute("SELECT setseed(%s);", (seed,))
+    cursor.execute("""
+        INSERT INTO bench_customers
+        SELECT g,
+               'customer_' || g,
+               (ARRAY['Berlin', 'Lagos', 'Lima', 'Oslo', 'Osaka', 'Paris', 'Pune', 'Quito'])[1 + floor(random() * 8)::int],
+               timestamptz '2019-01-01' + random() * interval '365 days'
+        FROM generate_series(1, %s) g;
+    """, (CUSTOMERS,))
+
+
+def _load_events(cursor, table: str, rows: int, seed: float):
+    cursor.execute(f"DROP TABLE IF EXISTS {table};")
+    cursor.execute(f"""
+        CREATE TABLE {table} (
+            id bigint PRIMARY KEY,
+            customer_id integer NOT NULL REFERENCES bench_customers (id),
+            category text NOT NULL,
+            amount numeric(12, 2),
+            qty integer NOT NULL,
+            score double precision,
+            created_at timestamptz NOT NULL,
+            note text
+        );
+    """)
+    cursor.execute("SELECT setseed(%s);", (seed,))
+    # random() is evaluated left to right per row, so the data is deterministic.
+    # category is skewed (power 3) so top-k has clear heavy hitters; score
+    # follows amount so correlations are non-trivial; note is 20% NULL.
+    cursor.execute(f"""
+        INSERT INTO {table}
+        SELECT g,
+               1 + floor(random() * %(customers)s)::int,
+               'category_' || floor(power(random(), 3) * %(categories)s)::int,
+               a.amount,
+               floor(random() * 20)::int,
+               a.amount / 10 + random() * 25,
+               timestamptz '2020-01-01' + g * %(step)s * interval '1 second',
+               CASE WHEN random() < 0.2 THEN NULL ELSE md5(g::text) END
+        FROM generate_series(1, %(rows)s) g,
+             LATERAL (SELECT round((random() * 1000 + g * 0)::numeric, 2) AS amount) a;
+    """, {"customers": CUSTOMERS, "categories": CATEGORIES, "step": _SPAN_SECONDS / rows, "rows": rows})
+    cursor.execute(f"CREATE INDEX ON {table} (created_at);")
+    cursor.execute(f"CREATE INDEX ON {table} (category);")
+    cursor.execute(f"CREATE INDEX ON {table} (customer_id);")
+
+
+def ensure_datasets(conn, scales, seed: float = 0.42, log=print):
+    """Creates (or reuses) bench_customers and one events table per scale, then analyzes them."""
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("SET maintenance_work_mem = '512MB';")
+        # Rebuilding customers drops the events' foreign keys, so they are rebuilt too.
+        rebuilt = not _is_current(cursor, "bench_customers", CUSTOMERS, seed)
+        if rebuilt:
+            log(f"loading bench_customers ({CUSTOMERS:,} rows)")
+            _load_customers(cursor, seed)
+            cursor.execute("VACUUM ANALYZE bench_customers;")
+            cursor.execute(f"COMMENT ON TABLE bench_customers IS '{_signature(CUSTOMERS, seed)}';")
+        for rows in scales:
+            table = events_table(rows)
+            if not rebuilt and _is_current(cursor, table, rows, seed):
+                continue
+            log(f"loading {table} ({rows:,} rows)")
+            _load_events(cursor, table, rows, seed)
+            cursor.execute(f"VACUUM ANALYZE {table};")
+            cursor.execute(f"COMMENT ON TABLE {table} IS '{_signature(rows, seed)}';")
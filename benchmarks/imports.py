@@ -0,0 +1,78 @@
+# imports.py
+
+"""
+Import-time benchmark for the agent packages:
+
+    python -m benchmarks.imports --repeat 10
+
+Each import runs in a fresh interpreter (as a serverless cold start
+would), and the report lists the median/min wall time. It also lists which
+heavy optional dependencies got imported along the way; nothing in
+HEAVY_MODULES should appear until a tool actually needs it.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from .runner import _git
+
+MODULES = ("db_core", "db_agent", "db_multi_agent")
+HEAVY_MODULES = ("openai", "matplotlib", "matplotlib.pyplot", "numpy", "sqlglot")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module: str, repeat: int) -> dict:
+    """Imports `module` in `repeat` fresh interpreters; returns timings and heavy modules loaded."""
+    seconds, loaded = [], []
+    for _ in range(repeat):
+        probe = _PROBE.format(root=_ROOT, module=module, heavy=HEAVY_MODULES)
+        result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, cwd=_ROOT)
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        seconds.append(sample["seconds"])
+        loaded = sample["loaded"]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(seconds) * 1000, 1),
+        "min_ms": round(min(seconds) * 1000, 1),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports", description="Time cold imports of the agents.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--modules", default=",".join(MODULES), help="comma-separated modules to import")
+    parser.add_argument("--output", default="", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = [time_import(m.strip(), args.repeat) for m in args.modules.split(",") if m.strip()]
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<16} ERROR {r['error']}")
+        else:
+            heavy = ", ".join(r["heavy_modules_loaded"]) or "-"
+            print(f"{r['module']:<16} median {r['median_ms']:>8.1f} ms  min {r['min_ms']:>8.1f} ms  heavy: {heavy}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": _git("rev-parse", "HEAD"), "python": sys.version.split()[0], "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# runner.py
+
+"""
+Times every benchmark case and writes a JSON report.
+
+For each scale and case the runner makes one cold call, after clearing the
+result cache, the catalog snapshots and the connection pools (and, with
+--cold-restart on a managed cluster, restarting the server to empty
+shared_buffers). It then makes --repeat warm calls and records min, median,
+p95 and mean latency, plus the output size and any error. With
+--concurrency > 1 it also measures throughput with that many callers.
+
+When run_parallel is selected, run_fan_out() also times the calls of
+cases.FAN_OUT_TASKS made one after another against a single run_parallel
+call and reports the wall-clock saving under "fan_out".
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+from . import cases as bench_cases
+from .cluster import TempCluster
+from .datasets import ensure_datasets, events_table, parse_scale, scale_label
+
+REPORT_VERSION = 1
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# String-returning tools report failures in their output rather than raising.
+_ERROR_PREFIXES = ("Database error", "Error", "Invalid", "An unexpected error")
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.check_output(
+            ["git", *args], cwd=os.path.dirname(__file__), text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _apply_db_config(db_config: dict):
+    """Points both agents at the benchmark server by updating their DB_CONFIG dicts in place."""
+    import db_config as multi_agent_config
+    from db_agent import config as single_agent_config
+
+    for target in (multi_agent_config.DB_CONFIG, single_agent_config.DB_CONFIG):
+        target.clear()
+        target.update(db_config)
+
+
+def reset_caches():
+    """Drops every application-level cache the tools keep between calls."""
+    from db_core.catalog import clear_catalogs
+    from db_core.pool import close_all_pools
+    from db_core.result_cache import clear_result_cache
+
+    clear_result_cache()
+    clear_catalogs()
+    close_all_pools()
+
+
+def _error_of(output):
+    if isinstance(output, dict):
+        return output.get("error")
+    if isinstance(output, str) and output.startswith(_ERROR_PREFIXES):
+        return output.splitlines()[0][:200]
+    return None
+
+
+def _output_bytes(output) -> int:
+    text = output if isinstance(output, str) else json.dumps(output, default=str)
+    return len(text.encode("utf-8"))
+
+
+def _call(func, kwargs):
+    """Runs one call; returns (seconds, output bytes, error or None)."""
+    start = time.perf_counter()
+    try:
+        output = func(**kwargs)
+    except Exception as e:
+        return time.perf_counter() - start, 0, f"{type(e).__name__}: {e}"[:200]
+    return time.perf_counter() - start, _output_bytes(output), _error_of(output)
+
+
+def _summary(seconds: list) -> dict:
+    ordered = sorted(seconds)
+    return {
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def _throughput(func, kwargs, concurrency: int, calls: int) -> float:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda _: _call(func, kwargs), range(calls)))
+        return round(calls / (time.perf_counter() - start), 3)
+
+
+def make_handle(table: str) -> str:
+    """Exports cases.HANDLE_QUERY over `table` into a result handle for the cases that read one."""
+    from db_config import DB_CONFIG
+    from db_core.bulk import export_query
+    from db_core.pool import get_connection
+
+    with get_connection(DB_CONFIG) as conn:
+        return export_query(conn, bench_cases.fill_table(bench_cases.HANDLE_QUERY, table)).id
+
+
+def run_case(case, table: str, repeat: int, concurrency: int = 1, cold_restart=None, handle: str = "") -> dict:
+    """Measures one case against `table`: a cold call followed by `repeat` warm ones."""
+    func = getattr(importlib.import_module(case.module), case.tool)
+    kwargs = bench_cases.bind(case, table, handle)
+
+    reset_caches()
+    if cold_restart:
+        cold_restart()
+    cold_seconds, output_bytes, error = _call(func, kwargs)
+
+    warm = [_call(func, kwargs) for _ in range(repeat)]
+    result = {
+        "agent": case.agent,
+        "tool": case.tool,
+        "table": table,
+        "cold_ms": round(cold_seconds * 1000, 3),
+        "warm": _summary([seconds for seconds, _, _ in warm]) if warm else None,
+        "output_bytes": output_bytes,
+        "error": error or next((e for _, _, e in warm if e), None),
+    }
+    if concurrency > 1:
+        result["throughput_per_s"] = _throughput(func, kwargs, concurrency, max(repeat, concurrency) * 2)
+    return result
+
+
+def run_fan_out(table: str, repeat: int) -> dict:
+    """Median wall time of FAN_OUT_TASKS run serially vs through run_parallel, result cache cleared each time."""
+    from db_core.result_cache import clear_result_cache
+    from db_multi_agent.tools.parallel_tools import PARALLEL_TOOLS, run_parallel
+
+    tasks = bench_cases.fill_table(bench_cases.FAN_OUT_TASKS, table)
+
+    def serial():
+        for task in tasks:
+            PARALLEL_TOOLS[task["tool"]](**task["args"])
+
+    serial_seconds, parallel_seconds = [], []
+    for _ in range(max(repeat, 1)):
+        for func, samples in ((serial, serial_seconds), (lambda: run_parallel(tasks), parallel_seconds)):
+            clear_result_cache()
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+    serial_ms = statistics.median(serial_seconds) * 1000
+    parallel_ms = statistics.median(parallel_seconds) * 1000
+    return {
+        "table": table,
+        "tasks": [task["tool"] for task in tasks],
+        "serial_ms": round(serial_ms, 3),
+        "parallel_ms": round(parallel_ms, 3),
+        "saved_ms": round(serial_ms - parallel_ms, 3),
+        "speedup": round(serial_ms / parallel_ms, 2) if parallel_ms else None,
+    }
+
+
+def _server_version(db_config: dict) -> str:
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW server_version;")
+            return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the database tools.")
+    parser.add_argument("--scales", default="1e4,1e5", help="comma-separated event table sizes, e.g. 1e4,1e6,1e8")
+    parser.add_argument("--repeat", type=int, default=5, help="warm calls per case")
+    parser.add_argument("--concurrency", type=int, default=1, help="callers for the throughput measurement (1 = skip)")
+    parser.add_argument("--dsn", default="", help="use this server instead of a temporary initdb cluster")
+    parser.add_argument("--data-dir", default="", help="keep the temporary cluster here so datasets are reused")
+    parser.add_argument("--seed", type=float, default=0.42, help="setseed() value for the synthetic data")
+    parser.add_argument("--cold-restart", action="store_true",
+                        help="restart the managed cluster before each cold call (empties shared_buffers)")
+    parser.add_argument("--tools", default="", help="comma-separated tool names to run (default: all)")
+    parser.add_argument("--output", default="", help="report path (default: benchmarks/results/<time>-<commit>.json)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    scales = [parse_scale(s) for s in args.scales.split(",") if s.strip()]
+    wanted = {t.strip() for t in args.tools.split(",") if t.strip()}
+    selected = [case for case in bench_cases.CASES if not wanted or case.tool in wanted]
+
+    cluster = None
+    if args.dsn:
+        db_config = parse_dsn(args.dsn)
+        db_config.setdefault("dbname", "postgres")
+    else:
+        cluster = TempCluster(data_dir=args.data_dir or None).start()
+        db_config = cluster.db_config
+    cold_restart = cluster.restart if cluster and args.cold_restart else None
+
+    # plot_* tools write their PNGs to the working directory.
+    cwd, scratch = os.getcwd(), tempfile.mkdtemp(prefix="dbagent-bench-plots-")
+    try:
+        _apply_db_config(db_config)
+        missing = bench_cases.uncovered()
+        if missing:
+            print("warning: tools without a benchmark case: " + ", ".join(f"{a}.{t}" for a, t in missing), file=sys.stderr)
+
+        conn = psycopg2.connect(**db_config)
+        try:
+            ensure_datasets(conn, scales, seed=args.seed, log=lambda msg: print(msg, file=sys.stderr))
+        finally:
+            conn.close()
+
+        os.chdir(scratch)
+        results, fan_outs = [], []
+        for rows in scales:
+            table = events_table(rows)
+            handle = make_handle(table) if any(map(bench_cases.needs_handle, selected)) else ""
+            for case in selected:
+                result = run_case(case, table, args.repeat, args.concurrency, cold_restart, handle)
+                result["scale"] = scale_label(rows)
+                results.append(result)
+                warm = result["warm"]["median_ms"] if result["warm"] else float("nan")
+                status = f"  ERROR {result['error']}" if result["error"] else ""
+                print(f"{result['scale']:>5} {case.agent:<15} {case.tool:<30} "
+                      f"cold {result['cold_ms']:>10.1f} ms  warm {warm:>10.1f} ms{status}", file=sys.stderr)
+            if not wanted or "run_parallel" in wanted:
+                fan_out = run_fan_out(table, args.repeat)
+                fan_out["scale"] = scale_label(rows)
+                fan_outs.append(fan_out)
+                print(f"{fan_out['scale']:>5} fan-out of {len(fan_out['tasks'])} calls: "
+                      f"serial {fan_out['serial_ms']:.1f} ms, run_parallel {fan_out['parallel_ms']:.1f} ms, "
+                      f"saved {fan_out['saved_ms']:.1f} ms ({fan_out['speedup']}x)", file=sys.stderr)
+
+        report = {
+            "version": REPORT_VERSION,
+            "meta": {
+                "commit": _git("rev-parse", "HEAD"),
+                "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "server_version": _server_version(db_config),
+                "managed_cluster": cluster is not None,
+                "args": {k: v for k, v in vars(args).items() if k != "dsn"},
+            },
+            "results": results,
+            "fan_out": fan_outs,
+        }
+    finally:
+        os.chdir(cwd)
+        if cluster:
+            cluster.cleanup()
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['commit'][:10] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {output}", file=sys.stderr)
+    return 0
@@ -1,6 +1,10 @@
 # db_agent/__init__.py
 
 from google.adk import Agent
+from db_core import config as core_config
+from db_core.aio import to_async_tools
+from db_core.warmup import start_warm_up
+from . import config
 from .agent_config import global_instruction, instruction
 
 from .tools.db_tools import ( # Assuming db_tools.py is directly in the tools directory
@@ -15,10 +19,13 @@ from .tools.db_tools import ( # Assuming db_tools.py is directly in the tools di
     run_custom_sql,
     top_k_column_values,
     numeric_column_stats,
+    profile_table,
     time_series_summary,
     compute_correlation,
+    correlation_matrix,
     get_latest_entries_from_table,
     get_primary_keys_for_table,
+    refresh_schema_cache,
 )
 
 from .tools.nl2sql_tool import convert_to_sql
@@ -28,7 +35,8 @@ root_agent = Agent(
     model="gemini-2.0-flash",
     global_instruction=global_instruction,
     instruction=instruction,
-    tools=[
+    # Tools run as async wrappers so a slow query never blocks the event loop.
+    tools=to_async_tools([
         run_query,
         list_tables,
         describe_table,
@@ -40,14 +48,21 @@ root_agent = Agent(
         run_custom_sql,
         top_k_column_values,
         numeric_column_stats,
+        profile_table,
         time_series_summary,
         get_latest_entries_from_table,
         compute_correlation,
+        correlation_matrix,
         get_primary_keys_for_table,
+        refresh_schema_cache,
         convert_to_sql,
-    ]
+    ])
 )
 
+if core_config.WARMUP_ENABLED:
+    # Pre-open connections, load the catalog and import openai/sqlglot in the background.
+    start_warm_up(config.DB_CONFIG, modules=("openai", "sqlglot"))
+
 # If you prefer to have a function to get the agent instance:
 def create_agent():
     return root_agent
\ No newline at end of file
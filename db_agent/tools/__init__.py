@@ -10,9 +10,13 @@ from .db_tools import (
     run_custom_sql,
     top_k_column_values,
     numeric_column_stats,
+    profile_table,
     time_series_summary,
     compute_correlation,
+    correlation_matrix,
     get_latest_entries_from_table,
+    get_primary_keys_for_table,
+    refresh_schema_cache,
 )
 
 from .nl2sql_tool import convert_to_sql
@@ -28,9 +32,12 @@ __all__ = [
     "run_custom_sql",
     "top_k_column_values",
     "numeric_column_stats",
+    "profile_table",
     "time_series_summary",
     "compute_correlation",
+    "correlation_matrix",
     "convert_to_sql",
     "get_latest_entries_from_table",
     "get_primary_keys_for_table",
+    "refresh_schema_cache",
 ]
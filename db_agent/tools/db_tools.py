@@ -330,45 +330,100 @@
 
 import psycopg2
 import json
+from db_core.catalog import get_catalog
+from db_core.cost_guard import CostGuardError, run_guarded
+from db_core.estimates import COUNT_MODES, choose_count_estimate
+from db_core.formatting import OUTPUT_FORMATS, format_table, format_structured
+from db_core.heavy_hitters import TOPK_MODES, approximate_top_k, format_top_k
+from db_core.pool import get_connection
+from db_core.prepared import execute_prepared
+from db_core.profiling import (
+    parse_names, parse_quantiles, profile_table as profile_columns,
+    correlation_matrix as compute_correlation_matrix,
+)
+from db_core.result_cache import cached_query
+from db_core.search import format_search_path, plan_search
+from db_core.rollups import rollup_series
+from db_core.sampling import (
+    resolve_sample, numeric_stats_query, numeric_stats_from_row, format_numeric_stats,
+    mean_ci, correlation_ci, format_ci,
+)
+from db_core.sql_safety import QUERY_KINDS, UnsafeQuery, check_query
+from db_core.streaming import InvalidContinuationToken
+from db_core.timeseries import AGGREGATES, GRANULARITIES, format_summary, parse_list, summarize
 from .. import config # Assuming config.py holds DB_CONFIG dictionary
 
 # --- Helper for Connection Management ---
 def _get_db_connection():
-    """Establishes and returns a database connection."""
-    return psycopg2.connect(**config.DB_CONFIG)
+    """Checks out a connection from the shared pool (returned on exit of the with-block)."""
+    return get_connection(config.DB_CONFIG)
+
+def _get_catalog():
+    """Returns the cached pg_catalog snapshot (re-validated when stale)."""
+    return get_catalog(config.DB_CONFIG).snapshot()
+
+def _cached_fetch(tool: str, query: str, params, fetch):
+    """
+    Executes a read query and returns fetch(cursor), going through the shared
+    result cache so repeated/concurrent identical calls hit Postgres once.
+    """
+    def run():
+        with _get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                # Same round trip: the statement runs in a read-only transaction.
+                execute_prepared(cursor, query, params, prefix="SET TRANSACTION READ ONLY; ")
+                return fetch(cursor)
+    return cached_query(tool, config.DB_CONFIG, query, params, run)
+
+def _format_stream_result(result, output_format: str = "text") -> str:
+    """Renders a StreamResult as a compact table or as JSON records/columns."""
+    if output_format != "text":
+        return format_structured(
+            result.columns, result.rows, output_format,
+            truncated=result.truncated or None, continuation_token=result.continuation_token,
+            notice=result.notice or None,
+        )
+    # No head/tail elision: the continuation token resumes after the last row fetched,
+    # so every row of the page must be shown (the page is already bounded by the stream budget).
+    return format_table(
+        result.columns, result.rows, footer="\n".join(filter(None, (result.summary(), result.notice))),
+        head=None, tail=None,
+    )
 
 # --- Core Database Interaction Functions ---
 
-def run_query(query: str) -> str:
+def run_query(query: str, continuation_token: str = "", output_format: str = "text") -> str:
     """
     Executes a SQL SELECT query and returns formatted results.
-    Only SELECT queries are allowed for safety.
+    Only read-only SELECT/WITH/VALUES queries are allowed for safety; they run in a
+    read-only transaction and are bounded by an outer LIMIT at the database.
+    Rows are streamed from a server-side cursor and output stops at the configured
+    row/byte budget; pass the returned continuation_token to fetch the next rows.
+    output_format: "text" (compact table), or "records" / "columnar" for JSON.
     """
-    if not query.strip().lower().startswith("select"):
-        return "Only SELECT queries are allowed for safety."
-
     try:
+        statement = check_query(query, ("select",))
+    except UnsafeQuery as e:
+        return f"Only read-only SELECT queries are allowed for safety: {e}."
+    if output_format not in OUTPUT_FORMATS:
+        return f"Error: output_format must be one of {', '.join(OUTPUT_FORMATS)}."
+
+    def execute():
         with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                if not cursor.description: # Handle queries that return no data, like 'SELECT 1;'
-                    return "Query executed successfully. No results returned or no columns."
+            return run_guarded(conn, config.DB_CONFIG, "run_query", query, statement, continuation_token or None)
 
-                column_names = [desc[0] for desc in cursor.description]
+    try:
+        result = cached_query("run_query", config.DB_CONFIG, query, continuation_token, execute)
+        if result.columns is None: # Handle queries that return no data, like 'SELECT 1;'
+            return "Query executed successfully. No results returned or no columns."
 
-        if not rows:
+        if not result.rows:
             return "Query executed successfully. No results returned."
 
-        # Format results
-        formatted_output = []
-        header = " | ".join(column_names)
-        formatted_output.append(header)
-        formatted_output.append("-|-".join(["-" * len(col) for col in column_names]))
-        for row in rows:
-            formatted_output.append(" | ".join(str(item) for item in row))
-        return "\n".join(formatted_output)
+        return _format_stream_result(result, output_format)
 
+    except (InvalidContinuationToken, CostGuardError) as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         # In a real application, you'd want to log the full traceback here
         return f"Database error: {str(e)}"
@@ -379,15 +434,8 @@ def list_tables() -> str:
     Returns a list of all tables in the public schema, formatted as a string.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT table_name FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    ORDER BY table_name;
-                """)
-                tables = cursor.fetchall()
-        return "\n".join([table[0] for table in tables]) or "No tables found in public schema."
+        tables = _get_catalog().tables("public")
+        return "\n".join([table.name for table in tables]) or "No tables found in public schema."
     except Exception as e:
         return f"Database error: {str(e)}"
 
@@ -397,59 +445,55 @@ def describe_table(table_name: str) -> str:
     Describes the columns of a table: name, data type, nullable.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                # Parameterize table_name to prevent SQL injection, even though it's in WHERE clause
-                cursor.execute("""
-                    SELECT column_name, data_type, is_nullable
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                rows = cursor.fetchall()
-
-        if not rows:
+        table = _get_catalog().find(table_name)
+        if table is None or not table.columns:
             return f"No such table or no columns found for: {table_name}"
 
         formatted_output = []
         formatted_output.append("Column | Type | Nullable")
         formatted_output.append("-------|------|---------")
-        for col, dtype, nullable in rows:
-            formatted_output.append(f"{col} | {dtype} | {nullable}")
+        for col in table.columns:
+            formatted_output.append(f"{col.name} | {col.data_type} | {'YES' if col.nullable else 'NO'}")
         return "\n".join(formatted_output)
 
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def search_in_table(table_name: str, column: str, value: str) -> str:
+def search_in_table(table_name: str, column: str, value: str, mode: str = "auto") -> str:
     """
     Searches for a value in a specific column of a table.
-    Limits results to 10. Columns are cast to text for ILIKE comparison.
+    Limits results to 10. The predicate is chosen from the column's indexes
+    (db_core/search.py) so the search can use one instead of scanning the table.
+    mode: "contains" (substring, case-insensitive), "prefix", "exact" or
+    "fulltext" (whole words). "auto" (default) picks what the indexes support,
+    in order trigram substring, full-text, prefix, exact; text columns without
+    such an index get a substring scan and other columns an exact match.
+    The result names the path used and warns when it is a sequential scan.
     """
     try:
+        table_info = get_catalog(config.DB_CONFIG).snapshot().find(table_name)
+        plan = plan_search(table_info, column, value, (mode or "auto").lower())
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
                 # IMPORTANT: Dynamically adding table/column names directly into f-strings
                 # can be an SQL injection risk if inputs are not trusted/sanitized.
                 # For this specific tool, assuming table_name and column are validated
                 # or come from internal introspection. Value is safely parameterized.
-                query = f"SELECT * FROM {table_name} WHERE {column}::text ILIKE %s LIMIT 10;"
-                cursor.execute(query, (f"%{value}%",))
+                query = f"SELECT * FROM {table_name} WHERE {plan.where} LIMIT 10;"
+                cursor.execute(query, plan.params)
                 rows = cursor.fetchall()
                 column_names = [desc[0] for desc in cursor.description]
 
         if not rows:
-            return f"No results found for '{value}' in {table_name}.{column}"
+            return f"No results found for '{value}' in {table_name}.{column}\n{format_search_path(plan)}"
 
-        formatted_output = []
-        header = " | ".join(column_names)
-        formatted_output.append(header)
-        formatted_output.append("-|-".join(["-" * len(col) for col in column_names]))
-        for row in rows:
-            formatted_output.append(" | ".join(str(item) for item in row))
-        return "\n".join(formatted_output)
+        return f"{format_search_path(plan)}\n{format_table(column_names, rows)}"
 
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except psycopg2.DataError:
+        return f"No results found for '{value}' in {table_name}.{column}: it is not a valid value for the column's type."
     except psycopg2.errors.UndefinedColumn:
         return f"Error: Column '{column}' does not exist in table '{table_name}'."
     except psycopg2.errors.UndefinedTable:
@@ -458,17 +502,34 @@ def search_in_table(table_name: str, column: str, value: str) -> str:
         return f"Database error: {str(e)}"
 
 
-def count_rows(table_name: str) -> str:
+def count_rows(table_name: str, mode: str = "auto", where: str = "") -> str:
     """
-    Returns the number of rows in a table.
+    Returns the number of rows in a table, optionally only those matching a WHERE condition.
+    mode: "exact" runs COUNT(*); "approximate" answers instantly from planner statistics
+    (an EXPLAIN estimate when `where` is given); "auto" (default) approximates only
+    tables too large to scan quickly. Approximate results are labeled as estimates.
     """
+    mode = (mode or "auto").lower()
+    if mode not in COUNT_MODES:
+        return f"Error: mode must be one of {', '.join(COUNT_MODES)}."
+    if ";" in where:
+        return "Error: 'where' must be a single condition, without ';'."
+    matching = f" matching {where}" if where else ""
     try:
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                # Safer to use execute for table_name if from untrusted source
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-                count = cursor.fetchone()[0]
-        return f"Table '{table_name}' contains {count} rows."
+                cursor.execute("SET TRANSACTION READ ONLY;")
+                estimate = choose_count_estimate(cursor, table_name, where, mode)
+        if estimate is not None:
+            return (
+                f"Table '{table_name}' contains approximately {estimate.rows:,} rows{matching} "
+                f"(estimate from {estimate.source}; use mode='exact' for an exact count)."
+            )
+
+        # Safer to use execute for table_name if from untrusted source
+        query = f"SELECT COUNT(*) FROM {table_name}" + (f" WHERE {where}" if where else "") + ";"
+        count = _cached_fetch("count_rows", query, None, lambda cursor: cursor.fetchone()[0])
+        return f"Table '{table_name}' contains {count} rows{matching}."
     except psycopg2.errors.UndefinedTable:
         return f"Error: Table '{table_name}' does not exist."
     except Exception as e:
@@ -480,18 +541,11 @@ def get_table_schema_json(table_name: str) -> str:
     Returns the schema of a table as a JSON object string.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT column_name, data_type, is_nullable
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                schema = [
-                    {"column": col, "type": dtype, "nullable": nullable == 'YES'} # Convert 'YES'/'NO' to boolean
-                    for col, dtype, nullable in cursor.fetchall()
-                ]
+        table = _get_catalog().find(table_name)
+        schema = [
+            {"column": col.name, "type": col.data_type, "nullable": col.nullable}
+            for col in (table.columns if table else [])
+        ]
 
         if not schema:
             return f"No such table or no columns found for: {table_name}"
@@ -506,33 +560,17 @@ def get_foreign_keys(table_name: str) -> str:
     Lists foreign key constraints in the specified table.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT
-                        tc.constraint_name,
-                        kcu.column_name,
-                        ccu.table_name AS foreign_table_name,
-                        ccu.column_name AS foreign_column_name
-                    FROM
-                        information_schema.table_constraints AS tc
-                        JOIN information_schema.key_column_usage AS kcu
-                          ON tc.constraint_name = kcu.constraint_name
-                        JOIN information_schema.constraint_column_usage AS ccu
-                          ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_name = %s
-                    ORDER BY tc.constraint_name, kcu.ordinal_position;
-                """, (table_name,))
-                results = cursor.fetchall()
-
-        if not results:
+        table = _get_catalog().find(table_name)
+        if table is None or not table.foreign_keys:
             return f"No foreign keys found in table: {table_name}"
 
         formatted_output = []
         formatted_output.append("Constraint | Column | References")
         formatted_output.append("-----------|--------|----------")
-        for constraint, col, ref_table, ref_col in results:
-            formatted_output.append(f"{constraint} | {col} | {ref_table}.{ref_col}")
+        for fk in table.foreign_keys:
+            # Composite keys list one line per column pair, in key order.
+            for col, ref_col in zip(fk.columns, fk.ref_columns):
+                formatted_output.append(f"{fk.constraint} | {col} | {fk.ref_table}.{ref_col}")
         return "\n".join(formatted_output)
 
     except Exception as e:
@@ -548,7 +586,7 @@ def get_table_size(table_name: str) -> str:
             with conn.cursor() as cursor:
                 # Use %s for table_name, then pass it as a parameter
                 # pg_total_relation_size needs a regclass, which can take a quoted string
-                cursor.execute("""
+                execute_prepared(cursor, """
                     SELECT pg_size_pretty(pg_total_relation_size(%s::regclass));
                 """, (table_name,))
                 size = cursor.fetchone()[0]
@@ -559,58 +597,64 @@ def get_table_size(table_name: str) -> str:
         return f"Database error: {str(e)}"
 
 
-def run_custom_sql(query: str) -> str:
+def run_custom_sql(query: str, continuation_token: str = "", output_format: str = "text") -> str:
     """
-    Runs a custom SQL query (non-modifying) like EXPLAIN or SHOW statements.
+    Runs a custom read-only SQL query: SELECT, EXPLAIN (of a read-only query) or SHOW.
+    Output is capped at the configured row/byte budget; pass the returned
+    continuation_token to fetch the next rows.
+    output_format: "text" (compact table), or "records" / "columnar" for JSON.
     """
+    if output_format not in OUTPUT_FORMATS:
+        return f"Error: output_format must be one of {', '.join(OUTPUT_FORMATS)}."
+    try:
+        statement = check_query(query, QUERY_KINDS)
+    except UnsafeQuery as e:
+        return f"Destructive or schema-modifying queries are not allowed for safety: {e}."
     try:
-        # Check for forbidden keywords (case-insensitive)
-        forbidden_keywords = ["insert", "update", "delete", "drop", "alter", "create", "truncate"]
-        if any(word in query.lower() for word in forbidden_keywords):
-            return "Destructive or schema-modifying queries are not allowed for safety."
-
         with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                if not cursor.description: # Handle queries that return no data, like 'EXPLAIN ANALYZE SELECT 1;'
-                    return "Query executed successfully. No results returned or no columns."
+            result = run_guarded(conn, config.DB_CONFIG, "run_custom_sql", query, statement, continuation_token or None)
+        if result.columns is None: # Handle queries that return no data, like 'EXPLAIN ANALYZE SELECT 1;'
+            return "Query executed successfully. No results returned or no columns."
 
-                column_names = [desc[0] for desc in cursor.description]
-
-        if not rows:
+        if not result.rows:
             return "Query executed successfully. No results returned."
 
-        formatted_output = []
-        header = " | ".join(column_names)
-        formatted_output.append(header)
-        formatted_output.append("-|-".join(["-" * len(col) for col in column_names]))
-        for row in rows:
-            formatted_output.append(" | ".join(str(item) for item in row))
-        return "\n".join(formatted_output)
+        return _format_stream_result(result, output_format)
 
+    except (InvalidContinuationToken, CostGuardError) as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def top_k_column_values(table: str, column: str, k: int = 5) -> str:
+def top_k_column_values(table: str, column: str, k: int = 5, mode: str = "auto") -> str:
     """
     Returns the top-K most frequent values in a column.
+    mode: "exact" always runs GROUP BY; "approximate" answers from pg_stats when
+    its statistics are fresh, else from a sketch over a table sample, with
+    error bounds; "auto" (default) approximates only very large tables.
     """
+    mode = (mode or "auto").lower()
+    if mode not in TOPK_MODES:
+        return f"Error: mode must be one of {', '.join(TOPK_MODES)}."
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                # Again, for column and table, assume validated or internal source.
-                query = f"""
-                    SELECT {column}::text, COUNT(*) as freq
-                    FROM {table}
-                    WHERE {column} IS NOT NULL -- Exclude NULLs from frequency count
-                    GROUP BY {column}
-                    ORDER BY freq DESC
-                    LIMIT %s;
-                """
-                cursor.execute(query, (k,))
-                rows = cursor.fetchall()
+        def estimate():
+            with _get_db_connection() as conn:
+                return approximate_top_k(conn, table, column, k, mode)
+        approx = cached_query("top_k_column_values", config.DB_CONFIG, f"top_k {mode} {table} {column}", (k,), estimate)
+        if approx is not None:
+            return format_top_k(approx, table, column)
+
+        # Again, for column and table, assume validated or internal source.
+        query = f"""
+            SELECT {column}::text, COUNT(*) as freq
+            FROM {table}
+            WHERE {column} IS NOT NULL -- Exclude NULLs from frequency count
+            GROUP BY {column}
+            ORDER BY freq DESC
+            LIMIT %s;
+        """
+        rows = _cached_fetch("top_k_column_values", query, (k,), lambda cursor: cursor.fetchall())
 
         if not rows:
             return f"No data or distinct values found in {table}.{column}"
@@ -625,27 +669,38 @@ def top_k_column_values(table: str, column: str, k: int = 5) -> str:
         return f"Database error: {str(e)}"
 
 
-def numeric_column_stats(table: str, column: str) -> str:
+def numeric_column_stats(table: str, column: str, sample: str = "") -> str:
     """
     Returns basic statistics for a numeric column.
+    sample: optional "5%" or a row count like "100000" (append " bernoulli" for
+    row-level sampling) to estimate from a TABLESAMPLE instead of scanning the
+    whole table; estimates then carry 95% confidence intervals.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                # Validate column is numeric type before executing if possible,
-                # or rely on DB error. Assume table/column safe from injection.
-                query = f"""
-                    SELECT
-                        AVG({column}) AS mean,
-                        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {column}) AS median,
-                        STDDEV({column}) AS stddev,
-                        MIN({column}) AS min,
-                        MAX({column}) AS max
-                    FROM {table}
-                    WHERE {column} IS NOT NULL; -- Exclude NULLs from calculations
-                """
-                cursor.execute(query)
-                stats = cursor.fetchone()
+        spec = resolve_sample(config.DB_CONFIG, table, sample)
+        if spec is not None:
+            query, params = numeric_stats_query(table, column, spec)
+            stats = numeric_stats_from_row(
+                _cached_fetch("numeric_column_stats", query, params, lambda cursor: cursor.fetchone())
+            )
+            if not stats["rows"]:
+                return f"No numeric data found in the sample of {table}.{column}; try a larger sample."
+            return format_numeric_stats(stats, spec)
+
+        # Validate column is numeric type before executing if possible,
+        # or rely on DB error. Assume table/column safe from injection.
+        # NULLs are excluded from the calculations.
+        query = f"""
+            SELECT
+                AVG({column}) AS mean,
+                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {column}) AS median,
+                STDDEV({column}) AS stddev,
+                MIN({column}) AS min,
+                MAX({column}) AS max
+            FROM {table}
+            WHERE {column} IS NOT NULL;
+        """
+        stats = _cached_fetch("numeric_column_stats", query, None, lambda cursor: cursor.fetchone())
 
         # Check if any stats are None (e.g., if table is empty or column has only NULLs)
         if all(s is None for s in stats):
@@ -664,35 +719,104 @@ def numeric_column_stats(table: str, column: str) -> str:
         return f"Error: Table '{table}' does not exist."
     except psycopg2.errors.DatatypeMismatch: # Or similar error for non-numeric column
         return f"Error: Column '{column}' in table '{table}' is not a numeric type."
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def time_series_summary(table: str, date_column: str, agg_column: str) -> str:
+def profile_table(table_name: str, columns: str = "", quantiles: str = "0.25,0.5,0.75") -> str:
     """
-    Aggregates a numeric column by month/year using a date column.
-    Returns the average of the aggregation column per month.
+    Profiles many columns of a table in a single scan: row count, null
+    fraction and approximate distinct count for every column, plus mean,
+    stddev, min, max and the requested quantiles for numeric columns (min/max
+    for date/time columns). `columns` is an optional comma-separated subset;
+    pass quantiles="" to skip the quantile sorts. Returns a compact JSON summary.
     """
     try:
+        table = _get_catalog().find(table_name)
+        if table is None:
+            return f"Error: Table '{table_name}' does not exist."
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                # Ensure date_column and agg_column are valid and not injectable.
-                # Assume they come from internal validation or trusted source.
-                query = f"""
-                    SELECT DATE_TRUNC('month', {date_column})::date AS month_start,
-                           AVG({agg_column}) AS average
-                    FROM {table}
-                    WHERE {date_column} IS NOT NULL AND {agg_column} IS NOT NULL
-                    GROUP BY month_start
-                    ORDER BY month_start;
-                """
-                cursor.execute(query)
-                rows = cursor.fetchall()
+                profile = profile_columns(cursor, table, parse_names(columns), parse_quantiles(quantiles))
+        return json.dumps(profile, separators=(",", ":"))
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Database error: {str(e)}"
+
+
+def time_series_summary(
+    table: str,
+    date_column: str,
+    agg_column: str,
+    sample: str = "",
+    granularities: str = "month",
+    aggregates: str = "avg",
+    fill_gaps: bool = False,
+    timezone: str = "",
+) -> str:
+    """
+    Aggregates a numeric column by month/year using a date column.
+    Returns the average of the aggregation column per month.
+    sample: optional "5%" or a row count (see numeric_column_stats); monthly
+    averages are then estimated from a TABLESAMPLE with 95% confidence intervals.
+    granularities: comma-separated buckets, e.g. "day,week,month" (hour, day,
+    week, month, quarter, year).
+    aggregates: comma-separated, e.g. "avg,sum,count,p95" (avg, sum, count,
+    min, max, stddev, median, or a percentile pNN with NN 1–99).
+    fill_gaps: also list empty buckets (count 0), generated with generate_series.
+    timezone: e.g. "Europe/Paris"; timestamp-with-time-zone columns are then
+    bucketed by local day/week/month in that zone.
+    With any of these four options the summary is computed in one scan
+    (GROUPING SETS) and returned as one JSON payload with a series per
+    granularity; `sample` applies to the default monthly average only.
+    """
+    try:
+        if (granularities, aggregates, fill_gaps, timezone) != ("month", "avg", False, ""):
+            if sample:
+                return "Error: sample only applies to the default monthly average."
+            grains = parse_list(granularities, GRANULARITIES, "granularity")
+            aggs = parse_list(aggregates, AGGREGATES, "aggregate")
+            with _get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    payload = summarize(
+                        cursor, config.DB_CONFIG, table, date_column, agg_column, grains, aggs, fill_gaps, timezone
+                    )
+            return format_summary(payload)
+        spec = resolve_sample(config.DB_CONFIG, table, sample)
+        if spec is None:
+            # Exact monthly averages come from the incremental rollup (db_core/rollups.py).
+            rows = rollup_series(config.DB_CONFIG, table, date_column, agg_column, "month")
+        else:
+            with _get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    # Ensure date_column and agg_column are valid and not injectable.
+                    # Assume they come from internal validation or trusted source.
+                    # Sampled averages also need each month's spread and size for the interval.
+                    query = f"""
+                        SELECT DATE_TRUNC('month', {date_column})::date AS month_start,
+                               AVG({agg_column}) AS average, STDDEV({agg_column}) AS stddev, COUNT(*) AS n
+                        FROM {table} {spec.clause}
+                        WHERE {date_column} IS NOT NULL AND {agg_column} IS NOT NULL
+                        GROUP BY month_start
+                        ORDER BY month_start;
+                    """
+                    cursor.execute(query)
+                    rows = cursor.fetchall()
 
         if not rows:
             return f"No time series data found in {table} for columns {date_column} and {agg_column}."
 
-        return "\n".join([f"{month_start} : {avg:.2f}" for month_start, avg in rows])
+        if spec is None:
+            return "\n".join([f"{month_start} : {avg:.2f}" for month_start, _, avg, *_ in rows])
+        lines = [f"Estimated from a {spec.describe(sum(n for *_, n in rows))}:"]
+        lines += [
+            f"{month_start} : {avg:.2f}{format_ci(mean_ci(avg, stddev, n))}"
+            for month_start, avg, stddev, n in rows
+        ]
+        return "\n".join(lines)
     except psycopg2.errors.UndefinedColumn:
         return f"Error: One of the columns ('{date_column}', '{agg_column}') does not exist in table '{table}'."
     except psycopg2.errors.UndefinedTable:
@@ -701,24 +825,37 @@ def time_series_summary(table: str, date_column: str, agg_column: str) -> str:
          return f"Error: Column '{date_column}' in table '{table}' is not a valid date/time type."
     except psycopg2.errors.DatatypeMismatch: # If agg_column isn't numeric
         return f"Error: Column '{agg_column}' in table '{table}' is not a numeric type."
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def compute_correlation(table: str, col1: str, col2: str) -> str:
+def compute_correlation(table: str, col1: str, col2: str, sample: str = "") -> str:
     """
     Computes the Pearson correlation between two numeric columns.
+    sample: optional "5%" or a row count (see numeric_column_stats); the
+    coefficient is then estimated from a TABLESAMPLE with a 95% Fisher-z interval.
     """
     try:
+        spec = resolve_sample(config.DB_CONFIG, table, sample)
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
                 # Assume table, col1, col2 are safe/validated.
-                query = f"SELECT CORR({col1}, {col2}) FROM {table} WHERE {col1} IS NOT NULL AND {col2} IS NOT NULL;"
+                query = (
+                    f"SELECT CORR({col1}, {col2}), COUNT(*) FROM {table} {spec.clause if spec else ''} "
+                    f"WHERE {col1} IS NOT NULL AND {col2} IS NOT NULL;"
+                )
                 cursor.execute(query)
-                corr = cursor.fetchone()[0]
+                corr, n = cursor.fetchone()
 
         if corr is None:
             return f"Correlation could not be computed for {col1} and {col2} in {table}. Check if there is enough non-null data."
+        if spec is not None:
+            return (
+                f"Correlation between {col1} and {col2}: {corr:.4f}{format_ci(correlation_ci(corr, n), 4)}, "
+                f"estimated from a {spec.describe(n)}"
+            )
         return f"Correlation between {col1} and {col2}: {corr:.4f}"
     except psycopg2.errors.UndefinedColumn:
         return f"Error: One of the columns ('{col1}', '{col2}') does not exist in table '{table}'."
@@ -726,6 +863,29 @@ def compute_correlation(table: str, col1: str, col2: str) -> str:
         return f"Error: Table '{table}' does not exist."
     except psycopg2.errors.DatatypeMismatch: # If columns aren't numeric
         return f"Error: One or both columns ('{col1}', '{col2}') in table '{table}' are not numeric types."
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Database error: {str(e)}"
+
+
+def correlation_matrix(table_name: str, columns: str = "", method: str = "pearson") -> str:
+    """
+    Computes all pairwise correlations among numeric columns in one scan.
+    `columns` is an optional comma-separated subset (default: every numeric
+    column); `method` is 'pearson' or 'spearman'. Returns compact JSON with
+    the column order and the symmetric matrix.
+    """
+    try:
+        table = _get_catalog().find(table_name)
+        if table is None:
+            return f"Error: Table '{table_name}' does not exist."
+        with _get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                result = compute_correlation_matrix(cursor, table, parse_names(columns), method.lower())
+        return json.dumps(result, separators=(",", ":"))
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
     
@@ -739,38 +899,32 @@ def get_latest_entries_from_table(table_name: str) -> str:
     to determine the 'latest' entry.
     Returns the full row of the latest entry.
     """
+    order_column = None
     try:
+        # First, get column names and types to infer a suitable ordering column
+        table = _get_catalog().find(table_name)
+        if table is None or not table.columns:
+            return f"No such table: {table_name}"
+        columns_info = [(col.name, col.data_type) for col in table.columns]
+
+        # Prioritize columns for 'latest'
+        # Check for timestamp/date columns first
+        for col_name, data_type in columns_info:
+            if col_name.lower() in ('created_at', 'updated_at', 'timestamp', 'date') and 'timestamp' in data_type:
+                order_column = col_name
+                break
+        # If no clear timestamp, try 'id' (assuming it's an auto-incrementing primary key)
+        if not order_column:
+            for col_name, data_type in columns_info:
+                if col_name.lower() == 'id':
+                    order_column = col_name
+                    break
+
+        if not order_column:
+            return f"Could not determine a suitable 'latest' column (like 'created_at', 'updated_at', 'id') for table: {table_name}. Please specify a column if you want to order."
+
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                # First, get column names and types to infer a suitable ordering column
-                cursor.execute("""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                columns_info = cursor.fetchall()
-
-                if not columns_info:
-                    return f"No such table: {table_name}"
-
-                # Prioritize columns for 'latest'
-                order_column = None
-                # Check for timestamp/date columns first
-                for col_name, data_type in columns_info:
-                    if col_name.lower() in ('created_at', 'updated_at', 'timestamp', 'date') and 'timestamp' in data_type:
-                        order_column = col_name
-                        break
-                # If no clear timestamp, try 'id' (assuming it's an auto-incrementing primary key)
-                if not order_column:
-                    for col_name, data_type in columns_info:
-                        if col_name.lower() == 'id':
-                            order_column = col_name
-                            break
-
-                if not order_column:
-                    return f"Could not determine a suitable 'latest' column (like 'created_at', 'updated_at', 'id') for table: {table_name}. Please specify a column if you want to order."
-
                 # Execute the query to get the latest entry
                 query = f"SELECT * FROM {table_name} ORDER BY {order_column} DESC LIMIT 1;"
                 cursor.execute(query)
@@ -780,12 +934,7 @@ def get_latest_entries_from_table(table_name: str) -> str:
         if not row:
             return f"Table '{table_name}' is empty."
 
-        formatted_output = []
-        header = " | ".join(column_names)
-        formatted_output.append(header)
-        formatted_output.append("-|-".join(["-" * len(col) for col in column_names]))
-        formatted_output.append(" | ".join(str(item) for item in row))
-        return "\n".join(formatted_output)
+        return format_table(column_names, [row])
 
     except psycopg2.errors.UndefinedTable:
         return f"Error: Table '{table_name}' does not exist."
@@ -803,25 +952,12 @@ def get_primary_keys_for_table(table_name: str) -> str:
     Returns the primary key columns for a specified table.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT kcu.column_name
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                      ON tc.constraint_name = kcu.constraint_name
-                    WHERE tc.constraint_type = 'PRIMARY KEY'
-                      AND tc.table_name = %s
-                    ORDER BY kcu.ordinal_position;
-                """, (table_name,))
-                pk_columns = cursor.fetchall()
+        table = _get_catalog().find(table_name)
+        pk_column_names = table.primary_key if table else []
 
-        if not pk_columns:
+        if not pk_column_names:
             return f"No primary key found for table: {table_name}"
 
-        # Extract column names from the fetched rows
-        pk_column_names = [col[0] for col in pk_columns]
-
         if len(pk_column_names) == 1:
             return f"The primary key for '{table_name}' is: {pk_column_names[0]}"
         else:
@@ -830,4 +966,16 @@ def get_primary_keys_for_table(table_name: str) -> str:
     except psycopg2.errors.UndefinedTable:
         return f"Error: Table '{table_name}' does not exist."
     except Exception as e:
-        return f"Database error: {str(e)}"
\ No newline at end of file
+        return f"Database error: {str(e)}"
+
+
+def refresh_schema_cache() -> str:
+    """
+    Reloads the cached database catalog (tables, columns, keys, indexes).
+    Use after schema changes if the schema tools return stale results.
+    """
+    try:
+        snapshot = get_catalog(config.DB_CONFIG).refresh()
+        return f"Schema cache refreshed: {len(snapshot.tables('public'))} tables in public schema."
+    except Exception as e:
+        return f"Database error: {str(e)}"
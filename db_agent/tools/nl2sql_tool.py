@@ -1,19 +1,87 @@
+import hashlib
+import re
+import threading
 from typing import Optional
-from openai import OpenAI
+from db_core import config as core_config
+from db_core.cache import LRUCache, SQLiteCache
+from db_core.catalog import get_catalog
 from .. import config
 
 
-OPEN_AI_KEY = config.OPEN_AI_KEY
+OPEN_AI_KEY = getattr(config, "OPEN_AI_KEY", None)
+
+
+# The OpenAI client is created on first use: importing openai costs close to a
+# second, which every agent start-up paid even when convert_to_sql never ran.
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Returns the shared OpenAI client, importing openai on the first call."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPEN_AI_KEY)
+    return _client
+
+
+# --- Memoization of generated SQL ---
+# Keyed on the normalized question, a hash of table_context and the catalog
+# fingerprint, so a schema change never serves SQL written for the old schema.
+if core_config.NL2SQL_CACHE_PATH:
+    _cache = SQLiteCache(core_config.NL2SQL_CACHE_PATH, core_config.NL2SQL_CACHE_MAX_ENTRIES, core_config.NL2SQL_CACHE_TTL)
+else:
+    _cache = LRUCache(core_config.NL2SQL_CACHE_MAX_ENTRIES, core_config.NL2SQL_CACHE_TTL)
+_cache_generation = None  # catalog fingerprint the cached entries were generated against
+_generation_lock = threading.Lock()
+
+
+def _normalize_question(nl_query: str) -> str:
+    """
+    Collapses whitespace and drops trailing ?.!; punctuation. Case and quotes
+    are kept: they can be part of a literal ("status = 'Shipped'").
+    """
+    return re.sub(r"\s+", " ", nl_query).strip().rstrip("?.!; ")
+
+
+def _schema_fingerprint() -> str:
+    try:
+        return get_catalog(config.DB_CONFIG).fingerprint()
+    except Exception:
+        # Unknown (e.g. the database is unreachable): the cache is bypassed for this call.
+        return ""
+
+
+def _cache_key(nl_query: str, table_context: str, fingerprint: str) -> str:
+    context_hash = hashlib.sha256(" ".join((table_context or "").split()).encode("utf-8")).hexdigest()
+    raw = "\x00".join([_normalize_question(nl_query), context_hash, fingerprint])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _check_generation(fingerprint: str):
+    """Drops every cached entry once the schema fingerprint changes."""
+    global _cache_generation
+    with _generation_lock:
+        if _cache_generation is not None and fingerprint != _cache_generation:
+            _cache.clear()
+        _cache_generation = fingerprint
+
+
+def get_cache_stats() -> dict:
+    """Returns hit/miss/eviction counters of the convert_to_sql cache."""
+    return _cache.stats()
 
 
-# Initialize OpenAI client with API key from config
-client = OpenAI(api_key=OPEN_AI_KEY)
 def convert_to_sql(nl_query: str, table_context: Optional[str] = "") -> str:
     """
     Tool Name: convert_to_sql
 
     Description:
         Converts a natural language prompt into a SQL SELECT query using OpenAI's GPT-4.
+        Repeated questions against the same schema are answered from a cache.
 
     Parameters:
         nl_query (str): A user query in natural language.
@@ -22,6 +90,15 @@ def convert_to_sql(nl_query: str, table_context: Optional[str] = "") -> str:
     Returns:
         A SQL query as a string or an error message.
     """
+    fingerprint = _schema_fingerprint()
+    # An unknown fingerprint neither invalidates the cache nor reads or writes it.
+    if fingerprint:
+        _check_generation(fingerprint)
+        key = _cache_key(nl_query, table_context, fingerprint)
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+
     prompt = f"""You are an expert SQL generator. Convert the user's query into a valid PostgreSQL SELECT statement.
 
 Tables and schema:
@@ -33,7 +110,7 @@ Only return the SQL query, nothing else.
 """
 
     try:
-        response = client.chat.completions.create(
+        response = _get_client().chat.completions.create(
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.2
@@ -41,6 +118,8 @@ Only return the SQL query, nothing else.
         sql = response.choices[0].message.content.strip()
         if sql.startswith("```sql") or sql.startswith("```"):
             sql = sql.replace("```sql", "").replace("```", "").strip()
+        if fingerprint:
+            _cache.set(key, sql)
         return sql
     except Exception as e:
         return f"Error generating SQL: {str(e)}"
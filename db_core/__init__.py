@@ -0,0 +1,24 @@
+"""
+Shared database plumbing for db_agent and db_multi_agent.
+
+Both agents' tool modules import from here so that they share one
+process-wide connection pool and the same execution helpers.
+"""
+
+from .pool import (
+    ConnectionPool,
+    PoolTimeout,
+    get_pool,
+    get_connection,
+    pool_stats,
+    close_all_pools,
+)
+
+__all__ = [
+    "ConnectionPool",
+    "PoolTimeout",
+    "get_pool",
+    "get_connection",
+    "pool_stats",
+    "close_all_pools",
+]
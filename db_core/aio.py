@@ -0,0 +1,70 @@
+# aio.py
+
+"""
+Async (asyncio) variants of the database tools.
+
+ADK runs agents on an event loop, so a synchronous tool that waits on
+Postgres stalls every other session in the process. to_async() turns a
+tool into a coroutine function with the same name, signature and
+docstring that runs the blocking body on a bounded worker pool sized to
+the connection pool. The event loop stays free while the query runs, and
+the sync function remains importable for scripts and tests. Registered
+tools are also instrumented (db_core/metrics.py).
+"""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .metrics import instrument
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the shared executor that runs blocking tool bodies."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.ASYNC_TOOL_WORKERS, thread_name_prefix="db-tool"
+                )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Awaits func(*args, **kwargs) on the tool executor, preserving context variables."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def to_async(func):
+    """Wraps a synchronous tool as an instrumented async tool with identical metadata."""
+    if asyncio.iscoroutinefunction(func):
+        return func
+    measured = instrument(func)
+
+    @functools.wraps(func)
+    async def async_tool(*args, **kwargs):
+        return await run_blocking(measured, *args, **kwargs)
+
+    async_tool.sync = func
+    return async_tool
+
+
+def to_async_tools(tools):
+    """Applies to_async() to every tool in a list."""
+    return [to_async(tool) for tool in tools]
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor is not None:
+        _executor.shutdown(wait=False)
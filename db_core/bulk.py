@@ -0,0 +1,209 @@
+# bulk.py
+
+"""
+Bulk extraction into Arrow result handles.
+
+export_query() streams `COPY (query) TO STDOUT (FORMAT csv)` from the
+server straight into pyarrow's multithreaded CSV reader. Rows never
+become Python tuples: PostgreSQL writes text, and Arrow parses it into
+typed columnar record batches. Column types come from the result's type
+OIDs, so nothing is inferred from the data. CSV rather than binary COPY
+is used because Arrow can parse CSV natively, while the binary format
+would need a per-cell decoder in Python.
+
+The result is kept as a ResultHandle: an id the agent can pass to other
+tools (describe_result, plot_result, ...) so they read the extracted
+columns instead of re-querying. Handles live in memory within
+BULK_MAX_HANDLES / BULK_MAX_BYTES. With persist=True the table is also
+written to a Parquet file under BULK_PARQUET_DIR, and a handle evicted
+from memory is reopened from that file by memory-mapping it.
+
+pyarrow is an optional dependency, imported on first use.
+"""
+
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from . import config
+from .cache import LRUCache
+from .metrics import record_fetch
+from .sql_safety import with_limit
+
+ResultHandle = namedtuple("ResultHandle", "id query table path truncated created_at")
+
+
+class BulkExportError(Exception):
+    """Raised when a query cannot be exported or a handle cannot be found."""
+
+
+_handles = LRUCache(config.BULK_MAX_HANDLES, config.BULK_HANDLE_TTL, config.BULK_MAX_BYTES, lambda h: h.table.nbytes)
+_parquet_paths = {}  # handle id -> (path, query, truncated), for handles persisted as Parquet
+_paths_lock = threading.Lock()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.csv
+        return pyarrow
+    except ImportError:
+        raise BulkExportError("pyarrow is not installed; install it with `pip install pyarrow`.") from None
+
+
+def _arrow_type(pa, type_oid: int):
+    """Arrow type for a PostgreSQL type OID; anything unlisted is kept as text."""
+    return {
+        16: pa.bool_(),
+        20: pa.int64(), 21: pa.int16(), 23: pa.int32(), 26: pa.int64(),
+        700: pa.float32(), 701: pa.float64(),
+        1700: pa.float64(),  # numeric: analysis works in floating point anyway
+        1082: pa.date32(),
+        1114: pa.timestamp("us"),
+        1184: pa.timestamp("us", tz="UTC"),
+    }.get(type_oid, pa.string())
+
+
+def _unique(names):
+    seen, unique = {}, []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return unique
+
+
+def _read_batches(pa, stream, names, types, batches, errors):
+    """Parses CSV from `stream` into record batches; always drains it so COPY never blocks."""
+    try:
+        reader = pa.csv.open_csv(
+            stream,
+            read_options=pa.csv.ReadOptions(column_names=names, block_size=config.BULK_BLOCK_BYTES),
+            convert_options=pa.csv.ConvertOptions(
+                column_types=dict(zip(names, types)),
+                true_values=["t"], false_values=["f"],
+                null_values=[""], strings_can_be_null=True, quoted_strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            batches.append(batch)
+    except Exception as e:
+        errors.append(e)
+        while stream.read(1 << 16):
+            pass
+
+
+def _copy_to_arrow(pa, conn, query: str):
+    with conn.cursor() as cursor:
+        # Timestamps with time zone come back in UTC, which the Arrow column type declares.
+        cursor.execute("SET LOCAL TimeZone = 'UTC';")
+        cursor.execute(f"SELECT * FROM (\n{query}\n) AS q LIMIT 0;")
+        names = _unique([col[0] for col in cursor.description])
+        types = [_arrow_type(pa, col[1]) for col in cursor.description]
+        schema = pa.schema(list(zip(names, types)))
+
+        read_fd, write_fd = os.pipe()
+        batches, errors = [], []
+        with os.fdopen(read_fd, "rb") as stream, os.fdopen(write_fd, "wb") as sink:
+            reader = threading.Thread(target=_read_batches, args=(pa, stream, names, types, batches, errors), daemon=True)
+            reader.start()
+            started = time.perf_counter()
+            try:
+                cursor.copy_expert(f"COPY (\n{query}\n) TO STDOUT WITH (FORMAT csv)", sink)
+            finally:
+                sink.close()
+                reader.join()
+            copy_seconds = time.perf_counter() - started
+
+    table = pa.Table.from_batches(batches, schema=schema) if batches else schema.empty_table()
+    # A query without rows produces no CSV at all, which the reader reports as an error.
+    if errors and not (table.num_rows == 0 and "Empty CSV file" in str(errors[0])):
+        raise BulkExportError(f"could not parse the exported rows: {errors[0]}")
+    record_fetch(copy_seconds, table.num_rows, table.nbytes)
+    return table
+
+
+def export_query(conn, query: str, persist: bool = False, max_rows: int = None) -> ResultHandle:
+    """
+    Runs a validated read-only `query` on `conn` through COPY and returns a
+    registered ResultHandle. At most `max_rows` (default BULK_MAX_ROWS) rows
+    are kept; `truncated` tells whether more existed. With `persist` the
+    table is also written as Parquet.
+    """
+    pa = _pyarrow()
+    max_rows = max_rows or config.BULK_MAX_ROWS
+    query = query.strip().rstrip(";")
+    table = _copy_to_arrow(pa, conn, with_limit(query, max_rows + 1))
+    truncated = table.num_rows > max_rows
+    if truncated:
+        table = table.slice(0, max_rows)
+
+    handle_id = f"rh_{secrets.token_hex(6)}"
+    path = None
+    if persist:
+        import pyarrow.parquet
+
+        directory = config.BULK_PARQUET_DIR or os.path.join(tempfile.gettempdir(), "db_agent_results")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{handle_id}.parquet")
+        pyarrow.parquet.write_table(table, path)
+        with _paths_lock:
+            _parquet_paths[handle_id] = (path, query, truncated)
+    handle = ResultHandle(handle_id, query, table, path, truncated, time.time())
+    _handles.set(handle_id, handle)
+    return handle
+
+
+def get_handle(handle_id: str) -> ResultHandle:
+    """The handle registered under `handle_id`, reopened from Parquet if it was evicted."""
+    handle = _handles.get(handle_id)
+    if handle is not None:
+        return handle
+    with _paths_lock:
+        persisted = _parquet_paths.get(handle_id)
+    if persisted is None or not os.path.exists(persisted[0]):
+        raise BulkExportError(f"unknown or expired result handle {handle_id!r}; export the query again.")
+    _pyarrow()
+    import pyarrow.parquet
+
+    path, query, truncated = persisted
+    table = pyarrow.parquet.read_table(path, memory_map=True)
+    handle = ResultHandle(handle_id, query, table, path, truncated, os.path.getmtime(path))
+    _handles.set(handle_id, handle)
+    return handle
+
+
+def handle_columns(handle: ResultHandle, columns: str = ""):
+    """The handle's table restricted to a comma-separated column list (all columns when empty)."""
+    if not columns.strip():
+        return handle.table
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    missing = [name for name in names if name not in handle.table.column_names]
+    if missing:
+        raise BulkExportError(
+            f"{handle.id} has no column(s) {', '.join(missing)}; columns: {', '.join(handle.table.column_names)}"
+        )
+    return handle.table.select(names)
+
+
+def describe_handle(handle: ResultHandle) -> str:
+    """One-line summary: id, size, columns with their Arrow types, and where it is stored."""
+    table = handle.table
+    columns = ", ".join(f"{field.name} {field.type}" for field in table.schema)
+    lines = [
+        f"Result handle {handle.id}: {table.num_rows:,} rows x {table.num_columns} columns "
+        f"({table.nbytes / 1048576:.1f} MiB in memory)",
+        f"Columns: {columns}",
+    ]
+    if handle.truncated:
+        lines.append(f"Note: truncated to the first {table.num_rows:,} rows (BULK_MAX_ROWS).")
+    if handle.path:
+        lines.append(f"Parquet: {handle.path}")
+    return "\n".join(lines)
+
+
+def clear_handles():
+    """Drops every in-memory handle (Parquet files stay and can be reopened)."""
+    _handles.clear()
@@ -0,0 +1,254 @@
+# catalog.py
+
+"""
+In-memory snapshot of the database catalog for the schema tools.
+
+Tables, columns, primary keys, foreign keys and indexes are loaded from
+pg_catalog in a single round trip and then served from memory. The
+snapshot is re-validated cheaply: after CATALOG_CHECK_INTERVAL seconds a
+one-row fingerprint query (row counts and xmin sums of the catalog
+tables, which change on any DDL) decides whether a reload is needed, and
+CATALOG_MAX_AGE forces one regardless. refresh() drops it explicitly.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from . import config
+from .pool import get_connection
+from .prepared import execute_prepared
+
+ColumnInfo = namedtuple("ColumnInfo", "name data_type nullable")
+ForeignKey = namedtuple("ForeignKey", "constraint columns ref_schema ref_table ref_columns")
+IndexInfo = namedtuple("IndexInfo", "name method unique primary columns opclasses partial definition")
+
+_FINGERPRINT_SQL = """
+    (SELECT count(*) || ':' || coalesce(sum(xmin::text::bigint), 0) FROM pg_catalog.pg_class)
+    || '/' || (SELECT count(*) || ':' || coalesce(sum(xmin::text::bigint), 0) FROM pg_catalog.pg_attribute)
+    || '/' || (SELECT count(*) || ':' || coalesce(sum(xmin::text::bigint), 0) FROM pg_catalog.pg_constraint)
+    || '/' || (SELECT count(*) || ':' || coalesce(sum(xmin::text::bigint), 0) FROM pg_catalog.pg_index)
+"""
+
+_SNAPSHOT_SQL = f"""
+    WITH rel AS (
+        SELECT c.oid, n.nspname, c.relname, c.relkind
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+          AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+          AND n.nspname NOT LIKE 'pg\\_toast%'
+          AND n.nspname NOT LIKE 'pg\\_temp\\_%'
+          AND (pg_catalog.pg_has_role(c.relowner, 'USAGE')
+               OR pg_catalog.has_table_privilege(
+                    c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER'))
+    )
+    SELECT
+        {_FINGERPRINT_SQL} AS fingerprint,
+        -- Relation kinds: tables, partitioned tables, views, materialized views, foreign tables.
+        (SELECT json_agg(json_build_array(oid, nspname, relname, relkind)
+                         ORDER BY nspname, relname)
+           FROM rel) AS tables,
+        (SELECT json_agg(json_build_array(a.attrelid, a.attnum, a.attname,
+                                          pg_catalog.format_type(a.atttypid, NULL), NOT a.attnotnull)
+                         ORDER BY a.attrelid, a.attnum)
+           FROM pg_catalog.pg_attribute a
+           JOIN rel ON rel.oid = a.attrelid
+          WHERE a.attnum > 0 AND NOT a.attisdropped) AS columns,
+        (SELECT json_agg(json_build_array(con.conrelid, con.conname, con.contype,
+                                          con.conkey, con.confrelid, con.confkey)
+                         ORDER BY con.conrelid, con.conname)
+           FROM pg_catalog.pg_constraint con
+           JOIN rel ON rel.oid = con.conrelid
+          WHERE con.contype IN ('p', 'f')) AS constraints,
+        (SELECT json_agg(json_build_array(
+                    i.indrelid, ic.relname, am.amname, i.indisunique, i.indisprimary,
+                    i.indkey::int2[],
+                    (SELECT array_agg(opc.opcname ORDER BY k.ord)
+                       FROM unnest(i.indclass) WITH ORDINALITY AS k(oid, ord)
+                       JOIN pg_catalog.pg_opclass opc ON opc.oid = k.oid),
+                    i.indpred IS NOT NULL,
+                    pg_catalog.pg_get_indexdef(i.indexrelid))
+                    ORDER BY i.indrelid, ic.relname)
+           FROM pg_catalog.pg_index i
+           JOIN rel ON rel.oid = i.indrelid
+           JOIN pg_catalog.pg_class ic ON ic.oid = i.indexrelid
+           JOIN pg_catalog.pg_am am ON am.oid = ic.relam) AS indexes;
+"""
+
+
+class TableInfo:
+    """Catalog metadata for one relation."""
+
+    def __init__(self, oid, schema, name, kind):
+        self.oid = oid
+        self.schema = schema
+        self.name = name
+        self.kind = kind
+        self.columns = []
+        self.primary_key = []
+        self.foreign_keys = []
+        self.indexes = []
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+    def column(self, name: str):
+        """Returns the ColumnInfo for `name`, or None."""
+        for col in self.columns:
+            if col.name == name:
+                return col
+        return None
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog as of one load."""
+
+    def __init__(self, fingerprint, tables):
+        self.fingerprint = fingerprint
+        self.loaded_at = time.monotonic()
+        self._tables = sorted(tables, key=lambda t: (t.schema, t.name))
+        self._by_name = {}
+        for table in self._tables:
+            self._by_name.setdefault(table.name, []).append(table)
+            self._by_name[table.qualified_name] = [table]
+
+    def tables(self, schema: str = "public", kinds=("r", "p", "v", "f")):
+        """Returns the tables of `schema`, sorted by name."""
+        return [t for t in self._tables if t.schema == schema and t.kind in kinds]
+
+    def find(self, table_name: str):
+        """
+        Resolves a bare or schema-qualified table name. Bare names prefer the
+        public schema, then the first schema alphabetically.
+        """
+        candidates = self._by_name.get(table_name) or self._by_name.get(table_name.strip('"'))
+        if not candidates:
+            return None
+        for table in candidates:
+            if table.schema == "public":
+                return table
+        return candidates[0]
+
+    @classmethod
+    def from_rows(cls, fingerprint, tables, columns, constraints, indexes):
+        by_oid = {}
+        for oid, schema, name, kind in tables or []:
+            by_oid[oid] = TableInfo(oid, schema, name, kind)
+
+        attnames = {}
+        for relid, attnum, attname, data_type, nullable in columns or []:
+            table = by_oid.get(relid)
+            if table is None:
+                continue
+            table.columns.append(ColumnInfo(attname, data_type, nullable))
+            attnames[(relid, attnum)] = attname
+
+        for relid, conname, contype, conkey, confrelid, confkey in constraints or []:
+            table = by_oid.get(relid)
+            if table is None:
+                continue
+            cols = [attnames.get((relid, k)) for k in conkey or []]
+            if contype == "p":
+                table.primary_key = cols
+            else:
+                ref = by_oid.get(confrelid)
+                ref_cols = [attnames.get((confrelid, k)) for k in confkey or []]
+                table.foreign_keys.append(ForeignKey(
+                    conname, cols,
+                    ref.schema if ref else None, ref.name if ref else None,
+                    ref_cols,
+                ))
+
+        for relid, name, method, unique, primary, indkey, opclasses, partial, definition in indexes or []:
+            table = by_oid.get(relid)
+            if table is None:
+                continue
+            # indkey 0 marks an expression column.
+            cols = [attnames.get((relid, k)) if k else None for k in indkey or []]
+            table.indexes.append(IndexInfo(
+                name, method, unique, primary, cols, opclasses or [], partial, definition,
+            ))
+
+        return cls(fingerprint, by_oid.values())
+
+
+class Catalog:
+    """Lazily loaded, self-validating catalog snapshot for one database."""
+
+    def __init__(
+        self,
+        db_config: dict,
+        check_interval: float = config.CATALOG_CHECK_INTERVAL,
+        max_age: float = config.CATALOG_MAX_AGE,
+    ):
+        self._db_config = db_config
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "fingerprint_checks": 0, "hits": 0}
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Returns a current snapshot, re-validating or reloading it when stale."""
+        now = time.monotonic()
+        snap = self._snapshot
+        if snap is not None and now - self._checked_at < self.check_interval:
+            self.stats["hits"] += 1
+            return snap
+
+        with self._lock:
+            snap = self._snapshot
+            now = time.monotonic()
+            if snap is not None and now - self._checked_at < self.check_interval:
+                self.stats["hits"] += 1
+                return snap
+            with get_connection(self._db_config) as conn:
+                with conn.cursor() as cursor:
+                    if snap is not None and now - snap.loaded_at < self.max_age:
+                        self.stats["fingerprint_checks"] += 1
+                        execute_prepared(cursor, f"SELECT {_FINGERPRINT_SQL};")
+                        if cursor.fetchone()[0] == snap.fingerprint:
+                            self._checked_at = time.monotonic()
+                            return snap
+                    execute_prepared(cursor, _SNAPSHOT_SQL)
+                    snap = CatalogSnapshot.from_rows(*cursor.fetchone())
+            self.stats["loads"] += 1
+            self._snapshot = snap
+            self._checked_at = time.monotonic()
+            return snap
+
+    def fingerprint(self) -> str:
+        """Fingerprint of the current snapshot (loading it if needed)."""
+        return self.snapshot().fingerprint
+
+    def refresh(self) -> CatalogSnapshot:
+        """Drops the cached snapshot and loads a fresh one."""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+        return self.snapshot()
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(db_config: dict) -> Catalog:
+    """Returns the shared Catalog for this DB_CONFIG, creating it on first use."""
+    key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(key)
+            if catalog is None:
+                catalog = _catalogs[key] = Catalog(db_config)
+    return catalog
+
+
+def clear_catalogs():
+    """Forgets every cached catalog snapshot; the next call reloads from pg_catalog."""
+    with _catalogs_lock:
+        _catalogs.clear()
@@ -0,0 +1,122 @@
+# config.py
+
+"""
+Tuning knobs shared by the db_agent and db_multi_agent tool modules.
+Connection credentials stay in each agent's own DB_CONFIG.
+"""
+
+# --- Connection pool ---
+POOL_MIN_SIZE = 1                 # connections kept open even when idle
+POOL_MAX_SIZE = 10                # hard cap on open connections per database
+POOL_CHECKOUT_TIMEOUT = 30.0      # seconds to wait for a free connection
+POOL_MAX_IDLE_SECONDS = 300.0     # idle connections above POOL_MIN_SIZE are closed after this
+POOL_REAP_INTERVAL = 60.0         # how often the background reaper runs
+POOL_HEALTH_CHECK_AFTER = 30.0    # run "SELECT 1" on checkout if idle longer than this
+
+# --- Prepared statements (db_core/prepared.py) ---
+PREPARED_STATEMENTS_ENABLED = True
+PREPARED_THRESHOLD = 2            # prepare a template on a connection the 2nd time it runs there
+PREPARED_MAX_STATEMENTS = 100     # per connection; the least recently used is DEALLOCATEd
+
+# --- Streaming execution (run_query / run_custom_sql) ---
+STREAM_BATCH_SIZE = 500           # rows per fetchmany() round trip
+STREAM_MAX_ROWS = 1000            # stop after this many rows
+STREAM_MAX_BYTES = 64 * 1024      # ...or once the formatted rows reach this size
+
+# --- SQL validation (run_query / run_custom_sql) ---
+SQL_PARSE_CACHE_ENTRIES = 1024    # parsed statements kept per query fingerprint
+SQL_AUTO_LIMIT = True             # add/tighten an outer LIMIT so the database stops after one page
+
+# --- Cost guard and timeouts (run_query / run_custom_sql) ---
+COST_GUARD_ENABLED = True         # EXPLAIN model-written SELECTs before running them
+COST_GUARD_MAX_COST = 10_000_000  # planner cost units (a sequential scan of 100M narrow rows is ~2.5M)
+COST_GUARD_MAX_ROWS = 1_000_000   # estimated result rows
+COST_GUARD_ACTION = "limit"       # "limit": retry with LIMIT COST_GUARD_ROW_LIMIT, else reject; "reject": always refuse
+COST_GUARD_ROW_LIMIT = 10_000
+COST_GUARD_PLAN_CACHE_ENTRIES = 1024
+COST_GUARD_PLAN_TTL = 300.0       # seconds a cached plan estimate is trusted
+STATEMENT_TIMEOUTS = {            # statement_timeout in seconds per tool; missing disables it
+    "run_query": 30.0,
+    "run_custom_sql": 30.0,
+    "export_query_result": 120.0,
+}
+STATEMENT_CANCEL_GRACE = 5.0      # cancel from the client this long after the server should have
+
+# --- Result formatting (row-returning tools) ---
+FORMAT_MAX_CELL_WIDTH = 80        # longer cells are cut with an ellipsis
+FORMAT_MAX_ROW_WIDTH = 400        # split across columns, so wide results get narrower cells
+FORMAT_MIN_CELL_WIDTH = 12        # ...but never narrower than this
+FORMAT_HEAD_ROWS = 50             # longer results show the first FORMAT_HEAD_ROWS rows
+FORMAT_TAIL_ROWS = 10             # ...and the last FORMAT_TAIL_ROWS rows
+FORMAT_DICT_MIN_ROWS = 10         # dictionary-encode repeated values only in results this long
+
+# --- Bulk export into Arrow result handles (db_core/bulk.py) ---
+BULK_MAX_ROWS = 5_000_000         # rows kept per exported result
+BULK_MAX_HANDLES = 32             # result handles kept in memory
+BULK_MAX_BYTES = 1024 * 1024 * 1024  # Arrow memory across in-memory handles; least recently used are dropped first
+BULK_HANDLE_TTL = 3600.0          # seconds an in-memory handle is kept
+BULK_PARQUET_DIR = None           # where persisted handles are written; None uses <tmp>/db_agent_results
+BULK_BLOCK_BYTES = 4 * 1024 * 1024  # CSV bytes per Arrow record batch
+
+# --- Catalog snapshot (schema tools) ---
+CATALOG_CHECK_INTERVAL = 30.0     # seconds before the catalog fingerprint is re-checked
+CATALOG_MAX_AGE = 600.0           # reload unconditionally after this many seconds
+
+# --- convert_to_sql cache ---
+NL2SQL_CACHE_MAX_ENTRIES = 1024
+NL2SQL_CACHE_TTL = 24 * 3600.0    # seconds a generated query stays valid
+NL2SQL_CACHE_PATH = None          # set to a file path to persist the cache in SQLite
+
+# --- Query result cache (read tools) ---
+RESULT_CACHE_MAX_ENTRIES = 2048
+RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESULT_CACHE_TTLS = {             # seconds per tool; 0 or missing disables caching for that tool
+    "run_query": 30.0,
+    "count_rows": 60.0,
+    "top_k_column_values": 120.0,
+    "numeric_column_stats": 120.0,
+}
+
+# --- Tool instrumentation (db_core/metrics.py) ---
+METRICS_ENABLED = True            # wrap registered tools with per-call spans and metrics
+METRICS_MEASURE_BYTES = True      # also size fetched rows as text (costs a pass over each fetched batch)
+METRICS_PORT = None               # set to serve Prometheus metrics on http://METRICS_ADDR:METRICS_PORT/metrics
+METRICS_ADDR = "127.0.0.1"
+METRICS_SPAN_FILE = None          # set to a file path to append one JSON line per tool call
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# --- Start-up (db_core/warmup.py) ---
+WARMUP_ENABLED = False            # on agent import, pre-open connections, load the catalog and import heavy modules in the background
+WARMUP_CONNECTIONS = None         # connections to pre-open; None uses POOL_MIN_SIZE
+
+# --- Async tool execution ---
+ASYNC_TOOL_WORKERS = POOL_MAX_SIZE  # concurrent blocking tool calls; matches the pool so workers never queue on it
+
+# --- Parallel fan-out (db_multi_agent run_parallel) ---
+FANOUT_WORKERS = 4                # fanned-out tool calls running at once, process-wide (each holds a pooled connection)
+FANOUT_MAX_CALLS = 8              # calls accepted per run_parallel request
+
+# --- Time-series rollups (db_core/rollups.py) ---
+ROLLUPS_ENABLED = True            # serve time_series_summary from per-bucket partial aggregates, extended from the watermark
+ROLLUP_MAX_ENTRIES = 64           # (table, date column, value column, granularity) rollups kept
+ROLLUP_MAX_AGE = 3600             # seconds before a rollup is rebuilt with a full scan (picks up late rows in closed buckets)
+ROLLUP_REOPEN_BUCKETS = 1         # newest buckets re-aggregated on each call
+
+# --- time_series_summary (db_core/timeseries.py) ---
+TIMESERIES_SUMMARY_MAX_BUCKETS = 1000  # newest buckets returned (and gap-filled) per granularity
+
+# --- count_rows ---
+COUNT_APPROX_THRESHOLD = 1_000_000  # in "auto" mode, tables estimated above this are counted approximately
+
+# --- top_k_column_values ---
+TOPK_EXACT_MAX_ROWS = 1_000_000   # in "auto" mode, tables estimated above this are answered approximately
+TOPK_STATS_MAX_MODIFIED = 0.1     # pg_stats is fresh while under this fraction of rows changed since ANALYZE
+TOPK_SAMPLE_ROWS = 100_000        # rows read by the sampled sketch when pg_stats cannot answer
+TOPK_SKETCH_CAPACITY = 1000       # Space-Saving counters; count error <= sampled rows / capacity
+SAMPLE_SEED = 42                  # TABLESAMPLE REPEATABLE seed, so sampled answers are stable
+
+# --- Visual tools ---
+HISTOGRAM_RAW_MAX_ROWS = 10_000   # at or below this many values, bin client-side exactly as matplotlib does
+TIMESERIES_MAX_POINTS = 2000      # points drawn by plot_time_series (about one per horizontal pixel)
+TIMESERIES_LTTB_MAX_INPUT = 100_000  # raw points fetched for LTTB; larger series are pre-reduced in SQL
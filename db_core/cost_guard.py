@@ -0,0 +1,152 @@
+# cost_guard.py
+
+"""
+Pre-execution cost guard for model-written SQL.
+
+guard_query() asks the planner for an EXPLAIN (FORMAT JSON) estimate
+before run_query / run_custom_sql execute anything. Plans are cached per
+database and query fingerprint for COST_GUARD_PLAN_TTL seconds. A query
+whose estimated total cost exceeds COST_GUARD_MAX_COST, or whose estimated
+result exceeds COST_GUARD_MAX_ROWS rows, is either rewritten with a LIMIT
+(COST_GUARD_ACTION = "limit", kept only if the limited plan is cheap
+enough) or rejected with a hint to filter, aggregate or sample.
+
+run_guarded() combines both with db_core.sql_safety for the query tools.
+
+statement_timeout() bounds what does run: it sets a transaction-local
+statement_timeout for the tool and, should the server not honor it (for
+example while blocked on the network), cancels the backend query from the
+client STATEMENT_CANCEL_GRACE seconds later.
+"""
+
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.errors
+
+from . import config
+from .cache import LRUCache
+from .estimates import explain_plan
+from .sql_safety import begin_read_only, bound_rows, with_limit
+from .streaming import decode_continuation_token, is_cursor_statement, query_fingerprint, stream_query
+
+GUARD_ACTIONS = ("limit", "reject")
+
+PlanEstimate = namedtuple("PlanEstimate", "cost rows node")
+
+_plans = LRUCache(config.COST_GUARD_PLAN_CACHE_ENTRIES, config.COST_GUARD_PLAN_TTL)
+
+
+class CostGuardError(Exception):
+    """Raised when a query is refused by the cost guard or cancelled by its timeout."""
+
+
+def _plan_key(db_config: dict, query: str):
+    settings = tuple(sorted((k, str(v)) for k, v in db_config.items() if k != "password"))
+    return settings, query_fingerprint(query)
+
+
+def estimate_plan(conn, db_config: dict, query: str) -> PlanEstimate:
+    """The planner's total cost and row estimate for `query`, cached by fingerprint."""
+    key = _plan_key(db_config, query)
+    estimate = _plans.get(key)
+    if estimate is None:
+        with conn.cursor() as cursor:
+            plan = explain_plan(cursor, query.strip().rstrip(";"))
+        estimate = PlanEstimate(float(plan["Total Cost"]), int(plan["Plan Rows"]), plan["Node Type"])
+        _plans.set(key, estimate)
+    return estimate
+
+
+def clear_plan_cache():
+    """Forgets every cached plan estimate."""
+    _plans.clear()
+
+
+def _over_budget(estimate: PlanEstimate) -> bool:
+    return estimate.cost > config.COST_GUARD_MAX_COST or estimate.rows > config.COST_GUARD_MAX_ROWS
+
+
+def _describe(estimate: PlanEstimate) -> str:
+    return (
+        f"estimated cost {estimate.cost:,.0f} (limit {config.COST_GUARD_MAX_COST:,.0f}) "
+        f"and {estimate.rows:,} rows (limit {config.COST_GUARD_MAX_ROWS:,})"
+    )
+
+
+def guard_query(conn, db_config: dict, query: str):
+    """
+    Checks `query` against the cost thresholds before it runs. Returns
+    (query to execute, notice), where notice explains a rewrite and is empty
+    otherwise. Raises CostGuardError when the query is refused. Statements
+    that do not return rows (SHOW, EXPLAIN, ...) are passed through.
+    """
+    if not config.COST_GUARD_ENABLED or not is_cursor_statement(query):
+        return query, ""
+    estimate = estimate_plan(conn, db_config, query)
+    if not _over_budget(estimate):
+        return query, ""
+
+    if config.COST_GUARD_ACTION == "limit":
+        limited = with_limit(query, config.COST_GUARD_ROW_LIMIT)
+        limited_estimate = estimate_plan(conn, db_config, limited)
+        if limited_estimate.cost <= config.COST_GUARD_MAX_COST:
+            return limited, (
+                f"Note: the cost guard added LIMIT {config.COST_GUARD_ROW_LIMIT} "
+                f"(the full query had {_describe(estimate)})."
+            )
+    raise CostGuardError(
+        f"Query rejected by the cost guard: {_describe(estimate)}. "
+        "Add selective filters, aggregate, add a LIMIT, or read a sample "
+        "(e.g. FROM big_table TABLESAMPLE SYSTEM (1))."
+    )
+
+
+@contextmanager
+def statement_timeout(conn, tool: str):
+    """
+    Applies the tool's STATEMENT_TIMEOUTS entry to the current transaction of
+    `conn` (SET LOCAL, so pooled connections are unaffected afterwards) and
+    cancels the backend query from the client if the server overruns it.
+    Raises CostGuardError when the statement is cancelled.
+    """
+    seconds = config.STATEMENT_TIMEOUTS.get(tool)
+    if not seconds:
+        yield
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT set_config('statement_timeout', %s, true);", (str(int(seconds * 1000)),))
+    timer = threading.Timer(seconds + config.STATEMENT_CANCEL_GRACE, conn.cancel)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except psycopg2.errors.QueryCanceled as e:
+        raise CostGuardError(
+            f"Query cancelled after {seconds:g}s ({tool} statement timeout). "
+            "Narrow it with filters or a LIMIT, or read a sample."
+        ) from e
+    finally:
+        timer.cancel()
+
+
+def run_guarded(conn, db_config: dict, tool: str, query: str, statement, continuation_token: str = None):
+    """
+    Runs a validated (db_core.sql_safety.check_query) statement the way
+    run_query / run_custom_sql do: in a read-only transaction under the
+    tool's statement timeout, bounded by an outer LIMIT one row past the
+    requested page (SQL_AUTO_LIMIT) and checked by the cost guard. Returns
+    the StreamResult, with `notice` set when the cost guard rewrote the query.
+    """
+    begin_read_only(conn)
+    with statement_timeout(conn, tool):
+        sql = query
+        if config.SQL_AUTO_LIMIT:
+            offset = decode_continuation_token(continuation_token, query) if continuation_token else 0
+            sql = bound_rows(query, statement, offset + config.STREAM_MAX_ROWS + 1)
+        sql, notice = guard_query(conn, db_config, sql)
+        result = stream_query(conn, sql, continuation_token=continuation_token, token_query=query)
+    result.notice = notice
+    return result
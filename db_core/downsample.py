@@ -0,0 +1,94 @@
+# downsample.py
+
+"""
+Helpers that bound how many points a time series plot pulls from Postgres.
+
+choose_bucket() picks the finest "nice" bucket width that keeps a time
+span under a point budget, expressed as a date_bin (PostgreSQL 14+) or
+date_trunc expression. lttb() is the Largest-Triangle-Three-Buckets
+downsampler, which keeps the visual shape (peaks and troughs) of a series
+while reducing it to a fixed number of points.
+"""
+
+from collections import namedtuple
+
+Bucket = namedtuple("Bucket", "label seconds sql")
+
+# (label, approximate width in seconds, date_trunc unit or None for date_bin-only widths)
+_BUCKETS = [
+    ("1 second", 1, "second"),
+    ("5 seconds", 5, None),
+    ("15 seconds", 15, None),
+    ("1 minute", 60, "minute"),
+    ("5 minutes", 300, None),
+    ("15 minutes", 900, None),
+    ("1 hour", 3600, "hour"),
+    ("6 hours", 21600, None),
+    ("12 hours", 43200, None),
+    ("1 day", 86400, "day"),
+    ("2 days", 172800, None),
+    ("3 days", 259200, None),
+    ("1 week", 604800, "week"),
+    ("1 month", 2629746, "month"),
+    ("1 quarter", 7889238, "quarter"),
+    ("1 year", 31556952, "year"),
+]
+
+_DATE_BIN_MIN_VERSION = 140000
+
+
+def choose_bucket(span_seconds: float, max_points: int, column_sql: str, server_version: int) -> Bucket:
+    """
+    Returns the finest bucket producing at most `max_points` buckets over
+    `span_seconds`. `column_sql` is the (timestamp-typed) expression to bucket.
+    """
+    candidates = [
+        (label, seconds, unit) for label, seconds, unit in _BUCKETS
+        if unit is not None or server_version >= _DATE_BIN_MIN_VERSION
+    ]
+    label, seconds, unit = candidates[-1]
+    for candidate in candidates:
+        if span_seconds / candidate[1] <= max_points:
+            label, seconds, unit = candidate
+            break
+    if server_version >= _DATE_BIN_MIN_VERSION and seconds <= 604800:
+        # date_bin aligns to a fixed origin, so 5-minute/6-hour widths work too.
+        sql = f"date_bin(INTERVAL '{label}', {column_sql}, TIMESTAMP '2000-01-03')"
+    else:
+        sql = f"date_trunc('{unit}', {column_sql})"
+    return Bucket(label, seconds, sql)
+
+
+def lttb(xs, ys, threshold: int):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    `xs` must be ascending numbers (e.g. epoch seconds). Returns the indices of
+    the `threshold` points to keep, always including the first and last point.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex.
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        span = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / span
+        avg_y = sum(ys[avg_start:avg_end]) / span
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = range_start, -1.0
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
@@ -0,0 +1,77 @@
+# estimates.py
+
+"""
+Row-count estimates from planner statistics instead of table scans.
+
+estimate_table_rows() answers from pg_class.reltuples, scaled by how much
+the table has grown since it was last analyzed (the same extrapolation
+the planner uses), and falls back to pg_stat_user_tables.n_live_tup and
+finally to an EXPLAIN estimate. estimate_query_rows() returns the
+planner's row estimate for any query via EXPLAIN (FORMAT JSON).
+"""
+
+import json
+from collections import namedtuple
+
+from . import config
+from .prepared import execute_prepared
+
+RowEstimate = namedtuple("RowEstimate", "rows source")
+
+_TABLE_STATS_SQL = """
+    SELECT c.reltuples,
+           c.relpages,
+           pg_catalog.pg_relation_size(c.oid) / current_setting('block_size')::int AS pages,
+           s.n_live_tup
+    FROM pg_catalog.pg_class c
+    LEFT JOIN pg_catalog.pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.oid = %s::regclass;
+"""
+
+
+def explain_plan(cursor, query: str, params=None) -> dict:
+    """Returns the top node of `query`'s EXPLAIN (FORMAT JSON) plan (never executes it)."""
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def estimate_query_rows(cursor, query: str, params=None) -> int:
+    """Returns the planner's estimated row count for `query` (never executes it)."""
+    return int(explain_plan(cursor, query, params)["Plan Rows"])
+
+
+def estimate_table_rows(cursor, table: str) -> RowEstimate:
+    """Estimates the number of rows in `table` without scanning it."""
+    execute_prepared(cursor, _TABLE_STATS_SQL, (table,))
+    reltuples, relpages, pages, live_tuples = cursor.fetchone()
+    # reltuples is -1 (PG14+) or 0 with relpages 0 when the table was never analyzed.
+    if reltuples is not None and reltuples >= 0 and relpages > 0:
+        return RowEstimate(int(round(reltuples / relpages * max(pages, 1))), "pg_class.reltuples")
+    if reltuples == 0 and pages == 0:
+        return RowEstimate(0, "pg_class.reltuples")
+    if live_tuples:
+        return RowEstimate(int(live_tuples), "pg_stat_user_tables.n_live_tup")
+    return RowEstimate(estimate_query_rows(cursor, f"SELECT 1 FROM {table}"), "EXPLAIN")
+
+
+COUNT_MODES = ("auto", "exact", "approximate")
+
+
+def choose_count_estimate(cursor, table: str, where: str = "", mode: str = "auto"):
+    """
+    Decides how count_rows should answer. Returns a RowEstimate when the count
+    should be approximate, or None when an exact COUNT(*) should run.
+    "auto" approximates tables estimated above COUNT_APPROX_THRESHOLD rows.
+    Filtered counts are estimated with EXPLAIN on the filtered query.
+    """
+    if mode == "exact":
+        return None
+    estimate = estimate_table_rows(cursor, table)
+    if mode == "auto" and estimate.rows <= config.COUNT_APPROX_THRESHOLD:
+        return None
+    if where:
+        return RowEstimate(estimate_query_rows(cursor, f"SELECT 1 FROM {table} WHERE {where}"), "EXPLAIN")
+    return estimate
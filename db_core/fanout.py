@@ -0,0 +1,90 @@
+# fanout.py
+
+"""
+Concurrent fan-out of independent tool calls.
+
+fan_out() runs a list of synchronous tool calls at the same time on a
+dedicated executor of FANOUT_WORKERS threads and returns their results in
+the order the calls were given, whatever order they finish in. Each call
+is instrumented (db_core/metrics.py) as a child span of the calling tool
+and checks out its own pooled connection, so the slowest call rather than
+the sum of all calls sets the wall time.
+
+The executor is separate from the one that runs registered tools
+(db_core/aio.py): a fan-out tool occupies a tool worker while it waits,
+and submitting its calls to the same pool could exhaust it.
+"""
+
+import atexit
+import contextvars
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .metrics import instrument
+
+FanOutCall = namedtuple("FanOutCall", "name func kwargs")
+FanOutResult = namedtuple("FanOutResult", "name kwargs output error seconds")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.FANOUT_WORKERS, thread_name_prefix="db-fan-out")
+    return _executor
+
+
+def _timed(func, kwargs):
+    started = time.perf_counter()
+    try:
+        return func(**kwargs), None, time.perf_counter() - started
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", time.perf_counter() - started
+
+
+def fan_out(calls) -> tuple:
+    """
+    Runs FanOutCalls concurrently. Returns (results, wall seconds), with one
+    FanOutResult per call in input order; an exception raised by a call is
+    reported in its result's `error` instead of cancelling the others.
+    """
+    started = time.perf_counter()
+    executor = _get_executor()
+    # Each call gets its own copy of the context, so its span is a child of the caller's.
+    futures = [
+        executor.submit(contextvars.copy_context().run, _timed, instrument(call.func), call.kwargs)
+        for call in calls
+    ]
+    results = [
+        FanOutResult(call.name, call.kwargs, *future.result())
+        for call, future in zip(calls, futures)
+    ]
+    return results, time.perf_counter() - started
+
+
+def format_fan_out(results, wall_seconds: float) -> str:
+    """Merges fan-out results into one text block: a numbered section per call, in call order."""
+    sections = []
+    for i, result in enumerate(results, 1):
+        arguments = ", ".join(f"{k}={v!r}" for k, v in result.kwargs.items())
+        body = f"Error: {result.error}" if result.error else str(result.output)
+        sections.append(f"[{i}] {result.name}({arguments})\n{body}")
+    serial = sum(result.seconds for result in results)
+    sections.append(
+        f"-- {len(results)} calls in parallel: {wall_seconds:.2f}s "
+        f"(one after another: {serial:.2f}s)"
+    )
+    return "\n\n".join(sections)
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor is not None:
+        _executor.shutdown(wait=False)
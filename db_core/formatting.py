@@ -0,0 +1,173 @@
+# formatting.py
+
+"""
+Compact rendering of result rows for the LLM.
+
+format_table() produces the familiar pipe-delimited text, but spends
+fewer tokens on it:
+
+- cells are truncated to a per-column share of FORMAT_MAX_ROW_WIDTH (at most
+  FORMAT_MAX_CELL_WIDTH when there are several columns);
+- columns holding one value (or only NULLs) in every row are listed once
+  above the table instead of being repeated on each line;
+- long values that repeat a lot are replaced by short codes (#1, #2, ...)
+  with a one-line legend;
+- results longer than FORMAT_HEAD_ROWS + FORMAT_TAIL_ROWS show only their
+  head and tail, with a note saying how many rows were skipped.
+
+Work is done column by column with map()/join over whole columns instead of
+a Python-level loop per cell, which is what keeps 100k-row results cheap.
+
+format_structured() is the machine-readable alternative: JSON with either
+one object per row ("records") or one array per column ("columnar").
+"""
+
+import json
+from collections import Counter
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from . import config
+
+OUTPUT_FORMATS = ("text", "records", "columnar")
+
+ELLIPSIS = "…"
+
+
+# Values probed to decide whether a column repeats enough to dictionary-encode.
+_PROBE_ROWS = 1000
+
+
+def _truncate(texts: list, width: int) -> list:
+    if max(map(len, texts), default=0) <= width:
+        return texts
+    cut = width - 1
+    return [t if len(t) <= width else t[:cut] + ELLIPSIS for t in texts]
+
+
+def _low_cardinality_counts(values):
+    """Counter of `values` when at most a quarter of them are distinct, else None."""
+    probe = values[:_PROBE_ROWS]
+    try:
+        if len(set(probe)) > len(probe) // 4:
+            return None
+        counts = Counter(values)
+    except TypeError:  # unhashable values (arrays, json)
+        return None
+    return counts if len(counts) <= len(values) // 4 else None
+
+
+def _render_column(values, width: int, compact: bool):
+    """
+    Returns (texts, legend). Repetitive columns are rendered once per distinct
+    value and, when it saves characters, replaced by #n codes (most frequent
+    value first) explained by `legend`.
+    """
+    counts = _low_cardinality_counts(values) if compact and len(values) >= config.FORMAT_DICT_MIN_ROWS else None
+    if counts is None:
+        return _truncate(list(map(str, values)), width), None
+
+    ranked = sorted(counts, key=counts.get, reverse=True)
+    rendered = dict(zip(ranked, _truncate(list(map(str, ranked)), width)))
+    codes = {value: f"#{i}" for i, value in enumerate(ranked, 1)}
+    legend = ", ".join(f"{codes[v]}={rendered[v]}" for v in ranked)
+    saved = sum(counts[v] * (len(rendered[v]) - len(codes[v])) for v in ranked)
+    if saved <= len(legend):
+        return list(map(rendered.__getitem__, values)), None
+    return list(map(codes.__getitem__, values)), legend
+
+
+def format_table(
+    columns,
+    rows,
+    footer: str = "",
+    max_cell_width: int = config.FORMAT_MAX_CELL_WIDTH,
+    max_row_width: int = config.FORMAT_MAX_ROW_WIDTH,
+    head: int = config.FORMAT_HEAD_ROWS,
+    tail: int = config.FORMAT_TAIL_ROWS,
+    compact: bool = True,
+) -> str:
+    """
+    Renders `rows` under `columns` as " | "-separated text. `footer` (e.g. a
+    truncation notice) is appended last. compact=False disables the constant
+    column and dictionary passes (truncation and elision still apply).
+    """
+    total = len(rows)
+    elide = head is not None and tail is not None and total > head + tail
+    by_column = list(zip(*rows)) if rows else [() for _ in columns]
+
+    notes, kept_names, kept = [], [], []
+    for name, values in zip(columns, by_column):
+        # list.count runs in C; a column is constant when its first value fills it.
+        if compact and total > 1 and values.count(values[0]) == total:
+            first = values[0]
+            notes.append(f"{name} = {first}")
+            continue
+        kept_names.append(name)
+        kept.append(values[:head] + values[total - tail:] if elide else values)
+
+    lines = []
+    if notes:
+        lines.append(f"Same value in all {total} rows (column omitted): " + "; ".join(notes))
+    if not kept_names:
+        if footer:
+            lines.append(footer)
+        return "\n".join(lines)
+
+    # A lone column (e.g. EXPLAIN output) may use the whole row width.
+    cap = max_cell_width if len(kept_names) > 1 else max_row_width
+    width = max(config.FORMAT_MIN_CELL_WIDTH, min(cap, max_row_width // len(kept_names)))
+    rendered = []
+    for name, values in zip(kept_names, kept):
+        texts, legend = _render_column(values, width, compact)
+        if legend:
+            lines.append(f"{name}: {legend}")
+        rendered.append(texts)
+
+    lines.append(" | ".join(kept_names))
+    lines.append("-|-".join("-" * len(name) for name in kept_names))
+    body = list(map(" | ".join, zip(*rendered)))
+    if elide:
+        lines.extend(body[:head])
+        lines.append(f"... {total - head - tail} rows omitted (rows {head + 1} to {total - tail} of {total}) ...")
+        lines.extend(body[head:])
+    else:
+        lines.extend(body)
+    if footer:
+        lines.append(footer)
+    return "\n".join(lines)
+
+
+def _unique_names(columns) -> list:
+    """Suffixes repeated column names (e.g. two 'id' columns from a join) so keys stay distinct."""
+    seen, names = {}, []
+    for name in columns:
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return names
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def format_structured(columns, rows, layout: str = "records", **extra) -> str:
+    """
+    Renders rows as compact JSON: {"columns", "rows": [{...}, ...]} for
+    "records" or {"columns", "data": {column: [...]}} for "columnar".
+    Extra keyword arguments (truncated, continuation_token, ...) are
+    included as top-level keys when not None.
+    """
+    names = _unique_names(columns)
+    payload = {"columns": names, "row_count": len(rows)}
+    if layout == "columnar":
+        by_column = list(zip(*rows)) if rows else [() for _ in names]
+        payload["data"] = {name: list(values) for name, values in zip(names, by_column)}
+    else:
+        payload["rows"] = [dict(zip(names, row)) for row in rows]
+    payload.update({k: v for k, v in extra.items() if v is not None})
+    return json.dumps(payload, default=_json_default, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,175 @@
+# heavy_hitters.py
+
+"""
+Approximate most-frequent values for top_k_column_values.
+
+Large tables are answered from pg_stats.most_common_vals/most_common_freqs
+when the statistics are fresh (few rows modified since the last ANALYZE).
+Otherwise a Space-Saving sketch runs over a TABLESAMPLE SYSTEM scan of
+about TOPK_SAMPLE_ROWS rows, so memory stays bounded by
+TOPK_SKETCH_CAPACITY counters whatever the column's cardinality. Every
+approximate count comes with an error bound.
+"""
+
+import heapq
+import math
+from collections import Counter, namedtuple
+
+from . import config
+from .estimates import estimate_table_rows
+from .prepared import execute_prepared
+
+TOPK_MODES = ("auto", "exact", "approximate")
+
+Z_95 = 1.96
+
+# values: [(value, estimated count, +/- bound)]; detail describes the source.
+TopKEstimate = namedtuple("TopKEstimate", "values detail")
+
+_MCV_SQL = """
+    SELECT s.most_common_vals::text::text[],
+           s.most_common_freqs,
+           s.n_distinct,
+           coalesce(nullif(a.attstattarget, -1), current_setting('default_statistics_target')::int),
+           st.n_mod_since_analyze,
+           c.reltuples
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid AND a.attname = %s
+    -- Queries on a parent read its children too, so parents use the statistics that include them.
+    LEFT JOIN pg_catalog.pg_stats s
+           ON s.schemaname = n.nspname AND s.tablename = c.relname AND s.attname = a.attname
+          AND s.inherited = (c.relkind = 'p' OR c.relhassubclass)
+    LEFT JOIN pg_catalog.pg_stat_user_tables st ON st.relid = c.oid
+    WHERE c.oid = %s::regclass;
+"""
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally et al.) with `capacity`
+    counters. Each reported count overestimates the true count by at most
+    its recorded error, which never exceeds total / capacity.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}  # item -> [count, error]
+        self._heap = []    # (count, item); stale entries are skipped lazily
+
+    def add(self, item, weight: int = 1):
+        self.total += weight
+        entry = self._counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+        elif len(self._counts) < self.capacity:
+            entry = self._counts[item] = [weight, 0]
+        else:
+            floor, victim = self._pop_min()
+            del self._counts[victim]
+            entry = self._counts[item] = [floor + weight, floor]
+        heapq.heappush(self._heap, (entry[0], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, i) for i, (c, _) in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            entry = self._counts.get(item)
+            if entry is not None and entry[0] == count:
+                return count, item
+
+    def top(self, k: int):
+        """Returns [(item, count, error)] for the k largest counters."""
+        ranked = sorted(self._counts.items(), key=lambda kv: kv[1][0], reverse=True)[:k]
+        return [(item, count, error) for item, (count, error) in ranked]
+
+
+def mcv_top_k(cursor, table: str, column: str, k: int, total_rows: int):
+    """
+    Answers from pg_stats when the column has a most-common-values list that
+    is fresh and long enough for k. Returns a TopKEstimate or None.
+    """
+    execute_prepared(cursor, _MCV_SQL, (column, table))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    values, freqs, n_distinct, stats_target, modified, reltuples = row
+    if not values or reltuples is None or reltuples < 0:
+        return None
+    if (modified or 0) > config.TOPK_STATS_MAX_MODIFIED * max(reltuples, 1):
+        return None
+    distinct = -n_distinct * reltuples if n_distinct and n_distinct < 0 else n_distinct
+    if len(values) < k and not (distinct and len(values) >= distinct):
+        return None
+
+    # ANALYZE reads 300 rows per unit of statistics target.
+    analyzed = max(1, min(300 * stats_target, int(reltuples)))
+    estimates = [
+        (value, freq * total_rows, Z_95 * math.sqrt(freq * (1 - freq) / analyzed) * total_rows)
+        for value, freq in list(zip(values, freqs))[:k]
+    ]
+    return TopKEstimate(estimates, f"pg_stats most_common_vals, ANALYZE sample of {analyzed:,} rows")
+
+
+def sampled_top_k(conn, table: str, column: str, k: int, total_rows: int):
+    """Runs a Space-Saving sketch over a TABLESAMPLE SYSTEM scan. Returns a TopKEstimate."""
+    percent = min(100.0, 100.0 * config.TOPK_SAMPLE_ROWS / max(total_rows, 1))
+    sketch = SpaceSaving(max(config.TOPK_SKETCH_CAPACITY, 10 * k))
+    sampled = 0
+    with conn.cursor(name="top_k_sample") as cursor:
+        cursor.execute(
+            f"SELECT {column}::text FROM {table} TABLESAMPLE SYSTEM (%s) REPEATABLE (%s);",
+            (percent, config.SAMPLE_SEED),
+        )
+        while True:
+            batch = cursor.fetchmany(config.STREAM_BATCH_SIZE * 10)
+            if not batch:
+                break
+            sampled += len(batch)
+            # Pre-aggregating each batch turns most updates into one weighted add.
+            for (value,), weight in Counter(batch).items():
+                if value is not None:
+                    sketch.add(value, weight)
+
+    scale = total_rows / sampled if sampled else 0.0
+    estimates = []
+    for value, count, error in sketch.top(k):
+        p = count / sampled
+        bound = (error + Z_95 * math.sqrt(sampled * p * (1 - p))) * scale
+        estimates.append((value, count * scale, bound))
+    return TopKEstimate(
+        estimates,
+        f"Space-Saving sketch over a {percent:.2f}% TABLESAMPLE of {sampled:,} rows",
+    )
+
+
+def approximate_top_k(conn, table: str, column: str, k: int, mode: str = "auto"):
+    """
+    Decides how top_k_column_values should answer. Returns a TopKEstimate, or
+    None when the exact GROUP BY should run ("exact" mode, or "auto" on tables
+    estimated at most TOPK_EXACT_MAX_ROWS rows).
+    """
+    if mode == "exact":
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute("SET TRANSACTION READ ONLY;")
+        total_rows = estimate_table_rows(cursor, table).rows
+        if mode == "auto" and total_rows <= config.TOPK_EXACT_MAX_ROWS:
+            return None
+        estimate = mcv_top_k(cursor, table, column, k, total_rows)
+    return estimate or sampled_top_k(conn, table, column, k, total_rows)
+
+
+def format_top_k(estimate: TopKEstimate, table: str, column: str) -> str:
+    """Renders a TopKEstimate as labeled 'value: ~count ±bound' lines."""
+    if not estimate.values:
+        return f"No data or distinct values found in {table}.{column}"
+    lines = [
+        f"Approximate top {len(estimate.values)} values of {table}.{column} "
+        f"(from {estimate.detail}; ± is a 95% bound; use mode='exact' for exact counts):"
+    ]
+    lines += [f"{value}: ~{round(count):,} ±{math.ceil(bound):,}" for value, count, bound in estimate.values]
+    return "\n".join(lines)
@@ -0,0 +1,359 @@
+# metrics.py
+
+"""
+Per-tool instrumentation.
+
+instrument() wraps a tool so each call opens a ToolSpan held in a context
+variable. While the span is current, the pool adds its checkout time
+(waiting for and opening a connection), TimedCursor adds the time spent in
+execute() and fetch*() with the rows fetched and their approximate size as
+text, and the result cache and prepared statements count hits. When the call ends the span is
+folded into process-wide counters and histograms, and optionally appended
+as one JSON line to METRICS_SPAN_FILE.
+
+render_prometheus() returns the metrics in the Prometheus text format;
+set METRICS_PORT to also serve them on http://<METRICS_ADDR>:<port>/metrics.
+
+Every tool registered through db_core.aio.to_async_tools() is instrumented.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+import psycopg2.extensions
+
+from . import config
+
+_current_span = contextvars.ContextVar("db_tool_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class ToolSpan:
+    """Timings and sizes of one tool call."""
+
+    __slots__ = (
+        "tool", "module", "span_id", "parent_id", "started_at", "duration_seconds",
+        "connect_seconds", "execute_seconds", "fetch_seconds", "statements",
+        "rows_fetched", "fetched_bytes", "output_bytes", "cache_hits", "prepared_hits",
+        "statements_prepared", "db_error", "error",
+    )
+
+    def __init__(self, tool: str, module: str, parent=None):
+        self.tool = tool
+        self.module = module
+        self.span_id = f"{os.getpid():x}-{next(_span_ids):x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.started_at = time.time()
+        self.duration_seconds = 0.0
+        self.connect_seconds = 0.0
+        self.execute_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self.statements = 0
+        self.rows_fetched = 0
+        self.fetched_bytes = 0
+        self.output_bytes = 0
+        self.cache_hits = 0
+        self.prepared_hits = 0        # statements run from an existing server-side prepared statement
+        self.statements_prepared = 0  # PREPAREs issued
+        self.db_error = None  # class of the last database error, even if the tool caught it
+        self.error = None     # class of the exception that escaped the tool, else db_error
+
+    def to_dict(self) -> dict:
+        return {
+            "tool": self.tool,
+            "module": self.module,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": round(self.started_at, 6),
+            "duration_ms": round(self.duration_seconds * 1000, 3),
+            "connect_ms": round(self.connect_seconds * 1000, 3),
+            "execute_ms": round(self.execute_seconds * 1000, 3),
+            "fetch_ms": round(self.fetch_seconds * 1000, 3),
+            "statements": self.statements,
+            "rows_fetched": self.rows_fetched,
+            "fetched_bytes": self.fetched_bytes,
+            "output_bytes": self.output_bytes,
+            "cache_hits": self.cache_hits,
+            "prepared_hits": self.prepared_hits,
+            "statements_prepared": self.statements_prepared,
+            "error": self.error,
+        }
+
+
+def current_span():
+    """The span of the tool call running in this context, or None."""
+    return _current_span.get()
+
+
+# --- Hooks called by the pool, cursor, result cache, prepared statements and bulk export ---
+
+def record_connect(seconds: float):
+    span = _current_span.get()
+    if span is not None:
+        span.connect_seconds += seconds
+
+
+def record_cache_hit():
+    span = _current_span.get()
+    if span is not None:
+        span.cache_hits += 1
+
+
+def record_prepared(hit: bool):
+    span = _current_span.get()
+    if span is not None:
+        if hit:
+            span.prepared_hits += 1
+        else:
+            span.statements_prepared += 1
+
+
+def record_fetch(seconds: float, rows: int, nbytes: int):
+    """Charges a bulk transfer that bypassed the cursor's fetch*() (e.g. COPY) to the span."""
+    span = _current_span.get()
+    if span is not None:
+        span.fetch_seconds += seconds
+        span.rows_fetched += rows
+        span.fetched_bytes += nbytes
+
+
+def _text_size(rows) -> int:
+    return sum(len(str(value)) for row in rows for value in row)
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """
+    Cursor that charges execute() and fetch*() time, fetched rows and their
+    size to the current span. Outside an instrumented call it behaves
+    exactly like the default cursor.
+    """
+
+    def execute(self, query, vars=None):
+        span = _current_span.get()
+        if span is None:
+            return super().execute(query, vars)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        except psycopg2.Error as e:
+            span.db_error = type(e).__name__
+            raise
+        finally:
+            span.execute_seconds += time.perf_counter() - started
+            span.statements += 1
+
+    def _timed_fetch(self, fetch, *args):
+        span = _current_span.get()
+        if span is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        try:
+            result = fetch(*args)
+        finally:
+            span.fetch_seconds += time.perf_counter() - started
+        rows = result if isinstance(result, list) else ([result] if result is not None else [])
+        span.rows_fetched += len(rows)
+        if config.METRICS_MEASURE_BYTES:
+            span.fetched_bytes += _text_size(rows)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._timed_fetch(super().fetchmany)
+        return self._timed_fetch(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+# --- Counters and histograms ---
+
+class _Metric:
+    def __init__(self, name: str, help_text: str, labels, buckets=None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) if buckets else None
+        self.values = {}  # label values -> count, or [bucket counts..., sum, count]
+
+    def observe(self, label_values, value: float):
+        if self.buckets is None:
+            self.values[label_values] = self.values.get(label_values, 0) + value
+            return
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        kind = "histogram" if self.buckets else "counter"
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {kind}"]
+        for label_values, value in sorted(self.values.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            if self.buckets is None:
+                lines.append(f"{self.name}{{{labels}}} {value:g}")
+                continue
+            for bound, count in zip(self.buckets, value):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {value[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {value[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {value[-1]}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_LABELS = ("tool", "module")
+_metrics_lock = threading.Lock()
+_calls = _Metric("db_tool_calls_total", "Tool calls.", _LABELS)
+_errors = _Metric("db_tool_errors_total", "Tool calls that raised or hit a database error.", _LABELS + ("error",))
+_cache_hits = _Metric("db_tool_result_cache_hits_total", "Results served from the query result cache.", _LABELS)
+_prepared_hits = _Metric("db_tool_prepared_hits_total", "Statements run from a server-side prepared statement.", _LABELS)
+_prepared = _Metric("db_tool_statements_prepared_total", "Server-side prepared statements created.", _LABELS)
+_rows = _Metric("db_tool_rows_fetched_total", "Rows fetched from PostgreSQL.", _LABELS)
+_fetched_bytes = _Metric("db_tool_fetched_bytes_total", "Approximate size of fetched rows as text.", _LABELS)
+_duration = _Metric("db_tool_duration_seconds", "Wall time of a tool call.", _LABELS, config.METRICS_LATENCY_BUCKETS)
+_connect = _Metric("db_tool_connect_seconds", "Time waiting for and opening pooled connections.", _LABELS, config.METRICS_LATENCY_BUCKETS)
+_execute = _Metric("db_tool_execute_seconds", "Time in execute() and fetch*() calls.", _LABELS, config.METRICS_LATENCY_BUCKETS)
+_output = _Metric("db_tool_output_bytes", "Size of the tool's formatted output.", _LABELS, config.METRICS_SIZE_BUCKETS)
+_ALL = (_calls, _errors, _cache_hits, _prepared_hits, _prepared, _rows, _fetched_bytes, _duration, _connect, _execute, _output)
+
+
+def _record(span: ToolSpan):
+    labels = (span.tool, span.module)
+    with _metrics_lock:
+        _calls.observe(labels, 1)
+        if span.error:
+            _errors.observe(labels + (span.error,), 1)
+        if span.cache_hits:
+            _cache_hits.observe(labels, span.cache_hits)
+        if span.prepared_hits:
+            _prepared_hits.observe(labels, span.prepared_hits)
+        if span.statements_prepared:
+            _prepared.observe(labels, span.statements_prepared)
+        _rows.observe(labels, span.rows_fetched)
+        _fetched_bytes.observe(labels, span.fetched_bytes)
+        _duration.observe(labels, span.duration_seconds)
+        _connect.observe(labels, span.connect_seconds)
+        _execute.observe(labels, span.execute_seconds + span.fetch_seconds)
+        _output.observe(labels, span.output_bytes)
+    if config.METRICS_SPAN_FILE:
+        _write_span(span)
+
+
+def render_prometheus() -> str:
+    """All tool metrics in the Prometheus text exposition format."""
+    with _metrics_lock:
+        lines = [line for metric in _ALL for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """Zeroes every counter and histogram."""
+    with _metrics_lock:
+        for metric in _ALL:
+            metric.values.clear()
+
+
+# --- Exporters ---
+
+_span_file = None
+_span_file_lock = threading.Lock()
+
+
+def _write_span(span: ToolSpan):
+    global _span_file
+    line = json.dumps(span.to_dict(), separators=(",", ":")) + "\n"
+    with _span_file_lock:
+        if _span_file is None:
+            _span_file = open(config.METRICS_SPAN_FILE, "a", buffering=1)
+        _span_file.write(line)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None, addr: str = None):
+    """Serves /metrics on a daemon thread (once per process). Returns the server."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((addr or config.METRICS_ADDR, port or config.METRICS_PORT), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="db-metrics", daemon=True).start()
+    return _server
+
+
+# --- Tool wrapper ---
+
+def _output_size(output) -> int:
+    if output is None:
+        return 0
+    if isinstance(output, str):
+        return len(output.encode("utf-8"))
+    try:
+        return len(json.dumps(output, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(output).encode("utf-8"))
+
+
+def instrument(func):
+    """Wraps a synchronous tool so each call is measured as a ToolSpan."""
+    if not config.METRICS_ENABLED or getattr(func, "instrumented", False):
+        return func
+    module = func.__module__.rsplit(".", 1)[-1]
+
+    @functools.wraps(func)
+    def instrumented_tool(*args, **kwargs):
+        if config.METRICS_PORT and _server is None:
+            start_metrics_server()
+        span = ToolSpan(func.__name__, module, _current_span.get())
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            output = func(*args, **kwargs)
+            span.output_bytes = _output_size(output)
+            return output
+        except Exception as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration_seconds = time.perf_counter() - started
+            span.error = span.error or span.db_error
+            _current_span.reset(token)
+            _record(span)
+
+    instrumented_tool.instrumented = True
+    return instrumented_tool
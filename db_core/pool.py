@@ -0,0 +1,302 @@
+# pool.py
+
+"""
+Process-wide PostgreSQL connection pool shared by every database tool.
+
+Tools used to call psycopg2.connect() on each invocation, paying a full
+TCP/TLS/auth handshake per call. One bounded pool per distinct DB_CONFIG
+now hands out warm connections instead, reaps idle ones, health-checks
+connections on checkout and keeps wait-time metrics.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+from . import config
+from .metrics import TimedCursor, record_connect
+from .prepared import PreparingConnection
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """A thread-safe, bounded pool of psycopg2 connections."""
+
+    def __init__(
+        self,
+        db_config: dict,
+        minconn: int = config.POOL_MIN_SIZE,
+        maxconn: int = config.POOL_MAX_SIZE,
+        checkout_timeout: float = config.POOL_CHECKOUT_TIMEOUT,
+        max_idle: float = config.POOL_MAX_IDLE_SECONDS,
+        reap_interval: float = config.POOL_REAP_INTERVAL,
+        health_check_after: float = config.POOL_HEALTH_CHECK_AFTER,
+    ):
+        if maxconn < 1 or minconn < 0 or minconn > maxconn:
+            raise ValueError("Pool sizes must satisfy 0 <= minconn <= maxconn and maxconn >= 1.")
+        self._db_config = dict(db_config)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self._idle = deque()  # (connection, returned_at); right end is most recently used
+        self._size = 0        # open connections, idle + checked out
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+        self._stop_reaper = threading.Event()
+        self._reaper = None
+        if reap_interval and reap_interval > 0:
+            self._reaper = threading.Thread(
+                target=self._reap_loop, args=(reap_interval,), name="db-pool-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    # --- Checkout / return ---
+
+    def getconn(self):
+        """Checks out a healthy connection, opening a new one if the pool has room."""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed.")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.checkout_timeout:.1f}s "
+                        f"(pool size {self.maxconn})."
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, returned_at):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                self._close_quietly(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        record_connect(waited)
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Returns a connection to the pool, closing it if it is broken or mid-transaction."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        discard = discard or bool(conn.closed)
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard or self._closed:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding a pooled connection.
+        Commits on success and rolls back on error, exactly like
+        `with psycopg2.connect(...) as conn`, then hands the connection back.
+        """
+        conn = self.getconn()
+        broken = False
+        try:
+            with conn:
+                yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, discard=broken)
+
+    # --- Maintenance ---
+
+    def reap(self) -> int:
+        """Closes connections idle longer than max_idle, keeping at least minconn open."""
+        cutoff = time.monotonic() - self.max_idle
+        expired = []
+        with self._cond:
+            # Oldest idle connections sit at the left end of the deque.
+            while self._idle and self._size > self.minconn and self._idle[0][1] < cutoff:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+        for conn in expired:
+            self._close_quietly(conn)
+        return len(expired)
+
+    def fill(self, count: int = None) -> int:
+        """Pre-opens connections up to `count` (default minconn). Returns how many were opened."""
+        target = min(self.maxconn, self.minconn if count is None else count)
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._size >= target:
+                    return opened
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.appendleft((conn, time.monotonic()))
+                self._cond.notify()
+            opened += 1
+
+    def close(self):
+        """Closes every idle connection; checked-out ones are closed when returned."""
+        self._stop_reaper.set()
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        """Returns pool size and wait-time metrics as a plain dict."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["max_size"] = self.maxconn
+        checkouts = stats["checkouts"]
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / checkouts if checkouts else 0.0
+        return stats
+
+    # --- Internals ---
+
+    def _connect(self):
+        # TimedCursor charges query time to the calling tool's span (db_core/metrics.py);
+        # PreparingConnection keeps the session's prepared statements (db_core/prepared.py).
+        defaults = {"cursor_factory": TimedCursor, "connection_factory": PreparingConnection}
+        conn = psycopg2.connect(**dict(defaults, **self._db_config))
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _is_healthy(self, conn, returned_at) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._stats["connections_closed"] += 1
+
+    def _reap_loop(self, interval: float):
+        while not self._stop_reaper.wait(interval):
+            self.reap()
+
+
+# --- Process-wide registry ---
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(db_config: dict):
+    # The pid is part of the key so a forked worker never reuses its parent's sockets.
+    return os.getpid(), tuple(sorted((k, str(v)) for k, v in db_config.items()))
+
+
+def get_pool(db_config: dict) -> ConnectionPool:
+    """Returns the shared pool for this DB_CONFIG, creating it on first use."""
+    key = _pool_key(db_config)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(db_config)
+    return pool
+
+
+def get_connection(db_config: dict):
+    """Shortcut for `get_pool(db_config).connection()`."""
+    return get_pool(db_config).connection()
+
+
+def pool_stats() -> dict:
+    """Returns the metrics of every pool in this process, keyed by host/dbname."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    stats = {}
+    for (_, items), pool in pools:
+        cfg = dict(items)
+        stats[f"{cfg.get('host', '')}/{cfg.get('dbname') or cfg.get('database', '')}"] = pool.stats()
+    return stats
+
+
+@atexit.register
+def close_all_pools():
+    """Closes every pool created by this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,167 @@
+# prepared.py
+
+"""
+Server-side prepared statements for the tools' fixed query templates.
+
+Catalog lookups, table-size and count/top-k queries are sent with the
+same text over and over, and PostgreSQL parses and plans each one again.
+execute_prepared() runs such a template through PREPARE / EXECUTE
+instead. It follows psycopg 3's prepare_threshold policy: a template is
+prepared the PREPARED_THRESHOLD-th time it runs on a connection, so
+one-off statements never pay for a PREPARE.
+
+Each pooled connection is a PreparingConnection, which carries its own
+PreparedStatements registry. Prepared statements live as long as the
+server session, so the registry survives pool checkouts and transaction
+rollbacks. It keeps at most PREPARED_MAX_STATEMENTS statements and
+DEALLOCATEs the least recently used one when full. When a batch fails,
+the server may or may not have run its PREPARE or DEALLOCATEs, so the
+names involved are deallocated at the next call only if
+pg_prepared_statements still lists them. Prepared hits are counted on
+the current tool span (db_core/metrics.py).
+
+Templates use psycopg2's positional %s placeholders only.
+"""
+
+import itertools
+import re
+from collections import OrderedDict
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+from . import config
+from .metrics import record_prepared
+
+_names = itertools.count(1)
+
+
+class PreparedStatements:
+    """Per-connection LRU of template -> prepared statement name, plus use counts of unprepared templates."""
+
+    def __init__(self, max_statements: int, threshold: int):
+        self.max_statements = max_statements
+        self.threshold = max(1, threshold)
+        self.statements = OrderedDict()  # template -> statement name
+        self._uses = OrderedDict()       # template -> executions before it was prepared
+        self._stale = []                 # names to DEALLOCATE before the next statement
+        self._doubtful = []              # names to DEALLOCATE only if the server still has them
+
+    def lookup(self, template: str):
+        """
+        (name, needs PREPARE, cleanup) for `template`; name is None below the
+        threshold. cleanup is the (stale, doubtful) names to deallocate first;
+        hand it back to restore() if the batch fails.
+        """
+        name = self.statements.get(template)
+        if name is not None:
+            self.statements.move_to_end(template)
+            return name, False, self._take_cleanup()
+        uses = self._uses.pop(template, 0) + 1
+        if uses < self.threshold:
+            self._uses[template] = uses
+            while len(self._uses) > self.max_statements * 4:
+                self._uses.popitem(last=False)
+            return None, False, self._take_cleanup()
+        name = f"db_agent_stmt_{next(_names)}"
+        self.statements[template] = name
+        while len(self.statements) > self.max_statements:
+            self._stale.append(self.statements.popitem(last=False)[1])
+        return name, True, self._take_cleanup()
+
+    def forget(self, template: str, exists: bool = True):
+        """
+        Drops `template` from the registry and deallocates its statement
+        before the next statement. Pass exists=False when it may never have
+        been prepared (DEALLOCATE of an unknown name is an error): it is then
+        deallocated only if the server has it.
+        """
+        name = self.statements.pop(template, None)
+        if name is not None:
+            (self._stale if exists else self._doubtful).append(name)
+
+    def restore(self, cleanup):
+        """Puts back the names of a failed batch's cleanup; any of them may already be gone."""
+        stale, doubtful = cleanup
+        self._doubtful.extend(stale)
+        self._doubtful.extend(doubtful)
+
+    def _take_cleanup(self):
+        cleanup = (self._stale, self._doubtful)
+        self._stale, self._doubtful = [], []
+        return cleanup
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that keeps a PreparedStatements registry for its server session."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = PreparedStatements(config.PREPARED_MAX_STATEMENTS, config.PREPARED_THRESHOLD)
+
+
+def _positional(template: str, params) -> str:
+    """
+    `template` ready for PREPARE: with parameters, its %s placeholders become
+    $1, $2, ... (%% stays escaped, since psycopg2 still interpolates the
+    EXECUTE); without, the text is taken literally, as cursor.execute() does.
+    """
+    template = template.strip().rstrip(";")
+    if params is None:
+        return template
+    counter = itertools.count(1)
+    return re.sub(r"%%|%s", lambda m: m.group(0) if m.group(0) == "%%" else f"${next(counter)}", template)
+
+
+def _cleanup_sql(cleanup) -> str:
+    stale, doubtful = cleanup
+    sql = "".join(f"\nDEALLOCATE {name};" for name in stale)
+    if doubtful:
+        # DEALLOCATE has no IF EXISTS; look the names up on the server instead.
+        sql += (
+            "\nDO $$ DECLARE stmt text; BEGIN"
+            f" FOR stmt IN SELECT name FROM pg_prepared_statements WHERE name = ANY ('{{{','.join(doubtful)}}}'::text[])"
+            " LOOP EXECUTE 'DEALLOCATE ' || quote_ident(stmt); END LOOP; END $$;"
+        )
+    return sql
+
+
+def execute_prepared(cursor, template: str, params=None, prefix: str = ""):
+    """
+    Executes `template` with `params` on `cursor`, through a prepared
+    statement once the template has run PREPARED_THRESHOLD times on this
+    connection. `prefix` (e.g. "SET TRANSACTION READ ONLY;") is sent in the
+    same round trip. Connections without a registry execute it directly.
+    """
+    registry = getattr(cursor.connection, "prepared_statements", None)
+    if registry is None or not config.PREPARED_STATEMENTS_ENABLED:
+        return cursor.execute(f"{prefix}\n{template}", params)
+    name, prepare, cleanup = registry.lookup(template)
+    # Each statement goes on its own line, so a template ending in a `-- comment`
+    # cannot comment out the statement that follows it.
+    sql = prefix + _cleanup_sql(cleanup)
+    if name is None:
+        try:
+            return cursor.execute(f"{sql}\n{template}", params)
+        except psycopg2.Error:
+            registry.restore(cleanup)
+            raise
+    if prepare:
+        sql += f"\nPREPARE {name} AS {_positional(template, params)}\n;"
+    arguments = f"({', '.join(['%s'] * len(params))})" if params else ""
+    try:
+        result = cursor.execute(f"{sql}\nEXECUTE {name}{arguments};", params)
+    except psycopg2.Error as e:
+        # The batch stopped at an unknown statement: the cleanup may not have run,
+        # and a PREPARE in it may or may not have.
+        registry.restore(cleanup)
+        if prepare:
+            registry.forget(template, exists=False)
+        elif isinstance(e, psycopg2.errors.FeatureNotSupported):
+            # "cached plan must not change result type": the schema changed under the statement.
+            registry.forget(template)
+        # Otherwise only the EXECUTE failed, and the statement stays usable.
+        raise
+    record_prepared(hit=not prepare)
+    return result
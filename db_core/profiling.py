@@ -0,0 +1,184 @@
+# profiling.py
+
+"""
+Single-pass, multi-column table profiling and correlation.
+
+profile_table() builds one SELECT that aggregates every requested column
+together, so profiling a wide table costs one scan instead of one scan
+(plus one sort) per column. Distinct counts come from pg_stats and are
+fetched in the same round trip, so they cost nothing extra.
+correlation_matrix() likewise computes every CORR() pair in one SELECT.
+"""
+
+import re
+from datetime import date, datetime, time
+from decimal import Decimal
+
+NUMERIC_TYPES = ("smallint", "integer", "bigint", "numeric", "real", "double precision")
+TEMPORAL_TYPES = (
+    "date",
+    "timestamp", "timestamp without time zone", "timestamp with time zone",
+    "time", "time without time zone", "time with time zone",
+)
+
+
+def quote_ident(name: str) -> str:
+    """Quotes an identifier taken from the catalog."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_kind(data_type: str) -> str:
+    """
+    Classifies a catalog data type as 'numeric', 'temporal' or 'other'.
+    Only scalar types match, ignoring any typmod ("numeric(10,2)"); arrays
+    such as "integer[]" are 'other'.
+    """
+    base = " ".join(re.sub(r"\([^)]*\)", "", data_type).split())
+    if base in NUMERIC_TYPES:
+        return "numeric"
+    if base in TEMPORAL_TYPES:
+        return "temporal"
+    return "other"
+
+
+def parse_names(names: str):
+    """Splits a comma-separated column list, dropping blanks."""
+    return [n.strip() for n in (names or "").split(",") if n.strip()]
+
+
+def parse_quantiles(quantiles: str):
+    """Parses '0.25,0.5,0.75' into a sorted list of floats in [0, 1]."""
+    values = sorted({float(q) for q in quantiles.split(",") if q.strip()}) if quantiles else []
+    if any(q < 0 or q > 1 for q in values):
+        raise ValueError("Quantiles must be between 0 and 1.")
+    return values
+
+
+def compact(value):
+    """Converts a database value into a short JSON-friendly value."""
+    if isinstance(value, (Decimal, float)):
+        value = float(value)
+        return int(value) if value.is_integer() and abs(value) < 1e15 else float(f"{value:.6g}")
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def profile_table(cursor, table, columns=None, quantiles=(0.25, 0.5, 0.75), source_sql: str = None) -> dict:
+    """
+    Profiles the named `columns` (default: every column) of `table` (a
+    catalog TableInfo) in one scan. Returns
+    {"table", "rows", "columns": {name: {type, null_frac, distinct, ...}}}.
+    `source_sql` replaces the FROM target, e.g. to profile a TABLESAMPLE.
+    Raises ValueError for unknown column names.
+    """
+    if columns:
+        missing = [name for name in columns if table.column(name) is None]
+        if missing:
+            raise ValueError(f"Unknown column(s) in {table.name}: {', '.join(missing)}")
+        columns = [table.column(name) for name in columns]
+    else:
+        columns = table.columns
+    source = source_sql or f"{quote_ident(table.schema)}.{quote_ident(table.name)}"
+    select = ["COUNT(*)"]
+    layout = []  # (column, kind) in select order
+    for col in columns:
+        ident = quote_ident(col.name)
+        kind = column_kind(col.data_type)
+        items = [f"COUNT({ident})"]
+        if kind == "numeric":
+            items += [
+                f"AVG({ident})::float8", f"STDDEV({ident})::float8",
+                f"MIN({ident}), MAX({ident})",
+            ]
+            if quantiles:
+                items.append(
+                    f"PERCENTILE_CONT(ARRAY[{', '.join(str(q) for q in quantiles)}]::float8[]) "
+                    f"WITHIN GROUP (ORDER BY {ident})"
+                )
+        elif kind == "temporal":
+            items.append(f"MIN({ident}), MAX({ident})")
+        select += items
+        layout.append((col, kind))
+    select.append(
+        "(SELECT json_object_agg(attname, n_distinct) FROM pg_catalog.pg_stats "
+        "WHERE schemaname = %s AND tablename = %s)"
+    )
+
+    cursor.execute(f"SELECT {', '.join(select)} FROM {source};", (table.schema, table.name))
+    row = list(cursor.fetchone())
+    n_distinct = row.pop() or {}
+    total = row[0]
+    values = iter(row[1:])
+
+    profile = {}
+    for col, kind in layout:
+        non_null = next(values)
+        entry = {
+            "type": col.data_type,
+            "null_frac": compact(1 - non_null / total) if total else None,
+        }
+        stat = n_distinct.get(col.name)
+        if stat is not None:
+            # Negative n_distinct is a fraction of the row count.
+            entry["distinct"] = compact(-stat * total if stat < 0 else stat)
+        if kind == "numeric":
+            entry["mean"], entry["stddev"], entry["min"], entry["max"] = (compact(next(values)) for _ in range(4))
+            if quantiles:
+                entry["quantiles"] = {str(q): compact(v) for q, v in zip(quantiles, next(values) or [])}
+        elif kind == "temporal":
+            entry["min"], entry["max"] = compact(next(values)), compact(next(values))
+        profile[col.name] = entry
+    return {"table": table.name, "rows": total, "columns": profile}
+
+
+CORRELATION_METHODS = ("pearson", "spearman")
+
+
+def correlation_matrix(cursor, table, columns=None, method: str = "pearson", source_sql: str = None) -> dict:
+    """
+    Computes every pairwise correlation among the named numeric `columns`
+    (default: all numeric columns) of `table` in one scan. Pearson pairs use
+    the rows where both values are non-NULL, as CORR() does. Spearman
+    correlates average ranks, computed by window functions over the same
+    scan; so that every pair ranks the same rows, it drops rows with a NULL
+    in any of the columns first, and "rows" counts the rows kept.
+    Returns {"table", "method", "rows", "columns", "matrix"}.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"method must be one of: {', '.join(CORRELATION_METHODS)}")
+    if columns:
+        missing = [name for name in columns if table.column(name) is None]
+        if missing:
+            raise ValueError(f"Unknown column(s) in {table.name}: {', '.join(missing)}")
+        non_numeric = [name for name in columns if column_kind(table.column(name).data_type) != "numeric"]
+        if non_numeric:
+            raise ValueError(f"Not numeric: {', '.join(non_numeric)}")
+    else:
+        columns = [col.name for col in table.columns if column_kind(col.data_type) == "numeric"]
+    if len(columns) < 2:
+        raise ValueError("At least two numeric columns are needed for a correlation matrix.")
+
+    source = source_sql or f"{quote_ident(table.schema)}.{quote_ident(table.name)}"
+    idents = [quote_ident(name) for name in columns]
+    if method == "spearman":
+        # Average rank of each value among the complete rows (ties share the mean rank).
+        # Ranking only rows without NULLs keeps rho pairwise-consistent: a NULL in one
+        # column can no longer shift that column's ranks for the other pairs.
+        ranks = ", ".join(
+            f"RANK() OVER (ORDER BY {ident}) + (COUNT(*) OVER (PARTITION BY {ident}) - 1) / 2.0 AS c{i}"
+            for i, ident in enumerate(idents)
+        )
+        complete = " AND ".join(f"{ident} IS NOT NULL" for ident in idents)
+        source = f"(SELECT {ranks} FROM {source} AS s WHERE {complete}) AS ranked"
+        idents = [f"c{i}" for i in range(len(columns))]
+
+    pairs = [(i, j) for i in range(len(idents)) for j in range(i + 1, len(idents))]
+    select = ["COUNT(*)"] + [f"CORR({idents[i]}, {idents[j]})" for i, j in pairs]
+    cursor.execute(f"SELECT {', '.join(select)} FROM {source};")
+    row = cursor.fetchone()
+
+    matrix = [[1.0 if i == j else None for j in range(len(columns))] for i in range(len(columns))]
+    for (i, j), value in zip(pairs, row[1:]):
+        matrix[i][j] = matrix[j][i] = None if value is None else round(value, 4)
+    return {"table": table.name, "method": method, "rows": row[0], "columns": list(columns), "matrix": matrix}
@@ -0,0 +1,87 @@
+# result_cache.py
+
+"""
+Short-lived cache of read-query results shared by the read tools.
+
+Results are keyed on the tool, the database, the normalized SQL text and
+the bound parameters. Entries expire after the tool's TTL in
+RESULT_CACHE_TTLS and the whole cache stays within RESULT_CACHE_MAX_BYTES.
+Concurrent identical queries are coalesced, so N callers asking the
+same thing at once cost Postgres a single execution.
+"""
+
+import re
+
+from . import config
+from .cache import LRUCache, SingleFlight
+from .metrics import record_cache_hit
+
+# Quoted literals/identifiers and dollar-quoted strings are kept verbatim.
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$(\w*)\$.*?\$\2\$)", re.DOTALL)
+
+_MISS = object()
+
+
+def _sizeof(value) -> int:
+    # Streamed results already know their rendered size.
+    byte_count = getattr(value, "byte_count", None)
+    if byte_count is not None:
+        return byte_count + 256
+    return len(repr(value))
+
+
+_cache = LRUCache(config.RESULT_CACHE_MAX_ENTRIES, max_bytes=config.RESULT_CACHE_MAX_BYTES, sizeof=_sizeof)
+_flights = SingleFlight()
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses whitespace, lower-cases everything outside quotes (PostgreSQL
+    folds unquoted identifiers anyway) and drops trailing semicolons.
+    """
+    parts = []
+    last = 0
+    for match in _QUOTED.finditer(sql):
+        parts.append(" ".join(sql[last:match.start()].split()).lower())
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(" ".join(sql[last:].split()).lower())
+    return " ".join(p for p in parts if p).rstrip("; ")
+
+
+def _config_key(db_config: dict):
+    return tuple(sorted((k, str(v)) for k, v in db_config.items() if k != "password"))
+
+
+def cached_query(tool: str, db_config: dict, sql: str, params, run):
+    """
+    Returns run()'s result for this (tool, database, sql, params), serving it
+    from cache while fresh and sharing one execution among concurrent callers.
+    Exceptions are never cached.
+    """
+    ttl = config.RESULT_CACHE_TTLS.get(tool)
+    if not ttl:
+        return run()
+
+    key = (tool, _config_key(db_config), normalize_sql(sql), repr(params))
+    value = _cache.get(key, _MISS)
+    if value is not _MISS:
+        record_cache_hit()
+        return value
+
+    def load():
+        result = run()
+        _cache.set(key, result, ttl)
+        return result
+
+    return _flights.do(key, load)
+
+
+def clear_result_cache():
+    """Drops every cached result."""
+    _cache.clear()
+
+
+def result_cache_stats() -> dict:
+    """Cache hit/miss/eviction counters plus single-flight coalescing counts."""
+    return dict(_cache.stats(), **_flights.stats)
@@ -0,0 +1,160 @@
+# rollups.py
+
+"""
+Incremental time-series rollups for time_series_summary.
+
+A rollup holds per-bucket partial aggregates of one value column (count,
+sum, sum of squares, min, max), keyed by (database, table, date column,
+value column, granularity). The first call builds it with one full
+GROUP BY. Later calls re-aggregate only from the start of the last
+ROLLUP_REOPEN_BUCKETS buckets, which hold the watermark (the newest
+date seen), with a `date_column >= <bucket start>` range scan. Those
+buckets are replaced and the closed ones are reused. With an index on
+the date column a repeat dashboard query reads the newest rows only.
+
+Closed buckets are trusted while the table is append-only. The rollup is
+rebuilt with a full scan when:
+- pg_stat counters show updates or deletes since the last refresh (the
+  counters are flushed by other sessions within seconds, so a change can
+  surface one refresh late);
+- the table's storage was replaced (TRUNCATE, VACUUM FULL, CLUSTER, or
+  partitions attached/detached);
+- it is older than ROLLUP_MAX_AGE.
+Rows inserted with dates inside already-closed buckets are picked up by
+that periodic rebuild. Widen ROLLUP_REOPEN_BUCKETS for late-arriving data.
+Only tables, partitioned tables and materialized views are rolled up;
+other relations are aggregated in full on every call.
+"""
+
+import math
+import threading
+import time
+from decimal import Decimal
+
+from . import config
+from .cache import LRUCache, SingleFlight
+from .pool import get_connection
+from .prepared import execute_prepared
+from .timeseries import GRANULARITIES
+
+# Storage identity and update/delete counters of the table and, if partitioned, its partitions.
+_CHANGES_SQL = """
+    WITH target AS (SELECT %s::regclass AS oid),
+    rels AS (
+        SELECT relid FROM target, pg_partition_tree(target.oid)
+        UNION SELECT oid FROM target
+    )
+    SELECT (SELECT relkind FROM pg_class, target WHERE pg_class.oid = target.oid),
+           string_agg(c.relfilenode::text, ',' ORDER BY c.oid),
+           COALESCE(SUM(s.n_tup_upd + s.n_tup_del), 0)
+    FROM rels
+    JOIN pg_class c ON c.oid = rels.relid
+    LEFT JOIN pg_stat_all_tables s ON s.relid = rels.relid;
+"""
+_ROLLUP_KINDS = ("r", "p", "m")
+# Buckets are keyed and resumed by date, so granularities finer than a day would collide.
+ROLLUP_GRANULARITIES = tuple(g for g in GRANULARITIES if g != "hour")
+
+_rollups = LRUCache(config.ROLLUP_MAX_ENTRIES)
+_flights = SingleFlight()
+_stats_lock = threading.Lock()
+stats = {"full": 0, "incremental": 0}
+
+
+class Rollup:
+    """Per-bucket [count, sum, sum of squares, min, max] plus what is needed to extend it."""
+
+    __slots__ = ("buckets", "watermark", "storage", "changes", "built_at")
+
+    def __init__(self, buckets, watermark, storage, changes, built_at):
+        self.buckets = buckets  # bucket start -> [count, sum, sum of squares, min, max], in bucket order
+        self.watermark = watermark
+        self.storage = storage
+        self.changes = changes
+        self.built_at = built_at
+
+    def series(self):
+        """[(bucket, count, mean, stddev, min, max)] in bucket order; stddev is the sample stddev."""
+        rows = []
+        for bucket, (n, total, squares, low, high) in self.buckets.items():
+            # Divided in the sum's own type (numeric -> Decimal), so means round exactly as AVG() does.
+            mean = Decimal(total) / n if isinstance(total, int) else total / n
+            mean_f = float(mean)
+            variance = (squares - n * mean_f * mean_f) / (n - 1) if n > 1 else None
+            stddev = math.sqrt(max(variance, 0.0)) if variance is not None else None
+            rows.append((bucket, n, mean, stddev, low, high))
+        return rows
+
+
+def _aggregate_sql(table: str, date_column: str, agg_column: str, since: bool) -> str:
+    value = f"({agg_column})::float8"
+    return f"""
+        SELECT DATE_TRUNC(%s, {date_column})::date AS bucket,
+               COUNT(*), SUM({agg_column}), SUM({value} * {value}), MIN({value}), MAX({value}), MAX({date_column})
+        FROM {table}
+        WHERE {date_column} IS NOT NULL AND {agg_column} IS NOT NULL{f" AND {date_column} >= %s" if since else ""}
+        GROUP BY 1
+        ORDER BY 1;
+    """
+
+
+def _aggregate(cursor, table, date_column, agg_column, granularity, since=None):
+    params = (granularity, since) if since is not None else (granularity,)
+    execute_prepared(cursor, _aggregate_sql(table, date_column, agg_column, since is not None), params)
+    buckets, watermark = {}, None
+    for bucket, n, total, squares, low, high, newest in cursor.fetchall():
+        buckets[bucket] = [n, total, squares, low, high]
+        watermark = newest if watermark is None else max(watermark, newest)
+    return buckets, watermark
+
+
+def _refresh(db_config, table, date_column, agg_column, granularity, rollup):
+    with get_connection(db_config) as conn:
+        with conn.cursor() as cursor:
+            execute_prepared(cursor, _CHANGES_SQL, (table,), prefix="SET TRANSACTION READ ONLY; ")
+            kind, storage, changes = cursor.fetchone()
+            full = (
+                rollup is None
+                or time.monotonic() - rollup.built_at > config.ROLLUP_MAX_AGE
+                or storage != rollup.storage
+                or changes != rollup.changes
+                or not rollup.buckets
+            )
+            if full:
+                buckets, watermark = _aggregate(cursor, table, date_column, agg_column, granularity)
+                rollup = Rollup(buckets, watermark, storage, changes, time.monotonic())
+            else:
+                reopened = list(rollup.buckets)[-config.ROLLUP_REOPEN_BUCKETS:]
+                fresh, watermark = _aggregate(cursor, table, date_column, agg_column, granularity, since=reopened[0])
+                buckets = {b: v for b, v in rollup.buckets.items() if b < reopened[0]}
+                buckets.update(fresh)
+                rollup = Rollup(buckets, watermark or rollup.watermark, storage, changes, rollup.built_at)
+    with _stats_lock:
+        stats["full" if full else "incremental"] += 1
+    return rollup, kind in _ROLLUP_KINDS
+
+
+def rollup_series(db_config: dict, table: str, date_column: str, agg_column: str, granularity: str = "month"):
+    """
+    Per-bucket (bucket, count, mean, stddev, min, max) of `agg_column` by
+    DATE_TRUNC(granularity, date_column), from the rollup cache: built in
+    full on first use, extended from the watermark afterwards. Buckets are
+    dates, so the granularity is a day or coarser.
+    """
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(ROLLUP_GRANULARITIES)}")
+    settings = tuple(sorted((k, str(v)) for k, v in db_config.items() if k != "password"))
+    key = (settings, table, date_column, agg_column, granularity)
+
+    def refresh():
+        rollup, cacheable = _refresh(db_config, table, date_column, agg_column, granularity, _rollups.get(key))
+        if cacheable and config.ROLLUPS_ENABLED:
+            _rollups.set(key, rollup)
+        return rollup
+
+    return _flights.do(key, refresh).series()
+
+
+def clear_rollups():
+    """Forgets every rollup; the next call for each rebuilds it with a full scan."""
+    _rollups.clear()
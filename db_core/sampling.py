@@ -0,0 +1,164 @@
+# sampling.py
+
+"""
+TABLESAMPLE-based sampling for the statistics tools.
+
+A `sample` argument is either a percentage ("5%") or a target row count
+("100000"), optionally followed by the method: "system" (default, reads
+whole random pages and is fast) or "bernoulli" (reads every page, keeps
+random rows; slower but unclustered). Samples use REPEATABLE(SAMPLE_SEED)
+so the same question gets the same answer, and cached results stay valid.
+
+The *_ci helpers return 95% confidence intervals for estimates computed
+from a sample. They assume independent rows; SYSTEM samples of tables
+whose values cluster by page are less informative than the interval says.
+"""
+
+import math
+import re
+from collections import namedtuple
+
+from . import config
+from .estimates import estimate_table_rows
+from .pool import get_connection
+
+SAMPLE_METHODS = ("system", "bernoulli")
+
+Z_95 = 1.96
+
+_SAMPLE_RE = re.compile(
+    r"^\s*(\d+(?:\.\d+)?)\s*(%|rows?)?\s*(system|bernoulli)?\s*$", re.IGNORECASE
+)
+
+
+class Sample(namedtuple("Sample", "percent method expected_rows")):
+    """A resolved sample: percentage of pages/rows, method, expected sample size."""
+
+    @property
+    def clause(self) -> str:
+        return f"TABLESAMPLE {self.method.upper()} ({self.percent:.6g}) REPEATABLE ({config.SAMPLE_SEED})"
+
+    def describe(self, rows: int = None) -> str:
+        rows = self.expected_rows if rows is None else rows
+        return f"{self.percent:.4g}% {self.method.upper()} sample of {rows:,} rows"
+
+
+def parse_sample(sample: str):
+    """
+    Parses a sample spec into (value, is_percent, method), or None for a
+    blank spec (full scan). Raises ValueError for malformed specs.
+    """
+    if not sample or not str(sample).strip():
+        return None
+    match = _SAMPLE_RE.match(str(sample))
+    if not match:
+        raise ValueError(
+            f"Invalid sample '{sample}'. Use a percentage ('5%') or a row count ('100000'), "
+            f"optionally followed by {' or '.join(SAMPLE_METHODS)}."
+        )
+    value, unit, method = match.groups()
+    value = float(value)
+    is_percent = unit == "%"
+    if value <= 0 or (is_percent and value > 100):
+        raise ValueError("Sample percentage must be in (0, 100] and row counts positive.")
+    return value, is_percent, (method or "system").lower()
+
+
+def resolve_sample(db_config: dict, table: str, sample: str):
+    """
+    Turns a sample spec into a Sample for `table`, using the planner's row
+    estimate to convert row counts to a percentage. Returns None when no
+    sampling should happen (blank spec, or the sample would cover the table).
+    """
+    parsed = parse_sample(sample)
+    if parsed is None:
+        return None
+    value, is_percent, method = parsed
+    with get_connection(db_config) as conn:
+        with conn.cursor() as cursor:
+            total_rows = estimate_table_rows(cursor, table).rows
+    percent = value if is_percent else 100.0 * value / max(total_rows, 1)
+    if percent >= 100:
+        return None
+    return Sample(percent, method, max(1, int(total_rows * percent / 100)))
+
+
+def mean_ci(mean, stddev, n):
+    """Normal-approximation interval for a mean."""
+    if mean is None or stddev is None or not n or n < 2:
+        return None
+    half = Z_95 * float(stddev) / math.sqrt(n)
+    return float(mean) - half, float(mean) + half
+
+
+def stddev_ci(stddev, n):
+    """Large-sample interval for a standard deviation (se ~ s / sqrt(2(n-1)))."""
+    if stddev is None or not n or n < 3:
+        return None
+    half = Z_95 * float(stddev) / math.sqrt(2 * (n - 1))
+    return max(0.0, float(stddev) - half), float(stddev) + half
+
+
+def median_ci_quantiles(n):
+    """
+    Quantiles whose sample values bound the median with ~95% confidence
+    (order statistics at ranks n/2 -+ 1.96 sqrt(n)/2, distribution-free).
+    """
+    half = Z_95 * 0.5 / math.sqrt(max(n, 1))
+    return max(0.0, 0.5 - half), min(1.0, 0.5 + half)
+
+
+def correlation_ci(r, n):
+    """Fisher z-transform interval for a Pearson correlation."""
+    if r is None or not n or n < 4:
+        return None
+    r = max(-0.9999999, min(0.9999999, float(r)))
+    z, half = math.atanh(r), Z_95 / math.sqrt(n - 3)
+    return math.tanh(z - half), math.tanh(z + half)
+
+
+def format_ci(ci, digits: int = 2) -> str:
+    """Renders an interval as ' (95% CI lo to hi)', or '' when unavailable."""
+    if ci is None:
+        return ""
+    return f" (95% CI {ci[0]:.{digits}f} to {ci[1]:.{digits}f})"
+
+
+def numeric_stats_query(table: str, column: str, sample: Sample):
+    """SQL and params for sampled mean/median/stddev/min/max of one column."""
+    lo, hi = median_ci_quantiles(sample.expected_rows)
+    return f"""
+        SELECT COUNT({column}), AVG({column})::float8, STDDEV({column})::float8,
+               MIN({column}), MAX({column}),
+               PERCENTILE_CONT(ARRAY[%s, 0.5, %s]::float8[]) WITHIN GROUP (ORDER BY {column})
+        FROM {table} {sample.clause}
+        WHERE {column} IS NOT NULL;
+    """, (lo, hi)
+
+
+def numeric_stats_from_row(row) -> dict:
+    """Turns a numeric_stats_query() row into estimates with confidence intervals."""
+    n, mean, stddev, min_, max_, quantiles = row
+    return {
+        "rows": n,
+        "mean": mean,
+        "mean_ci": mean_ci(mean, stddev, n),
+        "median": quantiles[1] if quantiles else None,
+        "median_ci": (quantiles[0], quantiles[2]) if quantiles else None,
+        "stddev": stddev,
+        "stddev_ci": stddev_ci(stddev, n),
+        "min": min_,  # the sample's extremes only bound the table's
+        "max": max_,
+    }
+
+
+def format_numeric_stats(stats: dict, sample: Sample) -> str:
+    """Renders numeric_stats_from_row() output for the string-returning tools."""
+    return (
+        f"Estimated from a {sample.describe(stats['rows'])}:\n"
+        f"Mean: {stats['mean']:.2f}{format_ci(stats['mean_ci'])}\n"
+        f"Median: {stats['median']:.2f}{format_ci(stats['median_ci'])}\n"
+        f"Std Dev: {stats['stddev']:.2f}{format_ci(stats['stddev_ci'])}\n"
+        f"Min (in sample): {stats['min']:.2f}\n"
+        f"Max (in sample): {stats['max']:.2f}"
+    )
@@ -0,0 +1,179 @@
+# search.py
+
+"""
+Index-aware predicates for search_in_table.
+
+`column::text ILIKE '%value%'` defeats every index, so each search scans
+the whole table. plan_search() instead looks at the indexes the catalog
+snapshot (db_core/catalog.py) lists for the column and picks a predicate
+one of them can answer:
+
+- trigram: a pg_trgm GIN/GiST index (gin_trgm_ops / gist_trgm_ops)
+  answers `column ILIKE '%value%'` itself, so substring search stays;
+- full text: a GIN/GiST index on to_tsvector('<config>', column), or on
+  a tsvector column, answers `... @@ plainto_tsquery('<config>', value)`
+  (whole words);
+- prefix: a btree with text_pattern_ops / varchar_pattern_ops answers
+  `column LIKE 'value%'`;
+- exact: a btree or hash index led by the column answers `column = value`.
+
+In "auto" mode, text columns use the first strategy in that order that
+has an index. Indexed non-text columns and scalar ones (numbers, dates,
+timestamps, uuids) use exact equality; json, arrays and the like keep
+the substring match on their text.
+A search that no index can serve keeps its predicate and falls back to a
+sequential scan; the plan then carries a warning with the index that
+would help. Partial indexes are ignored, since their predicate may not
+cover the search.
+"""
+
+import re
+from collections import namedtuple
+
+SEARCH_MODES = ("auto", "contains", "prefix", "exact", "fulltext")
+
+SearchPlan = namedtuple("SearchPlan", "where params path warning")
+
+_TRGM_OPCLASSES = ("gin_trgm_ops", "gist_trgm_ops")
+_PATTERN_OPCLASSES = ("text_pattern_ops", "varchar_pattern_ops", "bpchar_pattern_ops")
+# Types searched by equality in "auto" mode; other non-text types (json, arrays, ...) by substring of their text.
+_SCALAR_TYPES = (
+    "smallint", "integer", "bigint", "numeric", "real", "double precision", "money",
+    "date", "time", "interval", "uuid", "boolean",
+)
+_TSVECTOR_RE = re.compile(r"to_tsvector\('(?P<config>[^']+)'::regconfig,\s*\(*\"?(?P<column>[^\s\")]+)\"?\)*")
+
+
+def _is_text(data_type: str) -> bool:
+    return data_type in ("text", "citext", "name") or data_type.startswith("character")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _usable(indexes):
+    return [index for index in indexes if not index.partial]
+
+
+def _trigram_index(indexes, column):
+    for index in indexes:
+        for name, opclass in zip(index.columns, index.opclasses):
+            if name == column and opclass in _TRGM_OPCLASSES:
+                return index
+    return None
+
+
+def _fulltext_index(indexes, column, data_type):
+    """(index, text search config or None for a tsvector column) of a full-text index on `column`."""
+    for index in indexes:
+        if index.method not in ("gin", "gist"):
+            continue
+        if data_type == "tsvector" and column in index.columns:
+            return index, None
+        for match in _TSVECTOR_RE.finditer(index.definition):
+            if match.group("column") == column:
+                return index, match.group("config")
+    return None, None
+
+
+def _prefix_index(indexes, column):
+    for index in indexes:
+        if index.method == "btree" and index.columns[:1] == [column] and index.opclasses[0] in _PATTERN_OPCLASSES:
+            return index
+    return None
+
+
+def _equality_index(indexes, column):
+    for index in indexes:
+        if index.method in ("btree", "hash") and index.columns[:1] == [column]:
+            return index
+    return None
+
+
+def plan_search(table_info, column: str, value: str, mode: str = "auto") -> SearchPlan:
+    """
+    The WHERE clause, its parameters and a description of the access path
+    for searching `value` in `column`. `table_info` is the catalog
+    TableInfo of the table, or None when it is not in the snapshot.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+    info = table_info.column(column) if table_info is not None else None
+    data_type = info.data_type if info is not None else "text"
+    text = _is_text(data_type)
+    indexes = _usable(table_info.indexes) if table_info is not None else []
+    name = table_info.qualified_name if table_info is not None else "the table"
+
+    if mode == "auto":
+        if _equality_index(indexes, column) and not text and data_type != "tsvector":
+            mode = "exact"
+        elif data_type.startswith(_SCALAR_TYPES):
+            mode = "exact"
+        elif _trigram_index(indexes, column):
+            mode = "contains"
+        elif _fulltext_index(indexes, column, data_type)[0] or data_type == "tsvector":
+            mode = "fulltext"
+        elif _prefix_index(indexes, column):
+            mode = "prefix"
+        elif _equality_index(indexes, column):
+            mode = "exact"
+        else:
+            mode = "contains"
+
+    if mode == "contains":
+        index = _trigram_index(indexes, column)
+        if index is not None:
+            return SearchPlan(f"{column} ILIKE %s", [f"%{_escape_like(value)}%"], f"trigram index {index.name} (substring match)", None)
+        where = f"{column} ILIKE %s" if text else f"{column}::text ILIKE %s"
+        return SearchPlan(where, [f"%{_escape_like(value)}%"], "sequential scan (substring match)", (
+            f"no index on {name}.{column} supports substring search, so the whole table is scanned. "
+            f"A pg_trgm index would serve it: CREATE INDEX ON {name} USING gin ({column} gin_trgm_ops);"
+        ))
+
+    if mode == "prefix":
+        index = _prefix_index(indexes, column)
+        if index is not None:
+            return SearchPlan(f"{column} LIKE %s", [f"{_escape_like(value)}%"], f"btree index {index.name} (case-sensitive prefix match)", None)
+        index = _trigram_index(indexes, column)
+        if index is not None:
+            return SearchPlan(f"{column} ILIKE %s", [f"{_escape_like(value)}%"], f"trigram index {index.name} (prefix match)", None)
+        where = f"{column} ILIKE %s" if text else f"{column}::text ILIKE %s"
+        return SearchPlan(where, [f"{_escape_like(value)}%"], "sequential scan (prefix match)", (
+            f"no index on {name}.{column} supports prefix search, so the whole table is scanned. "
+            f"CREATE INDEX ON {name} ({column} text_pattern_ops); would serve it."
+        ))
+
+    if mode == "fulltext":
+        index, ts_config = _fulltext_index(indexes, column, data_type)
+        if index is not None:
+            if ts_config is None:
+                return SearchPlan(f"{column} @@ plainto_tsquery(%s)", [value], f"full-text index {index.name} (word match)", None)
+            return SearchPlan(
+                f"to_tsvector('{ts_config}', {column}) @@ plainto_tsquery('{ts_config}', %s)", [value],
+                f"full-text index {index.name} (word match, '{ts_config}' configuration)", None,
+            )
+        if data_type == "tsvector":
+            where = f"{column} @@ plainto_tsquery(%s)"
+        else:
+            where = f"to_tsvector({column}::text) @@ plainto_tsquery(%s)"
+        return SearchPlan(where, [value], "sequential scan (word match)", (
+            f"no full-text index on {name}.{column}, so every row's text is parsed. "
+            f"CREATE INDEX ON {name} USING gin (to_tsvector('simple', {column})); would serve it."
+        ))
+
+    index = _equality_index(indexes, column)
+    if index is not None:
+        return SearchPlan(f"{column} = %s", [value], f"{index.method} index {index.name} (exact match)", None)
+    return SearchPlan(f"{column} = %s", [value], "sequential scan (exact match)", (
+        f"no index on {name}.{column}, so the whole table is scanned. "
+        f"CREATE INDEX ON {name} ({column}); would serve exact matches."
+    ))
+
+
+def format_search_path(plan: SearchPlan) -> str:
+    """The lines that tell the agent how the search ran."""
+    lines = [f"Search path: {plan.path}"]
+    if plan.warning:
+        lines.append(f"Warning: {plan.warning}")
+    return "\n".join(lines)
@@ -0,0 +1,200 @@
+# sql_safety.py
+
+"""
+Parser-based validation of model-written SQL.
+
+check_query() parses a query once (results are cached per fingerprint)
+and classifies it as a row-returning query ("select": SELECT, WITH, VALUES,
+TABLE and set operations), "explain" or "show". It rejects anything that
+is not read-only: several statements, data-modifying CTEs, SELECT INTO,
+FOR UPDATE/SHARE locks, DDL/DML, and functions with side effects outside
+the transaction (pg_terminate_backend, set_config, ...). Unlike the old
+substring blacklist it looks at the parsed statement, so a column named
+created_at is fine.
+
+Parsing uses sqlglot when it is installed (imported on first use, so it
+adds nothing to start-up). Without it a conservative lexical check runs
+instead: comments and quoted text are stripped and whole keywords are
+matched.
+
+bound_rows() caps a row-returning query with an outer LIMIT, tightening an
+existing one only when it is larger, so the database stops producing rows
+past what the tool will show.
+"""
+
+import re
+from collections import namedtuple
+
+from . import config
+from .cache import LRUCache
+from .streaming import query_fingerprint
+
+_sqlglot = None  # the sqlglot module once imported, False when it is not installed
+
+QUERY_KINDS = ("select", "explain", "show")
+
+# Functions that act outside the transaction, so READ ONLY does not stop them.
+BLOCKED_FUNCTIONS = frozenset({
+    "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf", "pg_rotate_logfile",
+    "pg_promote", "pg_switch_wal", "pg_create_restore_point", "set_config",
+    "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "pg_stat_file",
+    "lo_import", "lo_export", "dblink", "dblink_exec", "dblink_connect",
+    "pg_advisory_lock", "pg_advisory_xact_lock", "pg_advisory_lock_shared",
+    "pg_try_advisory_lock", "pg_notify", "txid_current", "pg_current_xact_id",
+})
+
+# Once a statement starts with SELECT/WITH/VALUES/TABLE, these are the only
+# ways it can write: data-modifying CTEs and SELECT INTO (lexical fallback).
+_WRITE_KEYWORDS = ("insert", "update", "delete", "merge", "into")
+
+Statement = namedtuple("Statement", "kind limit tree")  # limit: outer LIMIT literal, or None
+
+_EXPLAIN_PREFIX = re.compile(r"^\s*explain\b((?:\s*\([^()]*\)|\s+(?:analy[sz]e|verbose))*)\s*", re.IGNORECASE)
+_SHOW = re.compile(r"^\s*show\s+(?:all|[a-z_][\w.]*)\s*;?\s*$", re.IGNORECASE)
+_TABLE = re.compile(r"^\s*table\s+(?:only\s+)?[\w.\"]+\s*\*?\s*;?\s*$", re.IGNORECASE)
+_COMMENTS_AND_QUOTES = re.compile(
+    r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$(\w*)\$.*?\$\1\$", re.DOTALL
+)
+_WRITE_RE = re.compile(r"\b(?:" + "|".join(_WRITE_KEYWORDS) + r")\b|\bfor\s+(?:no\s+key\s+)?(?:update|share|key\s+share)\b")
+_FUNCTION_RE = re.compile(r"\b(" + "|".join(sorted(BLOCKED_FUNCTIONS)) + r")\s*\(")
+
+_parsed = LRUCache(config.SQL_PARSE_CACHE_ENTRIES)
+
+
+class UnsafeQuery(ValueError):
+    """Raised for queries that are not a single read-only statement of an allowed kind."""
+
+
+def _strip(query: str) -> str:
+    return _COMMENTS_AND_QUOTES.sub(" ", query).lower()
+
+
+def _check_lexically(query: str):
+    text = _strip(query)
+    if ";" in text.rstrip().rstrip(";"):
+        raise UnsafeQuery("only one statement is allowed")
+    match = _WRITE_RE.search(text)
+    if match:
+        raise UnsafeQuery(f"{match.group(0).upper()} is not allowed in a read-only query")
+    match = _FUNCTION_RE.search(text)
+    if match:
+        raise UnsafeQuery(f"{match.group(1)}() is not allowed")
+    words = text.lstrip(" \t\r\n(").split(None, 1)
+    if not words or words[0] not in ("select", "with", "values", "table"):
+        raise UnsafeQuery("only SELECT, WITH, VALUES and TABLE queries are allowed")
+    return Statement("select", None, None)
+
+
+_WRITE_NODE_NAMES = (
+    "Insert", "Update", "Delete", "Merge", "Create", "Drop", "Alter", "AlterTable",
+    "TruncateTable", "Command", "Into", "Lock", "Set", "Copy", "Grant", "Revoke",
+    "Transaction", "Commit", "Rollback", "Use", "Pragma",
+)
+_write_node_types = ()
+
+
+def _load_sqlglot():
+    """Imports sqlglot on first use; returns None when it is not installed."""
+    global _sqlglot, _write_node_types
+    if _sqlglot is None:
+        try:
+            import sqlglot
+            import sqlglot.errors
+            import sqlglot.expressions
+        except ImportError:  # optional dependency
+            _sqlglot = False
+        else:
+            exp = sqlglot.expressions
+            _write_node_types = tuple(
+                t for t in (getattr(exp, name, None) for name in _WRITE_NODE_NAMES) if t is not None
+            )
+            _sqlglot = sqlglot
+    return _sqlglot or None
+
+
+def _check_with_sqlglot(sqlglot, query: str):
+    exp = sqlglot.expressions
+    try:
+        trees = [t for t in sqlglot.parse(query, read="postgres") if t is not None]
+    except sqlglot.errors.SqlglotError:
+        # PostgreSQL syntax sqlglot does not know; PostgreSQL will judge the syntax.
+        return _check_lexically(query)
+    if len(trees) != 1:
+        raise UnsafeQuery("only one statement is allowed")
+    tree = trees[0]
+    if isinstance(tree, exp.Command):
+        return _check_lexically(query)
+    if not isinstance(tree, (exp.Query, exp.Values)):
+        raise UnsafeQuery(f"{tree.key.upper()} statements are not allowed")
+    write = tree.find(*_write_node_types)
+    if write is not None:
+        what = "SELECT INTO" if isinstance(write, exp.Into) else "FOR UPDATE/SHARE" if isinstance(write, exp.Lock) else write.key.upper()
+        raise UnsafeQuery(f"{what} is not allowed in a read-only query")
+    for func in tree.find_all(exp.Anonymous):
+        if func.name.lower() in BLOCKED_FUNCTIONS:
+            raise UnsafeQuery(f"{func.name}() is not allowed")
+
+    limit = tree.args.get("limit")
+    literal = limit.expression if isinstance(limit, exp.Limit) else None
+    if isinstance(literal, exp.Literal) and not literal.is_string and literal.this.isdigit():
+        return Statement("select", int(literal.this), tree)
+    # No outer LIMIT, or one that is not a plain number (FETCH FIRST, ALL, $1, ...).
+    return Statement("select", None, tree)
+
+
+def _parse(query: str) -> Statement:
+    match = _EXPLAIN_PREFIX.match(query)
+    if match:
+        # EXPLAIN ANALYZE executes its statement, so the statement must be read-only too.
+        inner = _parse(query[match.end():])
+        if inner.kind != "select":
+            raise UnsafeQuery("EXPLAIN is only allowed for read-only queries")
+        return Statement("explain", None, inner.tree)
+    if _SHOW.match(query):
+        return Statement("show", None, None)
+    sqlglot = None if _TABLE.match(query) else _load_sqlglot()
+    if sqlglot is None:
+        return _check_lexically(query)
+    return _check_with_sqlglot(sqlglot, query)
+
+
+def check_query(query: str, allowed=("select",)) -> Statement:
+    """
+    Parses and validates `query`, returning its Statement. Raises UnsafeQuery
+    when it is not one read-only statement whose kind is in `allowed`.
+    """
+    if not query or not query.strip():
+        raise UnsafeQuery("the query is empty")
+    key = query_fingerprint(query)
+    statement = _parsed.get(key)
+    if statement is None:
+        try:
+            statement = _parse(query)
+        except UnsafeQuery as e:
+            statement = str(e)  # rejections are cached as their message
+        _parsed.set(key, statement)
+    if isinstance(statement, str):
+        raise UnsafeQuery(statement)
+    if statement.kind not in allowed:
+        raise UnsafeQuery(f"{statement.kind.upper()} is not allowed here; use one of: {', '.join(k.upper() for k in allowed)}")
+    return statement
+
+
+def with_limit(query: str, limit: int) -> str:
+    """Wraps a row-returning query so at most `limit` rows come back."""
+    # Newlines keep a trailing line comment from swallowing the closing parenthesis;
+    # PostgreSQL keeps a subquery's ORDER BY when the outer query only limits it.
+    return f"SELECT * FROM (\n{query.strip().rstrip(';')}\n) AS bounded LIMIT {int(limit)}"
+
+
+def bound_rows(query: str, statement: Statement, limit: int) -> str:
+    """`query` with an outer LIMIT of at most `limit` rows (unchanged if it already has one that small)."""
+    if statement.kind != "select" or (statement.limit is not None and statement.limit <= limit):
+        return query
+    return with_limit(query, limit)
+
+
+def begin_read_only(conn):
+    """Makes the current transaction of `conn` read-only, so writes fail in the server too."""
+    with conn.cursor() as cursor:
+        cursor.execute("SET TRANSACTION READ ONLY;")
@@ -0,0 +1,153 @@
+# streaming.py
+
+"""
+Bounded, streaming query execution.
+
+SELECT-like statements run through a named (server-side) cursor and are
+fetched in fetchmany() batches, so the agent never holds more than one
+batch beyond the row/byte budget in memory. When a budget is hit the
+result carries a continuation token; passing it back re-runs the query
+and skips straight to the next row on the server with MOVE.
+"""
+
+import base64
+import hashlib
+import json
+import uuid
+
+from . import config
+
+# Statements that PostgreSQL accepts in DECLARE ... CURSOR FOR.
+_CURSOR_STATEMENTS = ("select", "with", "values", "table")
+
+
+class InvalidContinuationToken(ValueError):
+    """Raised when a continuation token is malformed or belongs to another query."""
+
+
+class StreamResult:
+    """Rows fetched within the budget, plus enough state to resume."""
+
+    def __init__(self, columns, rows, byte_count, offset, truncated, truncated_by, query):
+        self.columns = columns
+        self.rows = rows
+        self.byte_count = byte_count
+        self.offset = offset
+        self.truncated = truncated
+        self.truncated_by = truncated_by  # "rows", "bytes" or None
+        self._query = query
+        self.notice = ""  # set by callers that changed the query (e.g. the cost guard)
+
+    @property
+    def next_offset(self) -> int:
+        return self.offset + len(self.rows)
+
+    @property
+    def continuation_token(self):
+        if not self.truncated:
+            return None
+        return encode_continuation_token(self._query, self.next_offset)
+
+    def summary(self) -> str:
+        """One-line truncation notice, or an empty string when the result is complete."""
+        if not self.truncated:
+            return ""
+        return (
+            f"... truncated after {len(self.rows)} rows / {self.byte_count} bytes "
+            f"(row {self.offset + 1} to {self.next_offset}, {self.truncated_by} budget reached). "
+            f"Pass continuation_token='{self.continuation_token}' to fetch the next rows."
+        )
+
+
+def query_fingerprint(query: str) -> str:
+    """Stable short hash of a query with whitespace and trailing semicolons normalized."""
+    normalized = " ".join(query.split()).rstrip(";").strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_continuation_token(query: str, offset: int) -> str:
+    payload = json.dumps({"q": query_fingerprint(query), "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_continuation_token(token: str, query: str) -> int:
+    """Returns the row offset stored in `token`, checking it was issued for `query`."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(payload["o"])
+        fingerprint = payload["q"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidContinuationToken("Invalid continuation token.") from e
+    if fingerprint != query_fingerprint(query) or offset < 0:
+        raise InvalidContinuationToken("Continuation token does not match this query.")
+    return offset
+
+
+def _row_size(row) -> int:
+    # Size of the row as the tools render it: cells joined by " | " plus a newline.
+    return sum(len(str(item)) for item in row) + 3 * max(len(row) - 1, 0) + 1
+
+
+def is_cursor_statement(query: str) -> bool:
+    """True for statements that return rows and can run in a cursor (SELECT, WITH, VALUES, TABLE)."""
+    words = query.lstrip(" \t\r\n(").split(None, 1)
+    return bool(words) and words[0].lower() in _CURSOR_STATEMENTS
+
+
+def stream_query(
+    conn,
+    query: str,
+    params=None,
+    continuation_token: str = None,
+    max_rows: int = config.STREAM_MAX_ROWS,
+    max_bytes: int = config.STREAM_MAX_BYTES,
+    batch_size: int = config.STREAM_BATCH_SIZE,
+    token_query: str = None,
+) -> StreamResult:
+    """
+    Executes `query` on `conn` and fetches rows until the row or byte budget
+    is reached. Returns a StreamResult; `columns` is None when the statement
+    produced no result set. Continuation tokens refer to `token_query` when
+    given (the caller's original SQL, when `query` is a rewrite of it).
+    """
+    token_query = token_query or query
+    offset = decode_continuation_token(continuation_token, token_query) if continuation_token else 0
+    server_side = is_cursor_statement(query)
+
+    if server_side:
+        cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+    else:
+        cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        if offset:
+            if server_side:
+                cursor.scroll(offset)  # MOVE FORWARD on the server, no rows transferred
+            else:
+                cursor.fetchmany(offset)
+
+        # A named cursor only knows its description after the first fetch.
+        batch = cursor.fetchmany(batch_size) if (server_side or cursor.description) else []
+        if not cursor.description:
+            return StreamResult(None, [], 0, offset, False, None, token_query)
+        columns = [desc[0] for desc in cursor.description]
+
+        rows, byte_count, truncated_by = [], 0, None
+        while batch and truncated_by is None:
+            for row in batch:
+                size = _row_size(row)
+                if len(rows) >= max_rows:
+                    truncated_by = "rows"
+                    break
+                if rows and byte_count + size > max_bytes:
+                    truncated_by = "bytes"
+                    break
+                rows.append(row)
+                byte_count += size
+            else:
+                batch = cursor.fetchmany(batch_size)
+        return StreamResult(columns, rows, byte_count, offset, truncated_by is not None, truncated_by, token_query)
+    finally:
+        cursor.close()
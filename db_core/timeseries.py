@@ -0,0 +1,186 @@
+# timeseries.py
+
+"""
+Multi-granularity, multi-aggregate time-series summaries in one scan.
+
+summarize() buckets a value column by several granularities at once
+(e.g. day, week and month) and computes several aggregates per bucket
+(avg, sum, count, min, max, stddev, median, p90, ...). The granularities
+are GROUPING SETS of a single GROUP BY, so the table is read once however
+many views are requested. With fill_gaps, each granularity's buckets are
+completed with generate_series between its first and last bucket; empty
+buckets report count 0 and NULL for the other aggregates.
+
+Timestamps with time zone are bucketed in `timezone` (the session time
+zone when empty), so a "day" is a local calendar day. Dates and
+timestamps without time zone are bucketed as stored.
+
+The result is one JSON-ready payload with a series per granularity,
+in columnar form: {"bucket": [...], "avg": [...], ...}.
+"""
+
+import json
+import re
+from decimal import Decimal
+
+from . import config
+from .catalog import get_catalog
+
+# granularity -> generate_series step between consecutive buckets
+GRANULARITY_STEPS = {
+    "hour": "1 hour",
+    "day": "1 day",
+    "week": "1 week",
+    "month": "1 month",
+    "quarter": "3 months",
+    "year": "1 year",
+}
+GRANULARITIES = tuple(GRANULARITY_STEPS)
+
+_AGGREGATES = {
+    "avg": "AVG(v)",
+    "sum": "SUM(v)",
+    "count": "COUNT(v)",
+    "min": "MIN(v)",
+    "max": "MAX(v)",
+    "stddev": "STDDEV(v)",
+    "median": "PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY v)",
+}
+AGGREGATES = tuple(_AGGREGATES)  # plus percentiles pNN, NN in 1-99
+_PERCENTILE_RE = re.compile(r"^p([1-9][0-9]?)$")
+
+
+def _aggregate_sql(name: str) -> str:
+    match = _PERCENTILE_RE.match(name)
+    if match:
+        return f"PERCENTILE_CONT({int(match.group(1)) / 100}) WITHIN GROUP (ORDER BY v)"
+    return _AGGREGATES[name]
+
+
+def parse_list(text: str, allowed, what: str) -> list:
+    """Comma-separated, case-insensitive names, de-duplicated in order; ValueError on unknown names."""
+    names = list(dict.fromkeys(name.strip().lower() for name in text.split(",") if name.strip()))
+    if not names:
+        raise ValueError(f"at least one {what} is required")
+    percentiles = what == "aggregate"
+    unknown = [name for name in names if name not in allowed and not (percentiles and _PERCENTILE_RE.match(name))]
+    if unknown:
+        choices = ", ".join(allowed) + (" or pNN (1–99)" if percentiles else "")
+        raise ValueError(f"unknown {what}(s) {', '.join(unknown)}; use {choices}")
+    return names
+
+
+def _local_time(db_config: dict, table: str, date_column: str, timezone: str):
+    """(SQL expression giving a timestamp without time zone, time zone applied or None)."""
+    info = get_catalog(db_config).snapshot().find(table)
+    column = info.column(date_column) if info is not None else None
+    if column is not None and column.data_type == "timestamp with time zone":
+        if timezone:
+            return f"{date_column} AT TIME ZONE %(timezone)s", timezone
+        return f"{date_column} AT TIME ZONE current_setting('TimeZone')", "session"
+    return f"({date_column})::timestamp", None
+
+
+def summary_sql(table: str, local_time: str, agg_column: str, granularities, aggregates, fill_gaps: bool) -> str:
+    """One GROUPING SETS query returning (level, bucket, aggregate...) ordered by level and bucket."""
+    levels = range(len(granularities))
+    buckets = ", ".join(f"DATE_TRUNC('{g}', t) AS b_{i}" for i, g in enumerate(granularities))
+    level = " ".join(f"WHEN GROUPING(b_{i}) = 0 THEN {i}" for i in levels)
+    values = ", ".join(f"{_aggregate_sql(name)} AS a_{j}" for j, name in enumerate(aggregates))
+    columns = ", ".join(f"a_{j}" for j in range(len(aggregates)))
+    sql = f"""
+        WITH agg AS (
+            SELECT CASE {level} END AS level,
+                   COALESCE({", ".join(f"b_{i}" for i in levels)}) AS bucket,
+                   {values}
+            FROM (
+                SELECT {buckets}, v
+                FROM (
+                    SELECT {local_time} AS t, {agg_column} AS v
+                    FROM {table}
+                    WHERE {agg_column} IS NOT NULL
+                ) AS points
+                WHERE t IS NOT NULL
+            ) AS bucketed
+            GROUP BY GROUPING SETS ({", ".join(f"(b_{i})" for i in levels)})
+        )
+    """
+    if not fill_gaps:
+        return sql + f"SELECT level, bucket, {columns} FROM agg ORDER BY level, bucket;"
+    steps = ", ".join(f"({i}, INTERVAL '{GRANULARITY_STEPS[g]}')" for i, g in enumerate(granularities))
+    # At most TIMESERIES_SUMMARY_MAX_BUCKETS + 1 buckets are generated (one extra, so
+    # summarize() can tell the series was cut), so an hourly series over years cannot
+    # expand into millions of empty rows.
+    return sql + f"""
+        , spans AS (SELECT level, MIN(bucket) AS lo, MAX(bucket) AS hi FROM agg GROUP BY level)
+        , steps (level, step) AS (VALUES {steps})
+        SELECT spans.level, series.bucket, {", ".join(f"agg.a_{j}" for j in range(len(aggregates)))}
+        FROM spans
+        JOIN steps USING (level)
+        CROSS JOIN LATERAL generate_series(
+            GREATEST(spans.lo, spans.hi - steps.step * {config.TIMESERIES_SUMMARY_MAX_BUCKETS}),
+            spans.hi, steps.step
+        ) AS series (bucket)
+        LEFT JOIN agg ON agg.level = spans.level AND agg.bucket = series.bucket
+        ORDER BY 1, 2;
+    """
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        value = int(value) if value == value.to_integral_value() else float(value)
+    # Six significant digits are plenty for a summary and keep long series compact.
+    return float(f"{value:.6g}") if isinstance(value, float) else value
+
+
+def summarize(cursor, db_config: dict, table: str, date_column: str, agg_column: str,
+              granularities, aggregates, fill_gaps: bool = False, timezone: str = "") -> dict:
+    """
+    Runs the summary on `cursor` and returns the payload: the request, then
+    "series" with one columnar {"bucket", <aggregate>...} per granularity.
+    Each series keeps its newest TIMESERIES_SUMMARY_MAX_BUCKETS buckets.
+    """
+    local_time, applied_zone = _local_time(db_config, table, date_column, timezone)
+    cursor.execute(
+        summary_sql(table, local_time, agg_column, granularities, aggregates, fill_gaps),
+        {"timezone": timezone},
+    )
+    rows = cursor.fetchall()
+
+    series = {g: {"bucket": [], **{name: [] for name in aggregates}} for g in granularities}
+    for level, bucket, *values in rows:
+        columns = series[granularities[level]]
+        columns["bucket"].append(
+            bucket.isoformat(timespec="minutes") if granularities[level] == "hour" else bucket.date().isoformat()
+        )
+        for name, value in zip(aggregates, values):
+            columns[name].append(0 if value is None and name == "count" else _json_value(value))
+
+    truncated = []
+    for g, columns in series.items():
+        if len(columns["bucket"]) > config.TIMESERIES_SUMMARY_MAX_BUCKETS:
+            truncated.append(g)
+            for name in columns:
+                columns[name] = columns[name][-config.TIMESERIES_SUMMARY_MAX_BUCKETS:]
+    payload = {
+        "table": table,
+        "date_column": date_column,
+        "value_column": agg_column,
+        "granularities": list(granularities),
+        "aggregates": list(aggregates),
+        "timezone": applied_zone,
+        "gaps_filled": fill_gaps,
+        "series": series,
+    }
+    if timezone and applied_zone is None:
+        payload["note"] = f"{date_column} has no time zone; timezone {timezone!r} was not applied."
+    if truncated:
+        payload["truncated"] = {
+            g: f"only the newest {config.TIMESERIES_SUMMARY_MAX_BUCKETS} buckets are shown" for g in truncated
+        }
+    return payload
+
+
+def format_summary(payload: dict) -> str:
+    """The payload as compact JSON."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
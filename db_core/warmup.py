@@ -0,0 +1,60 @@
+# warmup.py
+
+"""
+Optional start-up warm-up for the agents.
+
+The agents import their heavy dependencies (openai, matplotlib, sqlglot)
+on first use, and open connections and load the catalog snapshot lazily.
+That keeps start-up fast, but moves the cost onto the first tool call.
+warm_up() pays it ahead of time: it pre-opens pool connections, loads the
+catalog snapshot used by the schema tools, and imports the given modules.
+With WARMUP_ENABLED the agent packages run it on a daemon thread at import
+(start_warm_up), so the agent is usable immediately and the first call
+finds everything ready.
+"""
+
+import importlib
+import threading
+import time
+
+from . import config
+from .catalog import get_catalog
+from .pool import get_pool
+
+last_report = None  # report of the most recent warm_up() run
+
+
+def warm_up(db_config: dict, connections: int = None, catalog: bool = True, modules=()) -> dict:
+    """
+    Pre-opens up to `connections` pooled connections (default
+    WARMUP_CONNECTIONS, else POOL_MIN_SIZE), loads the catalog snapshot and
+    imports `modules`. Failures are collected in the returned report instead
+    of raised, so a database that is still starting never breaks the agent.
+    """
+    global last_report
+    started = time.perf_counter()
+    report = {"connections_opened": 0, "tables": None, "modules": [], "errors": []}
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            report["modules"].append(name)
+        except ImportError as e:
+            report["errors"].append(f"import {name}: {e}")
+    try:
+        report["connections_opened"] = get_pool(db_config).fill(connections or config.WARMUP_CONNECTIONS)
+        if catalog:
+            report["tables"] = len(get_catalog(db_config).snapshot().tables())
+    except Exception as e:
+        report["errors"].append(f"database: {type(e).__name__}: {e}")
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    last_report = report
+    return report
+
+
+def start_warm_up(db_config: dict, connections: int = None, catalog: bool = True, modules=()) -> threading.Thread:
+    """Runs warm_up() on a daemon thread and returns the thread."""
+    thread = threading.Thread(
+        target=warm_up, args=(db_config, connections, catalog, tuple(modules)), name="db-warm-up", daemon=True
+    )
+    thread.start()
+    return thread
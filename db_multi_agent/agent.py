@@ -1,5 +1,10 @@
 from google.adk.agents import LlmAgent
+from db_config import DB_CONFIG
+from db_core import config as core_config
+from db_core.aio import to_async_tools
+from db_core.warmup import start_warm_up
 from .prompt import router_instruction
+from .tools.parallel_tools import run_parallel
 
 # Import sub-agents
 from .sub_agents.analysis_agent.agent import analysis_agent
@@ -17,9 +22,15 @@ root_agent = LlmAgent(
         schema_agent,
         analysis_agent,
         visual_agent
-    ]
+    ],
+    # Independent lookups across sub-agents run concurrently in one step.
+    tools=to_async_tools([run_parallel]),
 )
 
+if core_config.WARMUP_ENABLED:
+    # Pre-open connections, load the catalog and import the plotting/parsing modules in the background.
+    start_warm_up(DB_CONFIG, modules=("sqlglot", "matplotlib.figure", "matplotlib.backends.backend_agg"))
+
 # Optional: function to retrieve agent
 def create_agent():
     return root_agent
@@ -1,11 +1,12 @@
 from google.adk import Agent
+from db_core.aio import to_async_tools
 from .prompt import instruction
-from .tools.analysis_tools import compute_statistics,compute_correlation
+from .tools.analysis_tools import compute_statistics,compute_correlation,profile_table,correlation_matrix,describe_result
 
 analysis_agent = Agent(
     name="analysis_agent",
     model="gemini-2.0-flash",
     instruction=instruction,
-    tools=[compute_statistics, compute_correlation]
+    tools=to_async_tools([compute_statistics, compute_correlation, profile_table, correlation_matrix, describe_result])
 )
 
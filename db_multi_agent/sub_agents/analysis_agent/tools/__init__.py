@@ -1,9 +1,15 @@
 from .analysis_tools import (
     compute_statistics,
     compute_correlation,
+    profile_table,
+    correlation_matrix,
+    describe_result,
 )
 
 __all__ = [
     "compute_statistics",
     "compute_correlation",
+    "profile_table",
+    "correlation_matrix",
+    "describe_result",
 ]
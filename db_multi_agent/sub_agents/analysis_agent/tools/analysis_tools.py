@@ -1,8 +1,38 @@
-import psycopg2
 from db_config import DB_CONFIG
+from db_core.bulk import BulkExportError, get_handle, handle_columns
+from db_core.catalog import get_catalog
+from db_core.pool import get_connection
+from db_core.sampling import resolve_sample, numeric_stats_query, numeric_stats_from_row, correlation_ci
+from db_core.profiling import (
+    parse_names, parse_quantiles, profile_table as profile_columns,
+    correlation_matrix as compute_correlation_matrix,
+)
 
-def compute_statistics(table: str, column: str):
-    with psycopg2.connect(**DB_CONFIG) as conn:
+
+def _get_db_connection():
+    """Check out a pooled PostgreSQL database connection."""
+    return get_connection(DB_CONFIG)
+
+
+def compute_statistics(table: str, column: str, sample: str = ""):
+    """
+    Mean, min, max and stddev of a column. `sample` ("5%", or a row count such
+    as "100000", optionally plus " bernoulli") estimates them from a
+    TABLESAMPLE instead, adding 95% confidence intervals.
+    """
+    try:
+        spec = resolve_sample(DB_CONFIG, table, sample)
+    except ValueError as e:
+        return {"error": str(e)}
+    if spec is not None:
+        query, params = numeric_stats_query(table, column, spec)
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                stats = numeric_stats_from_row(cur.fetchone())
+        stats["sample"] = spec.describe(stats.pop("rows"))
+        return stats
+    with _get_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(f"""
                 SELECT 
@@ -20,10 +50,94 @@ def compute_statistics(table: str, column: str):
                 "stddev": stddev
             }
 
-def compute_correlation(table: str, col1: str, col2: str):
-    with psycopg2.connect(**DB_CONFIG) as conn:
+def compute_correlation(table: str, col1: str, col2: str, sample: str = ""):
+    """
+    Pearson correlation of two columns. With `sample` it is estimated from a
+    TABLESAMPLE and returned with a 95% Fisher-z confidence interval.
+    """
+    try:
+        spec = resolve_sample(DB_CONFIG, table, sample)
+    except ValueError as e:
+        return {"error": str(e)}
+    with _get_db_connection() as conn:
         with conn.cursor() as cur:
+            if spec is None:
+                cur.execute(f"""
+                    SELECT CORR({col1}, {col2}) FROM {table};
+                """)
+                return {"correlation": cur.fetchone()[0]}
             cur.execute(f"""
-                SELECT CORR({col1}, {col2}) FROM {table};
+                SELECT CORR({col1}, {col2}), COUNT({col1} + {col2}) FROM {table} {spec.clause};
             """)
-            return {"correlation": cur.fetchone()[0]}
+            corr, n = cur.fetchone()
+            return {"correlation": corr, "correlation_ci": correlation_ci(corr, n), "sample": spec.describe(n)}
+
+
+def profile_table(table: str, columns: str = "", quantiles: str = "0.25,0.5,0.75"):
+    """
+    Profiles many columns in one scan: null fraction and approximate distinct
+    count for every column, plus mean, stddev, min, max and quantiles for
+    numeric columns. `columns` is an optional comma-separated subset.
+    """
+    table_info = get_catalog(DB_CONFIG).snapshot().find(table)
+    if table_info is None:
+        return {"error": f"Table '{table}' does not exist."}
+    try:
+        names, qs = parse_names(columns), parse_quantiles(quantiles)
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                return profile_columns(cur, table_info, names, qs)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def correlation_matrix(table: str, columns: str = "", method: str = "pearson"):
+    """
+    Computes all pairwise Pearson (or Spearman) correlations among numeric
+    columns in one scan. `columns` is an optional comma-separated subset.
+    """
+    table_info = get_catalog(DB_CONFIG).snapshot().find(table)
+    if table_info is None:
+        return {"error": f"Table '{table}' does not exist."}
+    try:
+        names = parse_names(columns)
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                return compute_correlation_matrix(cur, table_info, names, method.lower())
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def describe_result(handle: str, columns: str = ""):
+    """
+    Summarizes the columns of a result handle from export_query_result,
+    computed on its Arrow columns without querying again: null count for
+    every column, mean, stddev, min and max for numeric and time columns,
+    and distinct count with the 5 most frequent values for the others.
+    `columns` is an optional comma-separated subset.
+    """
+    try:
+        result = get_handle(handle)
+        table = handle_columns(result, columns)
+    except BulkExportError as e:
+        return {"error": str(e)}
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    summary = {"handle": result.id, "rows": table.num_rows, "truncated": result.truncated, "columns": {}}
+    for name, column in zip(table.column_names, table.columns):
+        stats = {"type": str(column.type), "nulls": column.null_count}
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            min_max = pc.min_max(column).as_py()
+            stats.update(min_max, mean=pc.mean(column).as_py(), stddev=pc.stddev(column).as_py())
+        elif pa.types.is_temporal(column.type):
+            min_max = pc.min_max(column).as_py()
+            stats.update({key: value.isoformat() if value is not None else None for key, value in min_max.items()})
+        else:
+            counts = pc.value_counts(pc.drop_null(column))
+            counts = pa.table({"value": counts.field("values"), "count": counts.field("counts")})
+            stats["distinct"] = counts.num_rows
+            top = counts.sort_by([("count", "descending")]).slice(0, 5)
+            stats["top"] = [(str(row["value"]), row["count"]) for row in top.to_pylist()]
+        summary["columns"][name] = stats
+    return summary
@@ -3,6 +3,7 @@ Query Agent
 
 This agent handles data-focused query tasks such as:
 - Running SELECT queries
+- Bulk-extracting large results into Arrow result handles
 - Performing search/filter in tables
 - Getting row counts and summaries
 - Time series and correlation analysis
@@ -12,10 +13,12 @@ Used as a sub-agent in a multi-agent ADK database assistant.
 """
 
 from google.adk import Agent
+from db_core.aio import to_async_tools
 from .prompt import instruction
 from .tools.query_tools import (
     run_query,
     run_custom_sql,
+    export_query_result,
     search_in_table,
     count_rows,
     top_k_column_values,
@@ -29,9 +32,10 @@ query_agent = Agent(
     name="query_agent",
     model="gemini-2.0-flash",
     instruction=instruction,
-    tools=[
+    tools=to_async_tools([
         run_query,
         run_custom_sql,
+        export_query_result,
         search_in_table,
         count_rows,
         top_k_column_values,
@@ -39,5 +43,5 @@ query_agent = Agent(
         time_series_summary,
         compute_correlation,
         get_latest_entries_from_table
-    ],
+    ]),
 )
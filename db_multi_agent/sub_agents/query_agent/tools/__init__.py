@@ -8,6 +8,7 @@ exploratory data analysis, and search on a PostgreSQL database.
 from .query_tools import (
     run_query,
     run_custom_sql,
+    export_query_result,
     search_in_table,
     count_rows,
     top_k_column_values,
@@ -20,6 +21,7 @@ from .query_tools import (
 __all__ = [
     "run_query",
     "run_custom_sql",
+    "export_query_result",
     "search_in_table",
     "count_rows",
     "top_k_column_values",
@@ -7,164 +7,337 @@ time series, and safe custom query execution.
 """
 
 from db_config import DB_CONFIG
+from db_core.bulk import BulkExportError, describe_handle, export_query
+from db_core.catalog import get_catalog
+from db_core.cost_guard import CostGuardError, run_guarded, statement_timeout
+from db_core.estimates import COUNT_MODES, choose_count_estimate
+from db_core.formatting import OUTPUT_FORMATS, format_table, format_structured
+from db_core.heavy_hitters import TOPK_MODES, approximate_top_k, format_top_k
+from db_core.pool import get_connection
+from db_core.prepared import execute_prepared
+from db_core.result_cache import cached_query
+from db_core.search import format_search_path, plan_search
+from db_core.rollups import rollup_series
+from db_core.sampling import (
+    resolve_sample, numeric_stats_query, numeric_stats_from_row, format_numeric_stats,
+    mean_ci, correlation_ci, format_ci,
+)
+from db_core.sql_safety import QUERY_KINDS, UnsafeQuery, begin_read_only, check_query
+from db_core.streaming import InvalidContinuationToken
+from db_core.timeseries import AGGREGATES, GRANULARITIES, format_summary, parse_list, summarize
 import psycopg2
 
 
 def _get_db_connection():
-    """Establish and return a connection to the PostgreSQL database."""
-    return psycopg2.connect(**DB_CONFIG)
+    """Check out a pooled connection to the PostgreSQL database."""
+    return get_connection(DB_CONFIG)
 
 
-def run_query(query: str) -> str:
-    """Executes a SELECT-only SQL query and returns formatted results."""
-    if not query.strip().lower().startswith("select"):
-        return "Only SELECT queries are allowed."
-    try:
+def _cached_fetch(tool: str, query: str, params, fetch):
+    """Execute a read query and return fetch(cursor) through the shared result cache."""
+    def run():
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                column_names = [desc[0] for desc in cursor.description]
-        if not rows:
+                execute_prepared(cursor, query, params, prefix="SET TRANSACTION READ ONLY; ")
+                return fetch(cursor)
+    return cached_query(tool, DB_CONFIG, query, params, run)
+
+
+def _format_stream_result(result, output_format: str = "text") -> str:
+    """Render a StreamResult as a compact table or as JSON records/columns."""
+    if output_format != "text":
+        return format_structured(
+            result.columns, result.rows, output_format,
+            truncated=result.truncated or None, continuation_token=result.continuation_token,
+            notice=result.notice or None,
+        )
+    # No head/tail elision: the continuation token resumes after the last row fetched,
+    # so every row of the page must be shown (the page is already bounded by the stream budget).
+    return format_table(
+        result.columns, result.rows, footer="\n".join(filter(None, (result.summary(), result.notice))),
+        head=None, tail=None,
+    )
+
+
+def run_query(query: str, continuation_token: str = "", output_format: str = "text") -> str:
+    """
+    Executes a read-only SELECT query and returns formatted results.
+    It runs in a read-only transaction with an outer LIMIT added at the
+    database when it has none. Rows are streamed and capped at the configured row/byte budget; pass the
+    returned continuation_token to fetch the next rows.
+    output_format: "text" (compact table), or "records" / "columnar" for JSON.
+    """
+    try:
+        statement = check_query(query, ("select",))
+    except UnsafeQuery as e:
+        return f"Only read-only SELECT queries are allowed: {e}."
+    if output_format not in OUTPUT_FORMATS:
+        return f"Invalid output_format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}."
+
+    def execute():
+        with _get_db_connection() as conn:
+            return run_guarded(conn, DB_CONFIG, "run_query", query, statement, continuation_token or None)
+
+    try:
+        result = cached_query("run_query", DB_CONFIG, query, continuation_token, execute)
+        if not result.rows:
             return "Query returned no results."
-        output = [" | ".join(column_names), "-|-".join(["-" * len(c) for c in column_names])]
-        output += [" | ".join(map(str, row)) for row in rows]
-        return "\n".join(output)
+        return _format_stream_result(result, output_format)
+    except (InvalidContinuationToken, CostGuardError) as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def run_custom_sql(query: str) -> str:
+def run_custom_sql(query: str, continuation_token: str = "", output_format: str = "text") -> str:
     """
-    Executes a safe custom SQL query (e.g., EXPLAIN or SHOW) after filtering
-    out dangerous keywords. Returns formatted results.
+    Executes a safe custom SQL query (SELECT, EXPLAIN of a read-only query, or
+    SHOW) after parsing it to make sure it cannot write. Returns formatted results, capped at the configured
+    row/byte budget; pass the returned continuation_token to fetch the next rows.
+    output_format: "text" (compact table), or "records" / "columnar" for JSON.
     """
-    forbidden = ["insert", "update", "delete", "drop", "alter", "create", "truncate"]
-    if any(word in query.lower() for word in forbidden):
-        return "Destructive queries are not allowed."
+    if output_format not in OUTPUT_FORMATS:
+        return f"Invalid output_format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}."
+    try:
+        statement = check_query(query, QUERY_KINDS)
+    except UnsafeQuery as e:
+        return f"Destructive queries are not allowed: {e}."
     try:
         with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                column_names = [desc[0] for desc in cursor.description]
-        output = [" | ".join(column_names), "-|-".join(["-" * len(c) for c in column_names])]
-        output += [" | ".join(map(str, row)) for row in rows]
-        return "\n".join(output)
+            result = run_guarded(conn, DB_CONFIG, "run_custom_sql", query, statement, continuation_token or None)
+        if result.columns is None:
+            return "Query executed successfully. No results returned."
+        return _format_stream_result(result, output_format)
+    except (InvalidContinuationToken, CostGuardError) as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Database error: {str(e)}"
+
+
+def export_query_result(query: str, persist_parquet: bool = False) -> str:
+    """
+    Extracts the full result of a read-only SELECT in bulk (COPY into Arrow
+    columns) and returns a result handle with its columns instead of rows.
+    Use it when analysis or plots need many raw rows: pass the handle to
+    describe_result or plot_result, which read the extracted columns without
+    querying again. Set persist_parquet to also save it as a Parquet file.
+    """
+    try:
+        check_query(query, ("select",))
+    except UnsafeQuery as e:
+        return f"Only read-only SELECT queries are allowed: {e}."
+    try:
+        with _get_db_connection() as conn:
+            begin_read_only(conn)
+            with statement_timeout(conn, "export_query_result"):
+                handle = export_query(conn, query, persist=persist_parquet)
+        return describe_handle(handle)
+    except (BulkExportError, CostGuardError) as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def search_in_table(table: str, column: str, value: str) -> str:
-    """Searches for a value in a specific column of a table (ILIKE match)."""
+def search_in_table(table: str, column: str, value: str, mode: str = "auto") -> str:
+    """
+    Searches for a value in a specific column of a table, using an index when one fits.
+    mode: "contains" (substring, ILIKE), "prefix", "exact" or "fulltext" (whole
+    words); "auto" (default) picks what the column's indexes support: trigram
+    substring, full-text, prefix, then exact match. Text columns without such
+    an index get a substring scan; other columns an exact match. The output
+    names the path used and warns when the search scans the whole table.
+    """
     try:
+        plan = plan_search(get_catalog(DB_CONFIG).snapshot().find(table), column, value, (mode or "auto").lower())
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                query = f"SELECT * FROM {table} WHERE {column}::text ILIKE %s LIMIT 10;"
-                cursor.execute(query, (f"%{value}%",))
+                query = f"SELECT * FROM {table} WHERE {plan.where} LIMIT 10;"
+                cursor.execute(query, plan.params)
                 rows = cursor.fetchall()
                 column_names = [desc[0] for desc in cursor.description]
         if not rows:
-            return f"No matches found for {value} in {table}.{column}"
-        output = [" | ".join(column_names), "-|-".join(["-" * len(c) for c in column_names])]
-        output += [" | ".join(map(str, row)) for row in rows]
-        return "\n".join(output)
+            return f"No matches found for {value} in {table}.{column}\n{format_search_path(plan)}"
+        return f"{format_search_path(plan)}\n{format_table(column_names, rows)}"
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except psycopg2.DataError as e:
+        return f"No matches found for {value} in {table}.{column}: not a valid value for the column ({str(e).strip()})"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def count_rows(table: str) -> str:
-    """Counts and returns the total number of rows in a given table."""
+def count_rows(table: str, mode: str = "auto", where: str = "") -> str:
+    """
+    Counts the rows in a table, optionally only those matching a WHERE condition.
+    mode "exact" scans with COUNT(*), "approximate" uses planner statistics, and
+    "auto" (default) approximates only very large tables.
+    """
+    mode = (mode or "auto").lower()
+    if mode not in COUNT_MODES:
+        return f"Invalid mode '{mode}'. Use one of: {', '.join(COUNT_MODES)}."
+    if ";" in where:
+        return "The where condition must not contain ';'."
+    matching = f" matching {where}" if where else ""
     try:
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(f"SELECT COUNT(*) FROM {table};")
-                count = cursor.fetchone()[0]
-        return f"{table} contains {count} rows."
+                cursor.execute("SET TRANSACTION READ ONLY;")
+                estimate = choose_count_estimate(cursor, table, where, mode)
+        if estimate is not None:
+            return f"{table} contains approximately {estimate.rows:,} rows{matching} (estimate from {estimate.source})."
+        query = f"SELECT COUNT(*) FROM {table}" + (f" WHERE {where}" if where else "") + ";"
+        count = _cached_fetch("count_rows", query, None, lambda cur: cur.fetchone()[0])
+        return f"{table} contains {count} rows{matching}."
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def top_k_column_values(table: str, column: str, k: int = 5) -> str:
-    """Returns the top-k most frequent values in a column."""
+def top_k_column_values(table: str, column: str, k: int = 5, mode: str = "auto") -> str:
+    """
+    Returns the top-k most frequent values in a column.
+    mode: "exact", "approximate" (pg_stats or a sampled sketch, with error
+    bounds) or "auto" (approximate only very large tables).
+    """
+    mode = (mode or "auto").lower()
+    if mode not in TOPK_MODES:
+        return f"Error: mode must be one of {', '.join(TOPK_MODES)}."
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(f"""
-                    SELECT {column}::text, COUNT(*) as freq
-                    FROM {table}
-                    WHERE {column} IS NOT NULL
-                    GROUP BY {column}
-                    ORDER BY freq DESC
-                    LIMIT %s;
-                """, (k,))
-                rows = cursor.fetchall()
+        def estimate():
+            with _get_db_connection() as conn:
+                return approximate_top_k(conn, table, column, k, mode)
+        approx = cached_query("top_k_column_values", DB_CONFIG, f"top_k {mode} {table} {column}", (k,), estimate)
+        if approx is not None:
+            return format_top_k(approx, table, column)
+        rows = _cached_fetch("top_k_column_values", f"""
+            SELECT {column}::text, COUNT(*) as freq
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+            ORDER BY freq DESC
+            LIMIT %s;
+        """, (k,), lambda cur: cur.fetchall())
         return "\n".join([f"{val}: {freq}" for val, freq in rows]) or "No data found."
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def numeric_column_stats(table: str, column: str) -> str:
+def numeric_column_stats(table: str, column: str, sample: str = "") -> str:
     """
     Calculates and returns basic statistics (mean, median, stddev, min, max)
     for a numeric column in a given table.
+    sample: optional "5%" or a row count like "100000" (plus " bernoulli" for
+    row-level sampling) to estimate from a TABLESAMPLE with 95% confidence intervals.
     """
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(f"""
-                    SELECT
-                        AVG({column}),
-                        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {column}),
-                        STDDEV({column}),
-                        MIN({column}),
-                        MAX({column})
-                    FROM {table}
-                    WHERE {column} IS NOT NULL;
-                """)
-                stats = cursor.fetchone()
+        spec = resolve_sample(DB_CONFIG, table, sample)
+        if spec is not None:
+            query, params = numeric_stats_query(table, column, spec)
+            stats = numeric_stats_from_row(_cached_fetch("numeric_column_stats", query, params, lambda cur: cur.fetchone()))
+            if not stats["rows"]:
+                return "No data found in the sample; try a larger sample."
+            return format_numeric_stats(stats, spec)
+        stats = _cached_fetch("numeric_column_stats", f"""
+            SELECT
+                AVG({column}),
+                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {column}),
+                STDDEV({column}),
+                MIN({column}),
+                MAX({column})
+            FROM {table}
+            WHERE {column} IS NOT NULL;
+        """, None, lambda cur: cur.fetchone())
         return (
             f"Mean: {stats[0]:.2f}\nMedian: {stats[1]:.2f}\n"
             f"StdDev: {stats[2]:.2f}\nMin: {stats[3]}\nMax: {stats[4]}"
         )
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def time_series_summary(table: str, date_col: str, agg_col: str) -> str:
+def time_series_summary(
+    table: str,
+    date_col: str,
+    agg_col: str,
+    sample: str = "",
+    granularities: str = "month",
+    aggregates: str = "avg",
+    fill_gaps: bool = False,
+    timezone: str = "",
+) -> str:
     """
     Groups by month (based on date_col) and computes average of agg_col,
     returning a time series summary.
+    sample: optional "5%" or a row count; averages are then estimated from a
+    TABLESAMPLE with 95% confidence intervals.
+    granularities / aggregates: comma-separated lists, e.g. "day,week,month"
+    and "avg,sum,count,p95" (hour, day, week, month, quarter, year; avg, sum,
+    count, min, max, stddev, median, or a percentile pNN with NN 1–99). All
+    combinations are computed in one scan and returned as one JSON payload
+    with a series per granularity.
+    fill_gaps: also list empty buckets (count 0). timezone: e.g. "Europe/Paris",
+    for bucketing timestamp-with-time-zone columns in local time.
+    Any of these options switches to the JSON payload; sample applies to the
+    default monthly average only.
     """
     try:
+        if (granularities, aggregates, fill_gaps, timezone) != ("month", "avg", False, ""):
+            if sample:
+                return "Error: sample only applies to the default monthly average."
+            grains = parse_list(granularities, GRANULARITIES, "granularity")
+            aggs = parse_list(aggregates, AGGREGATES, "aggregate")
+            with _get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    payload = summarize(cursor, DB_CONFIG, table, date_col, agg_col, grains, aggs, fill_gaps, timezone)
+            return format_summary(payload)
+        spec = resolve_sample(DB_CONFIG, table, sample)
+        if spec is None:
+            # Exact answers come from the incremental rollup, which only re-reads the newest month.
+            rows = rollup_series(DB_CONFIG, table, date_col, agg_col, "month")
+            return "\n".join([f"{date} : {avg:.2f}" for date, _, avg, *_ in rows])
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(f"""
-                    SELECT DATE_TRUNC('month', {date_col})::date, AVG({agg_col})
-                    FROM {table}
+                    SELECT DATE_TRUNC('month', {date_col})::date, AVG({agg_col}), STDDEV({agg_col}), COUNT(*)
+                    FROM {table} {spec.clause}
                     WHERE {date_col} IS NOT NULL AND {agg_col} IS NOT NULL
                     GROUP BY 1 ORDER BY 1;
                 """)
                 rows = cursor.fetchall()
-        return "\n".join([f"{date} : {avg:.2f}" for date, avg in rows])
+        return "\n".join(
+            [f"Estimated from a {spec.describe(sum(n for *_, n in rows))}:"]
+            + [f"{date} : {avg:.2f}{format_ci(mean_ci(avg, sd, n))}" for date, avg, sd, n in rows]
+        )
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
 
-def compute_correlation(table: str, col1: str, col2: str) -> str:
+def compute_correlation(table: str, col1: str, col2: str, sample: str = "") -> str:
     """
     Computes Pearson correlation between two numeric columns in a table.
+    sample: optional "5%" or a row count; the estimate then carries a 95%
+    Fisher-z confidence interval.
     """
     try:
+        spec = resolve_sample(DB_CONFIG, table, sample)
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(f"""
-                    SELECT CORR({col1}, {col2})
-                    FROM {table}
+                    SELECT CORR({col1}, {col2}), COUNT(*)
+                    FROM {table} {spec.clause if spec else ""}
                     WHERE {col1} IS NOT NULL AND {col2} IS NOT NULL;
                 """)
-                result = cursor.fetchone()[0]
-        return f"Correlation: {result:.4f}" if result is not None else "Not enough data to compute correlation."
+                result, n = cursor.fetchone()
+        if result is None:
+            return "Not enough data to compute correlation."
+        if spec is not None:
+            return f"Correlation: {result:.4f}{format_ci(correlation_ci(result, n), 4)}, estimated from a {spec.describe(n)}"
+        return f"Correlation: {result:.4f}"
+    except ValueError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Database error: {str(e)}"
 
@@ -175,21 +348,23 @@ def get_latest_entries_from_table(table: str) -> str:
     ordering columns like created_at, updated_at, or id.
     """
     try:
+        info = get_catalog(DB_CONFIG).snapshot().find(table)
+        if info is None:
+            return f"Table '{table}' not found."
+        order_column = next(
+            (col.name for col in info.columns if col.name in ("created_at", "updated_at", "id")),
+            None,
+        )
+        if order_column is None:
+            return f"No created_at, updated_at or id column to order {table} by."
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(f"""
-                    SELECT * FROM {table}
-                    ORDER BY COALESCE(
-                        (SELECT column_name FROM information_schema.columns
-                         WHERE table_name = %s AND column_name IN ('created_at', 'updated_at', 'id')
-                         ORDER BY ordinal_position LIMIT 1), 'id') DESC
-                    LIMIT 1;
-                """, (table,))
+                cursor.execute(f"SELECT * FROM {table} ORDER BY {order_column} DESC LIMIT 1;")
                 row = cursor.fetchone()
                 column_names = [desc[0] for desc in cursor.description]
-        output = [" | ".join(column_names), "-|-".join(["-" * len(c) for c in column_names])]
-        output.append(" | ".join(map(str, row)))
-        return "\n".join(output)
+        if row is None:
+            return f"Table '{table}' is empty."
+        return format_table(column_names, [row])
     except Exception as e:
         return f"Database error: {str(e)}"
 
@@ -12,6 +12,7 @@ Used as a sub-agent in a multi-agent ADK database assistant.
 """
 
 from google.adk import Agent
+from db_core.aio import to_async_tools
 from .prompt import instruction
 from .tools.schema_tools import (
     list_tables,
@@ -20,18 +21,20 @@ from .tools.schema_tools import (
     get_foreign_keys,
     get_primary_keys_for_table,
     get_table_size,
+    refresh_schema_cache,
 )
 
 schema_agent = Agent(
     name="schema_agent",
     model="gemini-2.0-flash",
     instruction=instruction,
-    tools=[
+    tools=to_async_tools([
         list_tables,
         describe_table,
         get_table_schema_json,
         get_foreign_keys,
         get_primary_keys_for_table,
-        get_table_size
-    ],
+        get_table_size,
+        refresh_schema_cache,
+    ]),
 )
@@ -11,7 +11,8 @@ from .schema_tools import (
     get_table_schema_json,
     get_foreign_keys,
     get_primary_keys_for_table,
-    get_table_size
+    get_table_size,
+    refresh_schema_cache,
 )
 
 __all__ = [
@@ -20,5 +21,6 @@ __all__ = [
     "get_table_schema_json",
     "get_foreign_keys",
     "get_primary_keys_for_table",
-    "get_table_size"
+    "get_table_size",
+    "refresh_schema_cache",
 ]
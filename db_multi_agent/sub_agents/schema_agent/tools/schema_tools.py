@@ -7,29 +7,28 @@ primary keys, and table size. Intended for schema_agent in a
 multi-agent ADK-based database assistant.
 """
 
-import psycopg2
 import json
 from db_config import DB_CONFIG
+from db_core.catalog import get_catalog
+from db_core.pool import get_connection
+from db_core.prepared import execute_prepared
 
 
 def _get_db_connection():
-    """Establish and return a PostgreSQL database connection."""
-    return psycopg2.connect(**DB_CONFIG)
+    """Check out a pooled PostgreSQL database connection."""
+    return get_connection(DB_CONFIG)
+
+
+def _get_catalog():
+    """Return the cached pg_catalog snapshot (re-validated when stale)."""
+    return get_catalog(DB_CONFIG).snapshot()
 
 
 def list_tables() -> str:
     """Returns all tables in the public schema as a newline-separated string."""
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    ORDER BY table_name;
-                """)
-                tables = cursor.fetchall()
-        return "\n".join([t[0] for t in tables]) or "No tables found."
+        tables = _get_catalog().tables("public")
+        return "\n".join([t.name for t in tables]) or "No tables found."
     except Exception as e:
         return f"Database error: {str(e)}"
 
@@ -37,19 +36,14 @@ def list_tables() -> str:
 def describe_table(table_name: str) -> str:
     """Returns column name, type, and nullability for a given table."""
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT column_name, data_type, is_nullable
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                rows = cursor.fetchall()
-        if not rows:
+        table = _get_catalog().find(table_name)
+        if table is None or not table.columns:
             return f"Table '{table_name}' not found."
         output = ["Column | Type | Nullable", "-------|------|---------"]
-        output += [f"{col} | {dtype} | {nullable}" for col, dtype, nullable in rows]
+        output += [
+            f"{col.name} | {col.data_type} | {'YES' if col.nullable else 'NO'}"
+            for col in table.columns
+        ]
         return "\n".join(output)
     except Exception as e:
         return f"Database error: {str(e)}"
@@ -58,18 +52,11 @@ def describe_table(table_name: str) -> str:
 def get_table_schema_json(table_name: str) -> str:
     """Returns table schema as a formatted JSON string."""
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT column_name, data_type, is_nullable
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                schema = [
-                    {"column": col, "type": dtype, "nullable": nullable == 'YES'}
-                    for col, dtype, nullable in cursor.fetchall()
-                ]
+        table = _get_catalog().find(table_name)
+        schema = [
+            {"column": col.name, "type": col.data_type, "nullable": col.nullable}
+            for col in (table.columns if table else [])
+        ]
         return json.dumps(schema, indent=2) if schema else f"No schema found for {table_name}."
     except Exception as e:
         return f"Database error: {str(e)}"
@@ -78,27 +65,15 @@ def get_table_schema_json(table_name: str) -> str:
 def get_foreign_keys(table_name: str) -> str:
     """Returns all foreign key constraints from a table."""
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT
-                        tc.constraint_name,
-                        kcu.column_name,
-                        ccu.table_name AS foreign_table,
-                        ccu.column_name AS foreign_column
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                      ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage AS ccu
-                      ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                      AND tc.table_name = %s;
-                """, (table_name,))
-                rows = cursor.fetchall()
-        if not rows:
+        table = _get_catalog().find(table_name)
+        if table is None or not table.foreign_keys:
             return f"No foreign keys found in {table_name}."
         output = ["Constraint | Column | References", "-----------|--------|-----------"]
-        output += [f"{c} | {col} | {ref_tbl}.{ref_col}" for c, col, ref_tbl, ref_col in rows]
+        output += [
+            f"{fk.constraint} | {col} | {fk.ref_table}.{ref_col}"
+            for fk in table.foreign_keys
+            for col, ref_col in zip(fk.columns, fk.ref_columns)
+        ]
         return "\n".join(output)
     except Exception as e:
         return f"Database error: {str(e)}"
@@ -107,17 +82,8 @@ def get_foreign_keys(table_name: str) -> str:
 def get_primary_keys_for_table(table_name: str) -> str:
     """Returns primary key columns of a given table."""
     try:
-        with _get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT kcu.column_name
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                      ON tc.constraint_name = kcu.constraint_name
-                    WHERE tc.constraint_type = 'PRIMARY KEY'
-                      AND tc.table_name = %s;
-                """, (table_name,))
-                pk_columns = [col[0] for col in cursor.fetchall()]
+        table = _get_catalog().find(table_name)
+        pk_columns = table.primary_key if table else []
         if not pk_columns:
             return f"No primary key found for {table_name}."
         return f"Primary key(s): {', '.join(pk_columns)}"
@@ -130,7 +96,7 @@ def get_table_size(table_name: str) -> str:
     try:
         with _get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute("""
+                execute_prepared(cursor, """
                     SELECT pg_size_pretty(pg_total_relation_size(%s::regclass));
                 """, (table_name,))
                 size = cursor.fetchone()[0]
@@ -139,3 +105,10 @@ def get_table_size(table_name: str) -> str:
         return f"Database error: {str(e)}"
 
 
+def refresh_schema_cache() -> str:
+    """Reloads the cached catalog snapshot after schema changes."""
+    try:
+        snapshot = get_catalog(DB_CONFIG).refresh()
+        return f"Schema cache refreshed: {len(snapshot.tables('public'))} tables in public schema."
+    except Exception as e:
+        return f"Database error: {str(e)}"
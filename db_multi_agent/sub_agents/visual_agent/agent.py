@@ -1,10 +1,11 @@
 from google.adk import Agent
+from db_core.aio import to_async_tools
 from .prompt import instruction
-from .tools.visual_tools import plot_histogram,plot_time_series
+from .tools.visual_tools import plot_histogram,plot_time_series,plot_result
 
 visual_agent = Agent(
     name="visual_agent",
     model="gemini-2.0-flash",
     instruction=instruction,
-    tools=[plot_histogram,plot_time_series]
+    tools=to_async_tools([plot_histogram, plot_time_series, plot_result])
 )
@@ -1,9 +1,11 @@
 from .visual_tools import (
     plot_histogram,
     plot_time_series,
+    plot_result,
 )
 
 __all__ = [
     "plot_histogram",
     "plot_time_series",
+    "plot_result",
 ]
@@ -1,34 +1,213 @@
-import psycopg2
-import matplotlib.pyplot as plt
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
 from db_config import DB_CONFIG
+from db_core import config
+from db_core.bulk import BulkExportError, get_handle, handle_columns
+from db_core.downsample import choose_bucket, lttb
+from db_core.pool import get_connection
 
-def plot_histogram(table: str, column: str, bins: int = 10):
-    with psycopg2.connect(**DB_CONFIG) as conn:
+
+def _new_figure():
+    """
+    A matplotlib Figure drawn by the Agg (PNG) canvas. matplotlib is imported
+    here, on the first plot, rather than with the agent; building the figure
+    directly also skips pyplot, its backend selection and its global figure
+    state, so concurrent tool calls need no lock.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _unique_path(stem: str) -> str:
+    """A fresh <stem>_<id>.png name, so concurrent calls never overwrite each other's chart."""
+    return f"{stem}_{uuid.uuid4().hex[:12]}.png"
+
+
+def _get_db_connection():
+    """Check out a pooled PostgreSQL database connection."""
+    return get_connection(DB_CONFIG)
+
+
+def plot_histogram(table: str, column: str, bins: int = 10, sample_percent: float = 0.0):
+    """
+    Plots a histogram of a numeric column and saves it as
+    histogram_<id>.png, a new file per call; the path is returned.
+    Binning runs inside PostgreSQL (width_bucket over a min/max pre-pass), so
+    only `bins` rows are transferred. Set sample_percent (0-100) to bin a
+    repeatable TABLESAMPLE of the table instead of every row.
+    """
+    source = table
+    if sample_percent and 0 < sample_percent < 100:
+        source = f"{table} TABLESAMPLE SYSTEM ({float(sample_percent)}) REPEATABLE ({config.SAMPLE_SEED})"
+    with _get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(f"SELECT {column} FROM {table};")
-            data = [row[0] for row in cur.fetchall()]
-            plt.hist(data, bins=bins)
-            plt.title(f"{column} Distribution")
-            plt.xlabel(column)
-            plt.ylabel("Frequency")
-            plt.savefig("histogram.png")
-            return "Histogram saved as histogram.png"
-
-def plot_time_series(table: str, date_column: str, value_column: str):
-    with psycopg2.connect(**DB_CONFIG) as conn:
+            cur.execute(f"SELECT MIN({column}), MAX({column}), COUNT({column}) FROM {source};")
+            lo, hi, count = cur.fetchone()
+            if count <= config.HISTOGRAM_RAW_MAX_ROWS or not isinstance(lo, (int, float, Decimal)):
+                # Small or non-numeric columns: bin client-side exactly as before.
+                cur.execute(f"SELECT {column} FROM {source} WHERE {column} IS NOT NULL;")
+                data, weights = [row[0] for row in cur.fetchall()], None
+            elif lo == hi:
+                data, weights = [lo], [count]
+            else:
+                cur.execute(f"""
+                    SELECT LEAST(WIDTH_BUCKET({column}::float8, %s, %s, %s), %s) AS bucket, COUNT(*)
+                    FROM {source}
+                    WHERE {column} IS NOT NULL
+                    GROUP BY bucket
+                    ORDER BY bucket;
+                """, (float(lo), float(hi), bins, bins))
+                width = (float(hi) - float(lo)) / bins
+                edges = [float(lo) + i * width for i in range(bins)] + [float(hi)]
+                counts = [0] * bins
+                for bucket, freq in cur.fetchall():
+                    counts[bucket - 1] = freq
+                # One weighted sample per bin reproduces matplotlib's bars exactly.
+                data, bins, weights = edges[:-1], edges, counts
+    fig = _new_figure()
+    ax = fig.add_subplot()
+    ax.hist(data, bins=bins, weights=weights)
+    ax.set_title(f"{column} Distribution")
+    ax.set_xlabel(column)
+    ax.set_ylabel("Frequency" if source == table else f"Frequency ({sample_percent}% sample)")
+    path = _unique_path("histogram")
+    fig.savefig(path)
+    return f"Histogram saved as {path}"
+
+def plot_time_series(table: str, date_column: str, value_column: str, mode: str = "auto", max_points: int = 0):
+    """
+    Plots a value column over time and saves it as time_series_<id>.png,
+    a new file per call; the path is returned.
+    The number of points fetched is bounded regardless of table size:
+    - "auto" (default): series longer than max_points are bucketed in SQL
+      (date_bin/date_trunc) and drawn as the bucket average with a min/max band.
+    - "raw": keeps raw fidelity by downsampling to max_points with LTTB;
+      very long series are first reduced to per-bucket min/max points in SQL.
+    """
+    max_points = max_points or config.TIMESERIES_MAX_POINTS
+    if mode not in ("auto", "raw"):
+        return "Invalid mode. Use 'auto' or 'raw'."
+    ts = f"{date_column}::timestamp"
+    where = f"WHERE {date_column} IS NOT NULL AND {value_column} IS NOT NULL"
+    band = None
+    with _get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT {date_column}, {value_column} 
-                FROM {table} 
-                ORDER BY {date_column} ASC;
-            """)
-            rows = cur.fetchall()
-            dates, values = zip(*rows)
-            plt.plot(dates, values)
-            plt.title(f"{value_column} over Time")
-            plt.xlabel("Date")
-            plt.ylabel(value_column)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig("time_series.png")
-            return "Time series saved as time_series.png"
+            cur.execute(f"SELECT MIN({ts}), MAX({ts}), COUNT(*) FROM {table} {where};")
+            start, end, count = cur.fetchone()
+            if not count:
+                return f"No time series data found in {table} for {date_column} and {value_column}."
+            limit = max_points if mode == "auto" else config.TIMESERIES_LTTB_MAX_INPUT
+            if count <= limit:
+                cur.execute(f"""
+                    SELECT {date_column}, {value_column}
+                    FROM {table}
+                    {where}
+                    ORDER BY {date_column} ASC;
+                """)
+                rows = cur.fetchall()
+                description = f"{len(rows)} points"
+            else:
+                span = max((end - start).total_seconds(), 1.0)
+                bucket = choose_bucket(span, limit if mode == "auto" else limit // 2, ts, conn.server_version)
+                cur.execute(f"""
+                    SELECT {bucket.sql} AS bucket, MIN({value_column}), AVG({value_column}), MAX({value_column})
+                    FROM {table}
+                    {where}
+                    GROUP BY bucket
+                    ORDER BY bucket;
+                """)
+                buckets = cur.fetchall()
+                if mode == "auto":
+                    rows = [(b, avg) for b, _, avg, _ in buckets]
+                    band = ([b for b, *_ in buckets], [lo for _, lo, _, _ in buckets], [hi for *_, hi in buckets])
+                    description = f"{len(rows)} buckets of {bucket.label}, avg with min/max band"
+                else:
+                    # Both extremes of each bucket survive into LTTB, so peaks are not averaged away.
+                    rows = [point for b, lo, _, hi in buckets for point in ((b, lo), (b, hi))]
+                    description = f"min/max of {len(buckets)} buckets of {bucket.label}"
+
+    if mode == "raw" and len(rows) > max_points:
+        xs = [_epoch(d) for d, _ in rows]
+        keep = lttb(xs, [float(v) for _, v in rows], max_points)
+        rows = [rows[i] for i in keep]
+        description += f", LTTB-downsampled to {len(rows)} points"
+
+    dates, values = zip(*rows)
+    fig = _new_figure()
+    ax = fig.add_subplot()
+    if band is not None:
+        ax.fill_between(band[0], [float(v) for v in band[1]], [float(v) for v in band[2]], alpha=0.3, label="min/max")
+    ax.plot(dates, values)
+    ax.set_title(f"{value_column} over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel(value_column)
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    path = _unique_path("time_series")
+    fig.savefig(path)
+    return f"Time series saved as {path} ({description})"
+
+
+def plot_result(handle: str, x_column: str, y_column: str = "", bins: int = 10):
+    """
+    Plots columns of a result handle from export_query_result and saves the
+    chart as <handle>_<columns>.png, reading the extracted Arrow columns instead of
+    querying again. Without y_column it draws a histogram of x_column;
+    with it, a line of y_column over x_column (sorted by x). Lines longer
+    than the point budget are drawn as per-bucket averages with a min/max band.
+    """
+    try:
+        result = get_handle(handle)
+        table = handle_columns(result, ",".join(filter(None, (x_column, y_column))))
+    except BulkExportError as e:
+        return f"Error: {str(e)}"
+    import numpy as np
+    import pyarrow.compute as pc
+
+    table = table.drop_null()
+    if not table.num_rows:
+        return f"No non-null values in {result.id} for {', '.join(table.column_names)}."
+    fig = _new_figure()
+    ax = fig.add_subplot()
+    path = "_".join(filter(None, (result.id, x_column, y_column))) + ".png"
+    if not y_column:
+        ax.hist(table[x_column].to_numpy(), bins=bins)
+        ax.set_title(f"{x_column} Distribution")
+        ax.set_xlabel(x_column)
+        ax.set_ylabel("Frequency")
+        description = f"histogram of {table.num_rows:,} values"
+    else:
+        table = table.take(pc.sort_indices(table, [(x_column, "ascending")]))
+        xs, ys = table[x_column].to_numpy(), table[y_column].to_numpy().astype(float)
+        if len(xs) > config.TIMESERIES_MAX_POINTS:
+            # Contiguous buckets of x: average line with a min/max band, as plot_time_series does.
+            starts = np.linspace(0, len(xs), config.TIMESERIES_MAX_POINTS, endpoint=False).astype(int)
+            counts = np.diff(np.append(starts, len(xs)))
+            lows, highs = np.minimum.reduceat(ys, starts), np.maximum.reduceat(ys, starts)
+            xs, ys = xs[starts], np.add.reduceat(ys, starts) / counts
+            ax.fill_between(xs, lows, highs, alpha=0.3, label="min/max")
+            description = f"{table.num_rows:,} rows in {len(starts)} buckets, avg with min/max band"
+        else:
+            description = f"{table.num_rows:,} points"
+        ax.plot(xs, ys)
+        ax.set_title(f"{y_column} by {x_column}")
+        ax.set_xlabel(x_column)
+        ax.set_ylabel(y_column)
+        ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    fig.savefig(path)
+    return f"Plot saved as {path} ({description})"
+
+
+def _epoch(value) -> float:
+    """Seconds since the epoch for a date or datetime (naive values treated as UTC)."""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
@@ -0,0 +1,5 @@
+from .parallel_tools import run_parallel
+
+__all__ = [
+    "run_parallel",
+]
@@ -0,0 +1,56 @@
+"""
+Parallel fan-out for the router agent.
+
+run_parallel lets the router answer a multi-part question ("describe
+orders and plot its monthly revenue") in one step: the independent tool
+calls of the sub-agents run concurrently (db_core/fanout.py) and their
+outputs come back merged in request order.
+"""
+
+from db_core import config
+from db_core.fanout import FanOutCall, fan_out, format_fan_out
+from ..sub_agents.analysis_agent.agent import analysis_agent
+from ..sub_agents.query_agent.agent import query_agent
+from ..sub_agents.schema_agent.agent import schema_agent
+from ..sub_agents.visual_agent.agent import visual_agent
+
+
+def _sub_agent_tools() -> dict:
+    """{tool name: sync function} over every sub-agent; the first agent listed wins a shared name."""
+    tools = {}
+    for agent in (query_agent, schema_agent, analysis_agent, visual_agent):
+        for tool in agent.tools:
+            tools.setdefault(tool.__name__, getattr(tool, "sync", tool))
+    return tools
+
+
+PARALLEL_TOOLS = _sub_agent_tools()
+
+
+def run_parallel(tasks: list[dict]) -> str:
+    """
+    Runs independent database tool calls at the same time and returns all
+    their outputs, numbered in the order given. Use it when a request needs
+    several lookups that do not depend on each other's results, e.g.
+    [{"tool": "describe_table", "args": {"table_name": "orders"}},
+     {"tool": "time_series_summary", "args": {"table": "orders", "date_col": "created_at", "agg_col": "amount"}},
+     {"tool": "plot_time_series", "args": {"table": "orders", "date_column": "created_at", "value_column": "amount"}}]
+    Each task names a tool of the query, schema, analysis or visual tools
+    and its arguments. Calls that need an earlier call's output must be made
+    separately, after it.
+    """
+    if not tasks:
+        return "Error: no tasks given."
+    if len(tasks) > config.FANOUT_MAX_CALLS:
+        return f"Error: at most {config.FANOUT_MAX_CALLS} tasks can run in parallel; got {len(tasks)}."
+    calls = []
+    for i, task in enumerate(tasks, 1):
+        name = task.get("tool") if isinstance(task, dict) else None
+        if name not in PARALLEL_TOOLS:
+            return f"Error: task {i} names unknown tool {name!r}. Available: {', '.join(sorted(PARALLEL_TOOLS))}."
+        args = task.get("args") or {}
+        if not isinstance(args, dict):
+            return f"Error: task {i} ({name}) args must be an object of keyword arguments."
+        calls.append(FanOutCall(name, PARALLEL_TOOLS[name], args))
+    results, wall_seconds = fan_out(calls)
+    return format_fan_out(results, wall_seconds)
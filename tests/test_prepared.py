@@ -0,0 +1,143 @@
+"""
+Tests for db_core/prepared.py.
+
+The live tests need a PostgreSQL server; point DB_AGENT_TEST_DSN at one
+(e.g. "host=localhost dbname=postgres user=postgres") to run them.
+"""
+
+import os
+
+import psycopg2
+import pytest
+
+from db_core import config
+from db_core.prepared import PreparedStatements, execute_prepared
+
+COMMENTED_TEMPLATE = """
+    SELECT COUNT(*)
+    FROM generate_series(1, 10) AS g
+    WHERE g > %s; -- trailing comment
+"""
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.connection = type("Connection", (), {})()
+        self.connection.prepared_statements = PreparedStatements(max_statements=1, threshold=1)
+        self.sent = []
+        self.fail = False
+
+    def execute(self, sql, params=None):
+        self.sent.append(sql)
+        if self.fail:
+            self.fail = False
+            raise psycopg2.Error("simulated failure")
+
+
+def _guarded_names(sql):
+    """Names the batch deallocates only after checking pg_prepared_statements."""
+    for line in sql.splitlines():
+        if line.startswith("DO ") and "pg_prepared_statements" in line:
+            return line.split("'{")[1].split("}'")[0].split(",")
+    return []
+
+
+def test_commented_template_does_not_swallow_execute():
+    cursor = _RecordingCursor()
+    execute_prepared(cursor, COMMENTED_TEMPLATE, (5,), prefix="SET TRANSACTION READ ONLY;")
+    sql = cursor.sent[-1]
+    # Everything after a line comment up to the newline is ignored by the server.
+    statements = [line.split("--")[0] for line in sql.splitlines()]
+    assert any(line.startswith("EXECUTE ") for line in statements)
+    assert any(line.startswith("PREPARE ") for line in statements)
+
+    # A new template evicts the first one: DEALLOCATE must also survive the comment.
+    execute_prepared(cursor, COMMENTED_TEMPLATE.replace("> %s", ">= %s"), (5,))
+    statements = [line.split("--")[0] for line in cursor.sent[-1].splitlines()]
+    assert any(line.startswith("DEALLOCATE ") for line in statements)
+    assert any(line.startswith("EXECUTE ") for line in statements)
+
+
+def test_failed_prepare_batch_deallocates_if_exists():
+    cursor = _RecordingCursor()
+    registry = cursor.connection.prepared_statements
+    cursor.fail = True
+    with pytest.raises(psycopg2.Error):
+        execute_prepared(cursor, "SELECT %s::int;", ("x",))
+    name = cursor.sent[-1].split("PREPARE ")[1].split()[0]
+    assert not registry.statements
+
+    # Whether or not the PREPARE ran, the next batch drops the name if the server has it.
+    execute_prepared(cursor, "SELECT 1;")
+    assert _guarded_names(cursor.sent[-1]) == [name]
+    assert f"DEALLOCATE {name};" not in cursor.sent[-1]
+    execute_prepared(cursor, "SELECT 1;")
+    assert not _guarded_names(cursor.sent[-1])
+
+
+def test_failed_batch_keeps_stale_names():
+    cursor = _RecordingCursor()
+    execute_prepared(cursor, "SELECT 1;")
+    first = cursor.sent[-1].split("PREPARE ")[1].split()[0]
+
+    # The second template evicts the first; its DEALLOCATE rides in a batch that fails.
+    cursor.fail = True
+    with pytest.raises(psycopg2.Error):
+        execute_prepared(cursor, "SELECT 2;")
+    assert f"DEALLOCATE {first};" in cursor.sent[-1]
+    second = cursor.sent[-1].split("PREPARE ")[1].split()[0]
+
+    execute_prepared(cursor, "SELECT 3;")
+    assert sorted(_guarded_names(cursor.sent[-1])) == sorted([first, second])
+
+
+def test_failed_execute_keeps_prepared_statement():
+    cursor = _RecordingCursor()
+    registry = cursor.connection.prepared_statements
+    execute_prepared(cursor, "SELECT %s::int;", (1,))
+    name = registry.statements["SELECT %s::int;"]
+
+    cursor.fail = True
+    with pytest.raises(psycopg2.Error):
+        execute_prepared(cursor, "SELECT %s::int;", ("x",))
+    assert registry.statements["SELECT %s::int;"] == name
+    execute_prepared(cursor, "SELECT %s::int;", (2,))
+    assert "PREPARE" not in cursor.sent[-1] and not _guarded_names(cursor.sent[-1])
+
+
+@pytest.mark.skipif(not os.environ.get("DB_AGENT_TEST_DSN"), reason="DB_AGENT_TEST_DSN is not set")
+def test_commented_template_through_prepare_path(monkeypatch):
+    from db_core.prepared import PreparingConnection
+
+    monkeypatch.setattr(config, "PREPARED_STATEMENTS_ENABLED", True)
+    conn = psycopg2.connect(os.environ["DB_AGENT_TEST_DSN"], connection_factory=PreparingConnection)
+    try:
+        with conn.cursor() as cursor:
+            # Runs unprepared, then PREPARE + EXECUTE, then EXECUTE alone.
+            for _ in range(max(config.PREPARED_THRESHOLD, 1) + 1):
+                execute_prepared(cursor, COMMENTED_TEMPLATE, (5,), prefix="SET TRANSACTION READ ONLY; ")
+                assert cursor.fetchone() == (5,)
+        assert conn.prepared_statements.statements
+    finally:
+        conn.close()
+
+
+@pytest.mark.skipif(not os.environ.get("DB_AGENT_TEST_DSN"), reason="DB_AGENT_TEST_DSN is not set")
+def test_failed_execute_does_not_leak_statement(monkeypatch):
+    from db_core.prepared import PreparingConnection
+
+    monkeypatch.setattr(config, "PREPARED_STATEMENTS_ENABLED", True)
+    conn = psycopg2.connect(os.environ["DB_AGENT_TEST_DSN"], connection_factory=PreparingConnection)
+    conn.prepared_statements = PreparedStatements(max_statements=4, threshold=1)
+    try:
+        with conn.cursor() as cursor:
+            # PREPARE succeeds, then EXECUTE fails on the cast.
+            with pytest.raises(psycopg2.DataError):
+                execute_prepared(cursor, "SELECT %s::int;", ("x",))
+            conn.rollback()
+            execute_prepared(cursor, "SELECT 1;")
+            conn.rollback()
+            cursor.execute("SELECT name FROM pg_prepared_statements;")
+            assert [row[0] for row in cursor.fetchall()] == list(conn.prepared_statements.statements.values())
+    finally:
+        conn.close()
@@ -0,0 +1,46 @@
+"""
+Paging tests for run_query's streamed results.
+
+They need a PostgreSQL server; point DB_AGENT_TEST_DSN at one
+(e.g. "host=localhost dbname=postgres user=postgres") to run them.
+"""
+
+import os
+import re
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.environ.get("DB_AGENT_TEST_DSN"), reason="DB_AGENT_TEST_DSN is not set")
+
+ROWS = 2500
+QUERY = f"SELECT g AS id, g % 7 AS bucket FROM generate_series(1, {ROWS}) AS g ORDER BY g"
+_ROW_RE = re.compile(r"^(\d+) \| \d+$")
+_TOKEN_RE = re.compile(r"continuation_token='([^']+)'")
+
+
+@pytest.fixture
+def query_tools(monkeypatch):
+    import psycopg2.extensions
+
+    import db_config
+
+    monkeypatch.setattr(db_config, "DB_CONFIG", psycopg2.extensions.parse_dsn(os.environ["DB_AGENT_TEST_DSN"]))
+    from db_multi_agent.sub_agents.query_agent.tools import query_tools
+
+    monkeypatch.setattr(query_tools, "DB_CONFIG", db_config.DB_CONFIG)
+    return query_tools
+
+
+def test_paging_shows_every_row_once(query_tools):
+    seen, token, pages = [], "", 0
+    while True:
+        output = query_tools.run_query(QUERY, continuation_token=token)
+        seen += [int(m.group(1)) for m in map(_ROW_RE.match, output.splitlines()) if m]
+        pages += 1
+        match = _TOKEN_RE.search(output)
+        if match is None:
+            break
+        token = match.group(1)
+        assert pages < 20, "paging did not terminate"
+    assert pages > 1
+    assert seen == list(range(1, ROWS + 1))